@@ -1,9 +1,12 @@
-from flask import Flask, request, jsonify, send_from_directory, abort, render_template, redirect, url_for, flash
+from flask import Flask, request, jsonify, send_from_directory, send_file, abort, render_template, redirect, url_for, flash
 from flask_cors import CORS, cross_origin # Make sure cross_origin is imported
 import os
 import asyncio # Added asyncio
 # import uuid # Import uuid module - no longer needed
+import io
+import csv
 import json # Import json module
+import sqlite3
 from datetime import datetime, timezone # Import datetime
 from dotenv import load_dotenv
 from werkzeug.utils import secure_filename # Keep for now, might be used by other routes later or full version
@@ -11,13 +14,26 @@ from flask_mail import Mail, Message # Import Mail and Message
 import telegram # Keep for now
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.http import is_resource_modified
 import uuid # For generating unique post IDs
-import mammoth # For .docx conversion
-from collections import Counter # Import Counter for status breakdown
+from application_store import ApplicationStore, APPLICATION_DB_FILE # SQLite store shared with hr_bot.py
+from json_store import JsonFileWriter # Locked, atomic, group-committed JSON writes
+from blog_store import BlogPostCache, public_post, post_sort_key # mtime-validated in-process cache of blog_posts.json
+from page_cache import RenderedPageCache, choose_encoding # Pre-rendered, pre-compressed marketing pages
+from job_queue import JobQueue, JobWorker, JobHandler, EXECUTOR_PROCESS, JOB_QUEUE_DB_FILE # Durable background jobs
+from docx_conversion import convert_docx_job, docx_cache, DOCX_CACHE_DIR # mammoth conversion (worker process) and its shared disk cache
+from blob_store import image_blobs, cv_blobs, sync_post_image_refs, application_cv_path # Content-addressed images and CVs
+from image_derivatives import generate_derivatives_job, needs_derivatives, attach_image_variants, derivatives_available, srcset, strip_image_metadata # Resized blog images
+from cv_upload import StreamingUploadRequest, CVUploadRejected, store_uploaded_cv, find_cv_blob, cv_upload_sessions, UploadSessionError, CV_UPLOAD_CHUNK_BYTES # CVs streamed into the blob store while parsed
+from application_export import stream_cv_zip, stream_applications, import_applications, guess_format, EXPORT_FORMATS # Streamed HR exports and imports
+from cv_download import send_cv # CV downloads: sendfile, Range, or handed to the front proxy
+from cursor_pagination import encode_cursor, decode_cursor # Keyset page cursors for the blog API and the HR list
+from image_proxy import remote_images, fetch_remote_image_job, host_allowed, IMAGE_PROXY_ENABLED # Local copies of external images
 
 load_dotenv()
 
 app = Flask(__name__)
+app.request_class = StreamingUploadRequest # Bounded, sniffed CV uploads (cv_upload.py)
 app.jinja_env.add_extension('jinja2.ext.do') # Enable do extension
 CORS(app) # Initialize CORS globally
 app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', 'a_default_fallback_secret_key_for_development') # Added for Flask-Login session management
@@ -30,12 +46,35 @@ HR_CHAT_ID = os.environ.get('HR_CHAT_ID', 'YOUR_HR_CHAT_ID_PLACEHOLDER')
 # File Paths
 APPLICATION_LOG_FILE = 'submitted_applications.log.json'
 BLOG_POSTS_FILE = 'blog_posts.json'
+blog_posts_cache = BlogPostCache(BLOG_POSTS_FILE) # Re-parsed only when the file changes on disk
+
+def blog_posts_committed(posts: list):
+    """Runs under the blog_posts.json lock after each write from this process."""
+    blog_posts_cache.invalidate() # Drop the sorted index and cached API pages right away
+    sync_post_image_refs(posts) # Images no post uses any more are deleted
+
+blog_posts_writer = JsonFileWriter(BLOG_POSTS_FILE, on_commit=blog_posts_committed) # Shared lock file with blog_bot.py
+
+# Applications live in SQLite (WAL); APPLICATION_LOG_FILE is imported once when the database is first created
+application_store = ApplicationStore(APPLICATION_DB_FILE, legacy_log_file=APPLICATION_LOG_FILE)
+application_store.duplicate_index.rebuild() # Warm the (email, job_title) duplicate index at startup
+
+# Rendered-page cache for the static marketing routes (opt-in)
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'False').lower() == 'true'
+page_cache = RenderedPageCache(os.path.join(app.root_path, app.template_folder), enabled=PAGE_CACHE_ENABLED)
+
+# Background jobs (SMTP sends, .docx conversion) live in SQLite so they survive restarts
+JOB_WORKERS_IN_APP = os.getenv('JOB_WORKERS_IN_APP', 'True').lower() == 'true'
+JOB_FILES_FOLDER = 'job_files' # Uploaded files waiting for a background job
+job_queue = JobQueue(JOB_QUEUE_DB_FILE)
+job_worker = JobWorker(job_queue)
 
 # Uploads Configuration
 UPLOAD_FOLDER = 'uploads'
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16 MB max file size
+APPLICATION_IMPORT_MAX_BYTES = int(os.getenv('APPLICATION_IMPORT_MAX_BYTES', str(512 * 1024 * 1024))) # Admin bulk imports only
 
 # Flask-Mail Configuration
 app.config['MAIL_SERVER'] = os.getenv('MAIL_SERVER')
@@ -74,18 +113,37 @@ def load_user(user_id):
     return users_db.get(user_id)
 
 # --- Helper Functions ---
-def save_blog_posts(posts_data: list) -> bool:
+def update_blog_posts(mutator) -> tuple[bool, object]:
+    """Applies `mutator(posts)` to the current blog_posts.json under its file lock and saves it.
+
+    The mutator edits the list in place, so concurrent writers (other requests, blog_bot.py,
+    job callbacks) never overwrite each other's changes. Returns (True, mutator's return value),
+    or (False, None) if the file could not be written.
+    """
+    def apply(posts):
+        result = mutator(posts)
+        attach_image_variants(posts) # Resized copies of each post's image, once generated
+        return result
     try:
-        with open(BLOG_POSTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(posts_data, f, indent=4, ensure_ascii=False)
-        app.logger.info(f"Successfully saved {len(posts_data)} posts to {BLOG_POSTS_FILE}")
-        return True
+        result = blog_posts_writer.update(apply) # Lock, re-read, temp file, fsync, atomic rename
+        app.logger.info(f"Successfully updated {BLOG_POSTS_FILE}")
+        return True, result
     except IOError as e:
         app.logger.error(f"IOError writing to {BLOG_POSTS_FILE}: {e}", exc_info=True)
-        return False
+        return False, None
     except Exception as e: # Catch any other potential errors during save
         app.logger.error(f"Unexpected error saving to {BLOG_POSTS_FILE}: {e}", exc_info=True)
-        return False
+        return False, None
+
+def find_post(posts: list, post_id: str) -> dict | None:
+    return next((p for p in posts if p.get('id') == post_id), None)
+
+def legacy_static_image_path(image_url: str | None) -> str | None:
+    """File behind an image uploaded before the blob store (/static/uploaded_images/<uuid>.<ext>)."""
+    prefix = '/static/uploaded_images/'
+    if not image_url or not image_url.startswith(prefix):
+        return None # Blob store images are released through their references instead
+    return os.path.join(app.static_folder, 'uploaded_images', image_url.split('/')[-1])
 
 def generate_unique_post_id() -> str:
     return str(uuid.uuid4())
@@ -98,38 +156,19 @@ def save_uploaded_image(file_storage) -> str | None:
         original_filename = secure_filename(file_storage.filename)
         # Get file extension
         extension = original_filename.rsplit('.', 1)[1].lower() if '.' in original_filename else 'jpg' # default to jpg
-        unique_filename_stem = uuid.uuid4().hex
-        unique_filename = f"{unique_filename_stem}.{extension}"
-
-        upload_folder = os.path.join(app.static_folder, 'uploaded_images') # Use app.static_folder
-        os.makedirs(upload_folder, exist_ok=True)
-        save_path = os.path.join(upload_folder, unique_filename)
 
         try:
-            file_storage.save(save_path)
-            # Return web-accessible path
-            return url_for('static', filename=f'uploaded_images/{unique_filename}', _external=False)
+            # EXIF (GPS, camera data) removed before anything is published; stored once per distinct
+            # content, and the post takes a reference when it is saved
+            blob_name = image_blobs.put_bytes(strip_image_metadata(file_storage.read()), extension)
+            image_url = image_blobs.blob_url(blob_name) # Web-accessible path
+            enqueue_image_derivatives(image_url)
+            return image_url
         except Exception as e:
-            app.logger.error(f"Error saving uploaded image {original_filename} to {save_path}: {e}")
+            app.logger.error(f"Error saving uploaded image {original_filename} to the blob store: {e}")
             return None
     return None
 
-def convert_docx_to_html(docx_file_stream) -> str | None:
-    """Converts a .docx file stream to HTML."""
-    try:
-        # Ensure the stream is at the beginning if it's a file-like object that has been read before
-        if hasattr(docx_file_stream, 'seek') and callable(docx_file_stream.seek):
-            docx_file_stream.seek(0)
-
-        result = mammoth.convert_to_html(docx_file_stream)
-        html_content = result.value
-        if result.messages:
-            app.logger.warning(f"Mammoth conversion messages: {result.messages}")
-        return html_content
-    except Exception as e:
-        app.logger.error(f"Error converting .docx to HTML with mammoth: {e}", exc_info=True)
-        return None
-
 def read_text_from_file(file_storage) -> str | None:
     """Reads text content from an uploaded text/markdown file stream."""
     try:
@@ -159,6 +198,112 @@ def escape_markdown_v2(text: str) -> str:
         text = text.replace(char, '\\' + char)
     return text
 
+# --- Background Jobs ---
+def enqueue_job(job_type: str, payload: dict) -> int | None:
+    """Stores a job for the background workers; returns its id, or None if it could not be stored."""
+    try:
+        job_id = job_queue.enqueue(job_type, payload)
+    except sqlite3.Error as e:
+        app.logger.error(f"Could not enqueue {job_type} job: {e}", exc_info=True)
+        return None
+    job_worker.notify()
+    return job_id
+
+def send_email_job(payload: dict):
+    with app.app_context():
+        msg = Message(payload['subject'], recipients=payload['recipients'], body=payload['body'], reply_to=payload.get('reply_to'))
+        mail.send(msg)
+    app.logger.info(f"Email '{payload['subject']}' sent to {', '.join(payload['recipients'])}")
+
+def save_docx_for_conversion(docx_bytes: bytes) -> str:
+    """Stores an uploaded .docx until its conversion job has run; returns the saved path."""
+    os.makedirs(JOB_FILES_FOLDER, exist_ok=True)
+    docx_path = os.path.join(JOB_FILES_FOLDER, f"{uuid.uuid4().hex}.docx")
+    with open(docx_path, 'wb') as f:
+        f.write(docx_bytes)
+    return docx_path
+
+def remove_job_file(path: str | None):
+    if path and os.path.exists(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            app.logger.error(f"Error removing job file {path}: {e}")
+
+def apply_converted_docx(payload: dict, result: dict) -> dict:
+    """Runs after the worker process converted a post's .docx: stores the HTML in the post."""
+    if result['messages']:
+        app.logger.warning(f"Mammoth conversion messages for post {payload['post_id']}: {result['messages']}")
+    def apply(posts):
+        post = find_post(posts, payload['post_id'])
+        if post is None or post.get('content_conversion_id') != payload['conversion_id']:
+            return False # Post deleted, or its content was replaced again while this job waited
+        post['content'] = result['html']
+        post['content_is_html'] = True
+        post.pop('content_conversion_id', None)
+        post.pop('content_conversion_error', None)
+        post.pop('published', None) # A post created from the .docx goes live now
+        return True
+    saved, applied = update_blog_posts(apply)
+    if not saved:
+        raise IOError(f"Could not save converted content for post {payload['post_id']}") # Retried by the queue
+    if not applied:
+        app.logger.info(f"Discarding stale .docx conversion for post {payload['post_id']}")
+    remove_job_file(payload['docx_path'])
+    return {'post_id': payload['post_id'], 'messages': result['messages'][:20]}
+
+def docx_conversion_failed(payload: dict, error: str):
+    # The post keeps its previous content, or stays unpublished if it was created from the .docx
+    def apply(posts):
+        post = find_post(posts, payload['post_id'])
+        if post is not None and post.get('content_conversion_id') == payload['conversion_id']:
+            post.pop('content_conversion_id', None)
+            post['content_conversion_error'] = error
+    update_blog_posts(apply)
+    remove_job_file(payload['docx_path'])
+
+def enqueue_docx_conversion(post: dict, docx_path: str) -> int | None:
+    """Queues conversion of a post's .docx. Call only once `post` (with its content_conversion_id) is
+    saved, so the worker cannot finish before there is a post to store the HTML in."""
+    return enqueue_job('convert_blog_docx', {'post_id': post['id'], 'conversion_id': post['content_conversion_id'], 'docx_path': docx_path})
+
+def enqueue_image_derivatives(image_url: str | None) -> int | None:
+    """Queues generation of the resized copies of an uploaded image (no-op without Pillow or if they exist)."""
+    blob_name = needs_derivatives(image_url)
+    return enqueue_job('image_derivatives', {'blob': blob_name}) if blob_name else None
+
+def apply_image_derivatives(payload: dict, result: dict) -> dict:
+    """Runs after the worker process resized an image: links the new variants from the posts using it."""
+    # Checked on the cached copy first so the file (and the blog ETags) only change when a post uses the image
+    if attach_image_variants(load_blog_posts()) and not update_blog_posts(lambda posts: None)[0]:
+        raise IOError(f"Could not save image variants for blob {payload['blob']}") # Retried by the queue
+    return result
+
+def remote_image_fetched(payload: dict, result: dict) -> dict:
+    """Runs after an external image was cached: queues its resized copies if it changed."""
+    if result.get('changed') and result.get('blob'):
+        enqueue_image_derivatives(image_blobs.blob_url(result['blob']))
+    return result
+
+job_worker.register('send_email', JobHandler(send_email_job, concurrency=2, timeout=60))
+job_worker.register('fetch_remote_image', JobHandler(fetch_remote_image_job, concurrency=2, timeout=60, on_success=remote_image_fetched))
+job_worker.register('convert_blog_docx', JobHandler(
+    convert_docx_job, concurrency=2, executor=EXECUTOR_PROCESS, timeout=300,
+    on_success=apply_converted_docx, on_failure=docx_conversion_failed
+))
+if derivatives_available():
+    job_worker.register('image_derivatives', JobHandler(
+        generate_derivatives_job, concurrency=1, executor=EXECUTOR_PROCESS, timeout=120, on_success=apply_image_derivatives
+    ))
+else:
+    app.logger.warning("Pillow is not installed: blog images are stored as uploaded (EXIF included) and no resized copies are generated.")
+
+@app.before_request
+def start_job_worker():
+    # Started on the first request rather than at import time
+    if JOB_WORKERS_IN_APP:
+        job_worker.start()
+
 async def send_telegram_notification(applicant_data, cv_filepath):
     bot = telegram.Bot(token=TELEGRAM_BOT_TOKEN)
 
@@ -213,27 +358,9 @@ async def send_telegram_notification(applicant_data, cv_filepath):
         return False
 
 def load_blog_posts():
-    if not os.path.exists(BLOG_POSTS_FILE):
-        # Using print for now, as app.logger might not be configured for this context
-        print(f"INFO: {BLOG_POSTS_FILE} not found. Returning empty list.")
-        return []
-    try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-            if not content:
-                print(f"INFO: {BLOG_POSTS_FILE} is empty. Returning empty list.")
-                return []
-            posts_data = json.loads(content)
-            if not isinstance(posts_data, list):
-                print(f"WARNING: Data in {BLOG_POSTS_FILE} is not a list. Returning empty list.")
-                return []
-            return posts_data
-    except json.JSONDecodeError:
-        print(f"ERROR: Error decoding JSON from {BLOG_POSTS_FILE}. Returning empty list.")
-        return []
-    except IOError as e:
-        print(f"ERROR: IOError reading {BLOG_POSTS_FILE}: {e}. Returning empty list.")
-        return []
+    # Mutable copy of the cached posts; the file is only re-parsed when its mtime/size/inode change.
+    # Read-only callers should use blog_posts_cache.snapshot() / get_post() and skip the copy.
+    return blog_posts_cache.load_posts()
 
 # --- Routes ---
 
@@ -242,137 +369,294 @@ def load_blog_posts():
 def serve_static_files(filename):
     # Basic security: prevent access to .py files or other sensitive files
     # This is a simple check; more robust validation might be needed for production.
-    if filename.endswith('.py') or filename == '.env' or '.git' in filename:
+    if filename.endswith(('.py', '.db', '.db-wal', '.db-shm', '.ndjson', '.lock')) or filename == '.env' or '.git' in filename \
+            or filename.startswith((JOB_FILES_FOLDER + '/', DOCX_CACHE_DIR + '/', UPLOAD_FOLDER + '/')):
         return abort(404)
     return send_from_directory('.', filename)
 
 
+def render_page(template_name: str):
+    """render_template() for request-independent pages, served from the page cache when enabled."""
+    if not page_cache.enabled:
+        return render_template(template_name)
+    page = page_cache.get(template_name, lambda: render_template(template_name))
+    encoding = choose_encoding(page.variants, request.accept_encodings)
+    response = app.response_class(page.variants[encoding], mimetype='text/html')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.set_etag(f"{page.etag}-{encoding}") # Each encoding is a different representation
+    return response.make_conditional(request) # 304 Not Modified when If-None-Match still matches
+
 @app.route('/')
 def index():
-    return render_template('Index.html')
+    return render_page('Index.html')
 
 @app.route('/about')
 def about():
-    return render_template('about.html')
+    return render_page('about.html')
 
 @app.route('/careers')
 def careers():
-    return render_template('careers.html')
+    return render_page('careers.html')
 
 @app.route('/careers/business-analyst')
 def careers_business_analyst():
-    return render_template('careers/business-analyst.html')
+    return render_page('careers/business-analyst.html')
 
 @app.route('/careers/custom-projects-coordinator')
 def careers_custom_projects_coordinator():
-    return render_template('careers/custom-projects-coordinator.html')
+    return render_page('careers/custom-projects-coordinator.html')
 
 @app.route('/careers/full-stack-developer')
 def careers_full_stack_developer():
-    return render_template('careers/full-stack-developer.html')
+    return render_page('careers/full-stack-developer.html')
 
 @app.route('/careers/ui-ux-designer')
 def careers_ui_ux_designer():
-    return render_template('careers/ui-ux-designer.html')
+    return render_page('careers/ui-ux-designer.html')
 
 @app.route('/careers/virtual-assistant')
 def careers_virtual_assistant():
-    return render_template('careers/virtual-assistant.html')
+    return render_page('careers/virtual-assistant.html')
 
 @app.route('/contact')
 def contact():
-    return render_template('contact.html')
+    return render_page('contact.html')
 
 @app.route('/privacy-policy')
 def privacy_policy():
-    return render_template('privacy-policy.html')
+    return render_page('privacy-policy.html')
 
 @app.route('/services')
 def services():
-    return render_template('services.html')
+    return render_page('services.html')
 
 @app.route('/service-bpo')
 def service_bpo():
-    return render_template('service-bpo.html')
+    return render_page('service-bpo.html')
 
 @app.route('/service-request')
 def service_request():
-    return render_template('service-request.html')
+    return render_page('service-request.html')
 
 @app.route('/service-software-development')
 def service_software_development():
-    return render_template('service-software-development.html')
+    return render_page('service-software-development.html')
 
 @app.route('/service-virtual-assistance')
 def service_virtual_assistance():
-    return render_template('service-virtual-assistance.html')
+    return render_page('service-virtual-assistance.html')
 
 @app.route('/terms-of-service')
 def terms_of_service():
-    return render_template('terms-of-service.html')
+    return render_page('terms-of-service.html')
     
 
+# Lets browsers and proxies reuse blog responses briefly, then revalidate in the background
+BLOG_CACHE_CONTROL = os.getenv('BLOG_CACHE_CONTROL', 'public, max-age=60, stale-while-revalidate=600')
+
+def conditional_blog_response(etag: str, last_modified, build_response):
+    """Answers 304 when the client's If-None-Match / If-Modified-Since still match, otherwise
+    builds the full response. Either way the validators and Cache-Control are attached."""
+    if is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = build_response()
+    else:
+        response = app.response_class(status=304)
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = BLOG_CACHE_CONTROL
+    return response
+
 @app.route('/api/blog-posts', methods=['GET'])
 @cross_origin()
 def get_blog_posts():
-    page = request.args.get('page', 1, type=int)
     POSTS_PER_PAGE = 3  # Define how many posts per page
 
-    all_posts = load_blog_posts()
-    # Sort posts by date, assuming 'date_published' is in ISO format and can be sorted lexicographically for recent first
-    # For more robust sorting, convert to datetime objects if not already
-    try:
-        # Assuming date_published is like "YYYY-MM-DDTHH:MM:SSZ" or similar sortable string
-        all_posts.sort(key=lambda x: x.get('date_published', ''), reverse=True)
-    except Exception as e:
-        app.logger.error(f"Error sorting blog posts: {e}")
-        # Decide if you want to return unsorted or handle error differently
+    # Posts are pre-sorted by (date_published, id), newest first, once per data version
+    snapshot = blog_posts_cache.snapshot()
+    total_posts = len(snapshot.public_posts) # Posts still waiting for their .docx conversion are not listed
+    total_pages = snapshot.total_pages(POSTS_PER_PAGE)
 
-    total_posts = len(all_posts)
-    total_pages = (total_posts + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE
-
-    start_index = (page - 1) * POSTS_PER_PAGE
-    end_index = start_index + POSTS_PER_PAGE
-    posts_on_page = all_posts[start_index:end_index]
+    # ?cursor=<next_cursor> / ?before=<prev_cursor> address a page by the post next to it (found by
+    # binary search, and unaffected by posts published meanwhile); ?page=N is kept for old clients
+    try:
+        if request.args.get('before'):
+            start, end = snapshot.keyset_range(decode_cursor(request.args['before']), POSTS_PER_PAGE, 'before')
+        elif request.args.get('cursor'):
+            start, end = snapshot.keyset_range(decode_cursor(request.args['cursor']), POSTS_PER_PAGE)
+        else:
+            start = (request.args.get('page', 1, type=int) - 1) * POSTS_PER_PAGE
+            end = start + POSTS_PER_PAGE
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    page = start // POSTS_PER_PAGE + 1
+
+    def build_page_body() -> bytes:
+        posts = snapshot.public_posts[max(start, 0):max(end, 0)]
+        return app.json.dumps({
+            'posts': [public_post(post) for post in posts],
+            'current_page': page,
+            'total_pages': total_pages,
+            'total_posts': total_posts,
+            'next_cursor': encode_cursor(post_sort_key(posts[-1])) if posts and end < total_posts else None,
+            'prev_cursor': encode_cursor(post_sort_key(posts[0])) if posts and start > 0 else None
+        }).encode('utf-8')
+
+    def build_response():
+        if 0 <= start < max(total_posts, 1):
+            # Serialized once per data version and position, then served as cached bytes
+            body = snapshot.cached_payload(('api_page', start, end), build_page_body)
+        else:
+            body = build_page_body() # Out-of-range pages are not worth caching
+        return app.response_class(body, status=200, mimetype='application/json')
 
-    return jsonify({
-        'posts': posts_on_page,
-        'current_page': page,
-        'total_pages': total_pages,
-        'total_posts': total_posts
-    }), 200
+    # Every page of the listing changes whenever any post changes, so the data version is the ETag
+    return conditional_blog_response(snapshot.version, snapshot.last_modified, build_response)
 
 @app.route('/api/blog-posts/<string:post_id>', methods=['GET'])
 @cross_origin()
 def get_blog_post(post_id):
-    posts = load_blog_posts()
-    post = next((p for p in posts if p.get('id') == post_id), None)
+    snapshot = blog_posts_cache.snapshot()
+    post = blog_posts_cache.get_post(post_id, snapshot)
     if post:
-        return jsonify(post), 200
+        etag = snapshot.post_etag(post_id) or snapshot.version
+        return conditional_blog_response(etag, snapshot.last_modified, lambda: jsonify(public_post(post)))
     else:
         return jsonify({'error': 'Post not found'}), 404
 
+# Proxied external images change rarely; browsers may reuse them for a day and revalidate in the background
+IMAGE_PROXY_CACHE_CONTROL = os.getenv('IMAGE_PROXY_CACHE_CONTROL', 'public, max-age=86400, stale-while-revalidate=604800')
+
+def external_post_image_urls(snapshot) -> frozenset:
+    """image_urls of published posts that point at other sites (the proxy only serves these and IMAGE_PROXY_ALLOWED_HOSTS)."""
+    return snapshot.cached_payload(
+        ('external_image_urls',),
+        lambda: frozenset(post['image_url'] for post in snapshot.public_posts
+                          if post.get('image_url') and not post.get('image_url_is_static') and post['image_url'].startswith(('http://', 'https://')))
+    )
+
+def proxied_image_url(url: str | None, width: int | None = None) -> str | None:
+    """URL to use in pages for an image: external http(s) images go through /image-proxy."""
+    if not IMAGE_PROXY_ENABLED or not url or not url.startswith(('http://', 'https://')):
+        return url
+    return url_for('image_proxy', url=url, w=width) if width else url_for('image_proxy', url=url)
+
+@app.route('/image-proxy')
+def image_proxy():
+    url = request.args.get('url', '')
+    if not IMAGE_PROXY_ENABLED or not (host_allowed(url) or url in external_post_image_urls(blog_posts_cache.snapshot())):
+        abort(404) # Not an open proxy: only images the site itself links to
+    width = request.args.get('w', type=int)
+    try:
+        entry = remote_images.get(url)
+        if remote_images.claim_fetch(url): # Missing or due for revalidation, and no fetch queued yet
+            enqueue_job('fetch_remote_image', {'url': url})
+    except sqlite3.Error as e:
+        app.logger.error(f"Image proxy: error reading the remote image cache: {e}")
+        entry = None
+    cached = remote_images.cached_file(entry, width, webp=request.accept_mimetypes['image/webp'] > 0)
+    if cached is None:
+        # Not cached yet (the fetch job is queued): let this visitor load it from the origin
+        response = redirect(url, code=302)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    path, mimetype = cached
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=True)
+    response.headers['Cache-Control'] = IMAGE_PROXY_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept' # WebP or JPEG depending on what the browser accepts
+    return response
+
 @app.route('/post/<string:post_id>')
 @cross_origin()
 def view_post(post_id):
-    posts = load_blog_posts()
-    found_post = next((p for p in posts if p.get('id') == post_id), None)
-    if found_post:
-        # Update date format before passing to template
-        if 'date_published' in found_post and isinstance(found_post['date_published'], str):
-            try:
-                # Parse ISO 8601 string, handling the 'Z' for UTC
-                dt_object = datetime.fromisoformat(found_post['date_published'].replace('Z', '+00:00'))
-                # Format to "Month DD, YYYY"
-                found_post['date_published'] = dt_object.strftime('%B %d, %Y')
-            except ValueError as e:
-                app.logger.error(f"Error parsing date for post {post_id}: {e}")
-                # Keep original date string if parsing fails, or set to a default
-                # For now, we'll keep the original malformed or unparsable string
-                pass # Keep original if parsing fails
-        return render_template('post.html', post=found_post)
-    else:
+    snapshot = blog_posts_cache.snapshot()
+    cached_post = blog_posts_cache.get_post(post_id, snapshot)
+    if not cached_post:
         abort(404)
+    # The rendered page also depends on the template, so its mtime is part of the ETag
+    try:
+        template_mtime = os.stat(os.path.join(app.root_path, app.template_folder, 'post.html')).st_mtime_ns
+    except OSError:
+        template_mtime = 0
+    etag = f"{snapshot.post_etag(post_id) or snapshot.version}-{template_mtime:x}"
+    return conditional_blog_response(etag, snapshot.last_modified, lambda: render_post_page(post_id, cached_post))
+
+def render_post_page(post_id, cached_post):
+    found_post = public_post(cached_post) # Cached posts are read-only; copy before reformatting the date
+    # Update date format before passing to template
+    if 'date_published' in found_post and isinstance(found_post['date_published'], str):
+        try:
+            # Parse ISO 8601 string, handling the 'Z' for UTC
+            dt_object = datetime.fromisoformat(found_post['date_published'].replace('Z', '+00:00'))
+            # Format to "Month DD, YYYY"
+            found_post['date_published'] = dt_object.strftime('%B %d, %Y')
+        except ValueError as e:
+            app.logger.error(f"Error parsing date for post {post_id}: {e}")
+            # Keep original date string if parsing fails, or set to a default
+            # For now, we'll keep the original malformed or unparsable string
+            pass # Keep original if parsing fails
+    return app.make_response(render_template('post.html', post=found_post))
+
+@app.route('/api/cv-uploads', methods=['POST'])
+@cross_origin()
+def create_cv_upload():
+    """Starts a resumable CV upload: {filename, size} -> {upload_id, offset, size, chunk_size}."""
+    data = request.get_json(silent=True) or request.form
+    try:
+        size = int(data.get('size', 0))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Validation Error: Invalid file size.'}), 400
+    try:
+        return jsonify(cv_upload_sessions.create(data.get('filename'), size)), 201
+    except UploadSessionError as e:
+        return jsonify({'success': False, 'message': str(e)}), e.status
+
+@app.route('/api/cv-uploads/<upload_id>', methods=['GET', 'PUT'])
+@cross_origin(expose_headers=['Upload-Offset'])
+def cv_upload_chunk(upload_id):
+    """GET: bytes received so far (where to resume). PUT: raw chunk body at the `Upload-Offset` header."""
+    try:
+        if request.method == 'GET':
+            status = cv_upload_sessions.status(upload_id)
+            response = jsonify(status)
+            response.headers['Upload-Offset'] = str(status['offset'])
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return jsonify({'success': False, 'message': 'Missing or invalid Upload-Offset header.'}), 400
+        if (request.content_length or 0) > CV_UPLOAD_CHUNK_BYTES:
+            return jsonify({'success': False, 'message': f"Chunks may be at most {CV_UPLOAD_CHUNK_BYTES} bytes."}), 413
+        chunk = bytearray()
+        while len(chunk) <= CV_UPLOAD_CHUNK_BYTES: # Socket reads may come back short; one byte over the limit is enough to refuse
+            data = request.stream.read(CV_UPLOAD_CHUNK_BYTES + 1 - len(chunk))
+            if not data:
+                break
+            chunk += data
+        new_offset = cv_upload_sessions.write_chunk(upload_id, offset, bytes(chunk))
+        response = jsonify({'upload_id': upload_id, 'offset': new_offset})
+        response.headers['Upload-Offset'] = str(new_offset)
+        return response
+    except UploadSessionError as e:
+        response = jsonify({'success': False, 'message': str(e), 'offset': e.offset})
+        if e.offset is not None:
+            response.headers['Upload-Offset'] = str(e.offset)
+        return response, e.status
+    except CVUploadRejected as e:
+        app.logger.warning(f"Rejected resumable CV upload {upload_id[:8]}: {e.description}")
+        return jsonify({'success': False, 'message': e.description}), e.code
+
+@app.route('/api/cv-blobs/<sha256>', methods=['GET'])
+@cross_origin()
+def cv_blob_lookup(sha256):
+    """Whether a CV with this SHA-256 (and the extension of ?filename=) is stored; if so the form sends cv_sha256 instead of the file."""
+    exists = find_cv_blob(sha256, request.args.get('filename')) is not None
+    response = jsonify({'exists': exists})
+    response.headers['Cache-Control'] = 'no-store'
+    return response, 200 if exists else 404
 
 @app.route('/api/submit-application', methods=['POST', 'OPTIONS'])
 @cross_origin() # Keep CORS decorator
@@ -395,65 +679,56 @@ def submit_application(): # Synchronous route
                 return jsonify({'success': False, 'message': 'Validation Error: Missing required fields (Full Name, Email, Job Title).'}), 400
 
             # --- Duplicate Application Check ---
-            applications_log = []
-            if os.path.exists(APPLICATION_LOG_FILE):
-                try:
-                    with open(APPLICATION_LOG_FILE, 'r') as f:
-                        content = f.read()
-                        if content:
-                            applications_log = json.loads(content)
-                            if not isinstance(applications_log, list): # Ensure it's a list
-                                print(f"Warning: Log file {APPLICATION_LOG_FILE} does not contain a list. Resetting log.")
-                                applications_log = []
-                        else:
-                            applications_log = [] # File is empty
-                except json.JSONDecodeError:
-                    print(f"Warning: Could not decode JSON from {APPLICATION_LOG_FILE}. Starting with an empty log.")
-                    applications_log = [] # File is malformed
-                except IOError as e:
-                    print(f"Warning: Could not read {APPLICATION_LOG_FILE}: {e}. Starting with an empty log.")
-                    applications_log = []
-
-            for app_log in applications_log:
-                # Ensure keys exist in log entry before accessing
-                if app_log.get('email') == email and app_log.get('job_title') == job_title:
-                    return jsonify({'success': False, 'message': 'It looks like you have already applied for this position with this email.'}), 409
+            # In-memory Bloom filter + hash index on normalized (email, job_title)
+            if application_store.exists(email, job_title):
+                return jsonify({'success': False, 'message': 'It looks like you have already applied for this position with this email.'}), 409
             # --- End Duplicate Application Check ---
 
             cv_file = None
-            cv_filepath = None
+            cv_blob = None
             filename = None # Initialize filename
+            cv_upload_id = form_data.get('cv_upload_id') # CV sent beforehand in chunks through /api/cv-uploads
+            cv_sha256 = form_data.get('cv_sha256') # CV already stored (same file sent with an earlier application)
 
-            if 'cv_upload' not in request.files:
+            if 'cv_upload' not in request.files and not cv_upload_id and not cv_sha256:
                 return jsonify({'success': False, 'message': 'Validation Error: No CV file part in the request.'}), 400
 
-            cv_file = request.files['cv_upload']
+            cv_file = request.files.get('cv_upload')
 
-            if cv_file.filename == '':
+            if cv_file is not None and cv_file.filename == '':
                 return jsonify({'success': False, 'message': 'Validation Error: No CV file selected.'}), 400
 
-            if cv_file and allowed_file(cv_file.filename):
+            if cv_file is None and not cv_upload_id:
+                original_filename = form_data.get('cv_filename', '')
+                cv_blob = find_cv_blob(cv_sha256, original_filename)
+                if cv_blob is None: # Collected since the lookup, or never stored: the client sends the file instead
+                    return jsonify({'success': False, 'cv_missing': True, 'message': 'Please upload your CV file.'}), 409
+                timestamp_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+                filename = f"{timestamp_ms}-{secure_filename(original_filename)}"
+                app.logger.info(f"CV {filename} reuses stored blob {cv_blob}")
+            elif cv_file is None:
+                try:
+                    cv_blob, original_filename = cv_upload_sessions.finalize(cv_upload_id)
+                except UploadSessionError as e:
+                    return jsonify({'success': False, 'message': str(e)}), e.status
+                timestamp_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
+                filename = f"{timestamp_ms}-{secure_filename(original_filename)}"
+                app.logger.info(f"CV {filename} taken from resumable upload as blob {cv_blob}")
+            elif cv_file and allowed_file(cv_file.filename):
                 original_filename = secure_filename(cv_file.filename)
                 timestamp_ms = int(datetime.now(timezone.utc).timestamp() * 1000)
                 unique_filename = f"{timestamp_ms}-{original_filename}"
-                filename = unique_filename
-
-                upload_folder_path = app.config['UPLOAD_FOLDER']
-                if not os.path.exists(upload_folder_path):
-                    try:
-                        os.makedirs(upload_folder_path)
-                        app.logger.info(f"Created upload folder: {upload_folder_path}")
-                    except Exception as e:
-                        app.logger.error(f"Error creating upload folder {upload_folder_path}: {str(e)}")
-                        return jsonify({'success': False, 'message': 'An unexpected error occurred. Please try again later.'}), 500
-
-                cv_filepath = os.path.join(upload_folder_path, filename)
+                filename = unique_filename # Still the application's id and display name; the bytes go to the blob store
 
                 try:
-                    cv_file.save(cv_filepath)
-                    app.logger.info(f"CV saved to {cv_filepath}")
+                    # Hashed and type-checked while the request was parsed; a CV uploaded twice is stored once
+                    # Referenced only once the application is stored; until then GC's age limit keeps it
+                    cv_blob = store_uploaded_cv(cv_file)
+                    app.logger.info(f"CV {filename} saved as blob {cv_blob}")
+                except CVUploadRejected:
+                    raise
                 except Exception as e:
-                    app.logger.error(f"Error saving CV to {cv_filepath}: {str(e)}")
+                    app.logger.error(f"Error saving CV {filename} to the blob store: {str(e)}")
                     return jsonify({'success': False, 'message': 'An unexpected error occurred while saving your CV. Please try again later.'}), 500
             else:
                 return jsonify({'success': False, 'message': 'Validation Error: Invalid CV file type. Allowed: pdf, doc, docx.'}), 400
@@ -468,8 +743,6 @@ def submit_application(): # Synchronous route
             # }
 
             # --- Log Application ---
-            # The applications_log list is already populated from the duplicate check step earlier
-            # or initialized as an empty list if the log file didn't exist or was invalid.
             new_application_entry = {
                 'email': email,
                 'job_title': job_title,
@@ -477,17 +750,16 @@ def submit_application(): # Synchronous route
                 'full_name': full_name,
                 'phone_number': form_data.get('phone_number', ''),
                 'cv_filename': filename, # This is the unique filename
+                'cv_blob': cv_blob, # Content-addressed file in the CV blob store
                 'cover_letter': form_data.get('cover_letter', ''), # ADD THIS LINE
                 'status': 'new' # New field
             }
-            applications_log.append(new_application_entry)
 
-            try:
-                with open(APPLICATION_LOG_FILE, 'w') as f:
-                    json.dump(applications_log, f, indent=4)
-                print(f"Successfully logged application for {full_name} to {APPLICATION_LOG_FILE}")
-            except IOError as e:
-                print(f"Error: Could not write to {APPLICATION_LOG_FILE}: {e}. Application for {full_name} was processed but not logged.")
+            if application_store.add(new_application_entry):
+                print(f"Successfully logged application for {full_name} to {application_store.db_path}")
+                cv_blobs.add_ref(cv_blob, f"application:{timestamp_ms}")
+            else:
+                print(f"Error: Could not write to {application_store.db_path}. Application for {full_name} was processed but not logged.")
             # --- End Log Application ---
 
             # Telegram notification is now handled by the HR bot, so we remove the direct call here.
@@ -518,6 +790,9 @@ def submit_application(): # Synchronous route
                 'filename': filename # The unique CV filename
             }), 200
 
+        except CVUploadRejected as e: # Too large or not really a PDF/Word file; raised as soon as the bytes showed it
+            app.logger.warning(f"Rejected CV upload: {e.description}")
+            return jsonify({'success': False, 'message': e.description}), e.code
         except Exception as e: # Catch any unexpected errors during the process
             app.logger.error(f"An unexpected error occurred in /api/submit-application: {str(e)}")
             # It's good practice to log the full exception for debugging:
@@ -587,17 +862,13 @@ def submit_service_request():
 
         email_body = "\n".join(email_body_parts)
 
-        # Sender will be app.config['MAIL_DEFAULT_SENDER']
-        msg = Message(subject, recipients=[recipient_email], body=email_body)
-
-        try:
-            mail.send(msg)
-            app.logger.info(f"Service request email sent successfully to {recipient_email} from {email} for service {service_type}")
+        # Sent by a background worker (with retries); sender will be app.config['MAIL_DEFAULT_SENDER']
+        job_id = enqueue_job('send_email', {'subject': subject, 'recipients': [recipient_email], 'body': email_body})
+        if job_id is not None:
+            app.logger.info(f"Service request email from {email} for service {service_type} queued as job {job_id}")
             return jsonify({'success': True, 'message': 'Your service request has been sent successfully!'})
-        except Exception as e:
-            app.logger.error(f"Failed to send service request email from {email} to {recipient_email}. Error: {str(e)}")
-            # For more detailed debugging in a real scenario, you might log the full exception:
-            # app.logger.exception("Exception occurred while sending service request email:")
+        else:
+            app.logger.error(f"Failed to queue service request email from {email} to {recipient_email}.")
             return jsonify({'success': False, 'message': 'There was an error processing your request. Please try again later.'}), 500
 
     # Should not be reached if methods only include POST and preflight handles OPTIONS
@@ -650,19 +921,16 @@ def submit_contact_form():
         ]
         email_text = "\n".join(email_body_content)
 
-        # Sender will be app.config['MAIL_DEFAULT_SENDER']
+        # Sent by a background worker (with retries); sender will be app.config['MAIL_DEFAULT_SENDER']
         # Reply-To header can be set to the user's email for easier replies
-        msg = Message(email_subject, recipients=[recipient_email], body=email_text, reply_to=email)
-
-        try:
-            mail.send(msg)
-            app.logger.info(f"Contact form email sent successfully to {recipient_email} from {email}")
+        job_id = enqueue_job('send_email', {'subject': email_subject, 'recipients': [recipient_email], 'body': email_text, 'reply_to': email})
+        if job_id is not None:
+            app.logger.info(f"Contact form email from {email} queued as job {job_id}")
             # If not using AJAX on contact.html, redirect to a thank you page or back with a success message.
             # For now, returning JSON.
-            # A simple HTML response could also be: return "Thank you for your message!", 200
             return jsonify({'success': True, 'message': 'Your message has been sent successfully!'}), 200
-        except Exception as e:
-            app.logger.error(f"Failed to send contact form email from {email} to {recipient_email}. Error: {str(e)}")
+        else:
+            app.logger.error(f"Failed to queue contact form email from {email} to {recipient_email}.")
             return jsonify({'success': False, 'message': 'There was an error sending your message. Please try again later.'}), 500
 
 # --- Login/Logout Routes ---
@@ -705,14 +973,8 @@ def logout():
 @app.route('/admin/blog')
 @login_required
 def admin_blog_list():
-    posts = load_blog_posts()
-    # Sort posts by date, newest first. Assuming 'date_published' is in ISO format.
-    # More robust sorting might be needed if date formats vary or are not always present.
-    try:
-        posts.sort(key=lambda x: x.get('date_published', ''), reverse=True)
-    except Exception as e:
-        app.logger.error(f"Error sorting blog posts for admin panel: {e}")
-        # Continue with unsorted posts if sorting fails
+    # Newest first, from the date-ordered index maintained by the blog post cache
+    posts = blog_posts_cache.snapshot().sorted_posts
     return render_template('admin_blog_list.html', posts=posts, title="Blog Posts", now=datetime.now(timezone.utc)) # Changed title for clarity
 
 @app.route('/admin/blog/create', methods=['GET', 'POST'])
@@ -729,18 +991,21 @@ def admin_create_blog_post():
         image_upload_file = request.files.get('image_upload')
 
         final_content = ""
+        pending_docx = None
 
         # --- Content Processing ---
         if content_file and content_file.filename:
             filename = secure_filename(content_file.filename)
             if filename.lower().endswith('.docx'):
-                html_from_docx = convert_docx_to_html(content_file.stream)
-                if html_from_docx:
-                    final_content = html_from_docx
-                    content_is_html = True # Override if docx is successfully processed
+                docx_bytes = content_file.read()
+                cached_conversion = docx_cache.lookup(docx_bytes)
+                if cached_conversion:
+                    final_content = cached_conversion['html'] # Same document was converted before
                 else:
-                    flash('Error converting .docx file. Please check the file or provide content manually.', 'error')
-                    return render_template('admin_blog_form.html', title="Create New Blog Post", post=request.form, now=datetime.now(timezone.utc))
+                    # Converted by a background worker once the post is saved
+                    pending_docx = docx_bytes
+                    final_content = ''
+                content_is_html = True
             elif filename.lower().endswith(('.txt', '.md')):
                 text_from_file = read_text_from_file(content_file.stream)
                 if text_from_file:
@@ -793,12 +1058,34 @@ def admin_create_blog_post():
             "image_url_is_static": image_url_is_static # Store this new flag
         }
 
-        posts = load_blog_posts()
-        posts.append(new_post)
-        if save_blog_posts(posts):
-            flash(f"Blog post '{title}' created successfully!", 'success')
+        docx_path = None
+        if pending_docx:
+            try:
+                docx_path = save_docx_for_conversion(pending_docx)
+            except Exception as e:
+                app.logger.error(f"Error saving uploaded .docx for conversion: {e}", exc_info=True)
+                flash('Error saving the .docx file. Please try again or provide content manually.', 'error')
+                return render_template('admin_blog_form.html', title="Create New Blog Post", post=request.form, now=datetime.now(timezone.utc))
+            # Saved unpublished, so it never goes live with an empty body; the conversion publishes it
+            new_post['content_conversion_id'] = uuid.uuid4().hex
+            new_post['published'] = False
+
+        saved, _ = update_blog_posts(lambda posts: posts.append(new_post))
+        if saved:
+            if docx_path:
+                conversion_job_id = enqueue_docx_conversion(new_post, docx_path)
+                if conversion_job_id is None:
+                    remove_job_file(docx_path)
+                    # Nothing would ever publish it, so take the unpublished post back out
+                    update_blog_posts(lambda posts: posts.remove(find_post(posts, new_post_id)) if find_post(posts, new_post_id) else None)
+                    flash('Error queuing the .docx conversion. Please try again or provide content manually.', 'error')
+                    return render_template('admin_blog_form.html', title="Create New Blog Post", post=request.form, now=datetime.now(timezone.utc))
+                flash(f"Blog post '{title}' saved! It will be published once the .docx content is converted in the background (job {conversion_job_id}).", 'success')
+            else:
+                flash(f"Blog post '{title}' created successfully!", 'success')
             return redirect(url_for('admin_blog_list'))
         else:
+            remove_job_file(docx_path)
             flash('Error saving blog post to file. Please check server logs.', 'error')
             # Re-render form with data if save fails
             return render_template('admin_blog_form.html', title="Create New Blog Post", post=new_post, now=datetime.now(timezone.utc))
@@ -809,15 +1096,7 @@ def admin_create_blog_post():
 @app.route('/admin/blog/edit/<string:post_id>', methods=['GET', 'POST'])
 @login_required
 def admin_edit_blog_post(post_id):
-    posts = load_blog_posts()
-    post_to_edit = None
-    post_index = -1
-
-    for i, p in enumerate(posts):
-        if p.get('id') == post_id:
-            post_to_edit = p
-            post_index = i
-            break
+    post_to_edit = find_post(load_blog_posts(), post_id)
 
     if not post_to_edit:
         flash(f"Blog post with ID {post_id} not found.", 'error')
@@ -837,22 +1116,27 @@ def admin_edit_blog_post(post_id):
         new_content = post_to_edit.get('content') # Default to existing content
         new_content_is_html = post_to_edit.get('content_is_html', False)
 
+        pending_docx = None
+        content_replaced = False
+
         if content_file and content_file.filename:
             filename = secure_filename(content_file.filename)
             if filename.lower().endswith('.docx'):
-                html_from_docx = convert_docx_to_html(content_file.stream)
-                if html_from_docx is not None:
-                    new_content = html_from_docx
+                docx_bytes = content_file.read()
+                cached_conversion = docx_cache.lookup(docx_bytes)
+                if cached_conversion:
+                    new_content = cached_conversion['html'] # Same document was converted before
                     new_content_is_html = True
+                    content_replaced = True
                 else:
-                    flash('Error converting .docx file. Content not updated.', 'error')
-                    # Return here or let it proceed with old content if desired. For now, let's return.
-                    return render_template('admin_blog_form.html', title=f"Edit Post: {post_to_edit.get('title')}", post=post_to_edit, now=datetime.now(timezone.utc))
+                    # Existing content stays live until the background conversion replaces it
+                    pending_docx = docx_bytes
             elif filename.lower().endswith(('.txt', '.md')):
                 text_from_file = read_text_from_file(content_file.stream)
                 if text_from_file is not None:
                     new_content = text_from_file
                     new_content_is_html = content_is_html_form # Respect checkbox for txt/md
+                    content_replaced = True
                 else:
                     flash('Error reading content from text/markdown file. Content not updated.', 'error')
                     return render_template('admin_blog_form.html', title=f"Edit Post: {post_to_edit.get('title')}", post=post_to_edit, now=datetime.now(timezone.utc))
@@ -860,6 +1144,7 @@ def admin_edit_blog_post(post_id):
         elif content_text: # Only use content_text if no (valid) file was uploaded
              new_content = content_text
              new_content_is_html = content_is_html_form
+             content_replaced = True
 
 
         if not title:
@@ -877,7 +1162,7 @@ def admin_edit_blog_post(post_id):
 
         if updated_image_is_static and updated_image_url:
             old_static_image_filename = updated_image_url.split('/')[-1]
-            old_static_image_path = os.path.join(app.static_folder, 'uploaded_images', old_static_image_filename)
+            old_static_image_path = legacy_static_image_path(updated_image_url)
 
         if image_upload_file and image_upload_file.filename:  # New image uploaded
             saved_image_path = save_uploaded_image(image_upload_file)
@@ -919,18 +1204,65 @@ def admin_edit_blog_post(post_id):
             # If form_url is empty AND original was also empty/None, no change.
 
         # --- Update Post ---
-        posts[post_index]['title'] = title
-        posts[post_index]['author'] = author if author else None
-        posts[post_index]['content'] = new_content
-        posts[post_index]['content_is_html'] = new_content_is_html
-        posts[post_index]['image_url'] = updated_image_url # Use the processed updated_image_url
-        posts[post_index]['image_url_is_static'] = updated_image_is_static # Use the processed updated_image_is_static
+        # Only the fields this form owns are written, onto the current file contents
+        changes = {
+            'id': post_id,
+            'title': title,
+            'author': author if author else None,
+            'content': new_content,
+            'content_is_html': new_content_is_html,
+            'image_url': updated_image_url, # Use the processed updated_image_url
+            'image_url_is_static': updated_image_is_static, # Use the processed updated_image_is_static
+        }
+        removed_keys = []
         # date_published is not changed on edit, but could add a 'last_modified' field
+        if content_replaced:
+            # New content wins over any conversion still waiting in the queue, and publishes the post
+            removed_keys = ['content_conversion_id', 'content_conversion_error', 'published']
 
-        if save_blog_posts(posts):
-            flash(f"Blog post '{title}' updated successfully!", 'success')
+        docx_path = None
+        if pending_docx:
+            try:
+                docx_path = save_docx_for_conversion(pending_docx)
+            except Exception as e:
+                app.logger.error(f"Error saving uploaded .docx for conversion: {e}", exc_info=True)
+                flash('Error saving the .docx file. Content not updated.', 'error')
+                return render_template('admin_blog_form.html', title=f"Edit Post: {post_to_edit.get('title')}", post=post_to_edit, now=datetime.now(timezone.utc))
+            # Current content stays live until the conversion replaces it
+            changes['content_conversion_id'] = uuid.uuid4().hex
+            removed_keys = ['content_conversion_error']
+
+        def apply_edit(posts):
+            post = find_post(posts, post_id)
+            if post is None:
+                return False # Deleted while the form was being submitted
+            post.update(changes)
+            for key in removed_keys:
+                post.pop(key, None)
+            return True
+        saved, found = update_blog_posts(apply_edit)
+        if saved and not found:
+            remove_job_file(docx_path)
+            flash(f"Blog post with ID {post_id} not found.", 'error')
+            return redirect(url_for('admin_blog_list'))
+        if saved:
+            if docx_path:
+                conversion_job_id = enqueue_docx_conversion(changes, docx_path)
+                if conversion_job_id is None:
+                    remove_job_file(docx_path)
+                    def clear_conversion(posts):
+                        post = find_post(posts, post_id)
+                        if post is not None and post.get('content_conversion_id') == changes['content_conversion_id']:
+                            post.pop('content_conversion_id')
+                    update_blog_posts(clear_conversion)
+                    flash(f"Blog post '{title}' updated, but queuing the .docx conversion failed. Content not updated.", 'error')
+                    return redirect(url_for('admin_blog_list'))
+                flash(f"Blog post '{title}' updated! The .docx content is being converted in the background (job {conversion_job_id}).", 'success')
+            else:
+                flash(f"Blog post '{title}' updated successfully!", 'success')
             return redirect(url_for('admin_blog_list'))
         else:
+            remove_job_file(docx_path)
             flash('Error saving updated blog post. Please check server logs.', 'error')
             # Re-render form with current (attempted) data
             # Construct a dictionary representing the current state for re-rendering
@@ -953,23 +1285,20 @@ def admin_edit_blog_post(post_id):
 @login_required
 def admin_dashboard():
     # Blog statistics
-    blog_posts = load_blog_posts()
-    total_blog_posts = len(blog_posts)
-
-    # HR statistics
-    hr_applications = load_applications_hr()
-    total_hr_applications = len(hr_applications)
-
-    hr_applications_by_status = {}
-    if hr_applications:
-        status_counts = Counter(app_item.get('status', 'unknown') for app_item in hr_applications)
-        # Ensure all statuses from STATUS_DISPLAY_NAMES_HR are present, even if count is 0
-        for status_key in STATUS_DISPLAY_NAMES_HR:
-            hr_applications_by_status[status_key] = status_counts.get(status_key, 0)
-    else: # Ensure structure exists even if no applications
-        for status_key in STATUS_DISPLAY_NAMES_HR:
-            hr_applications_by_status[status_key] = 0
+    total_blog_posts = len(blog_posts_cache.snapshot().posts)
 
+    # HR statistics: counters kept by triggers in the application store, not a scan of the applications
+    try:
+        status_counts = application_store.status_counts()
+        hr_applications_by_job_title = application_store.job_title_counts()
+    except Exception as e:
+        app.logger.error(f"Dashboard: Error reading application counters from {application_store.db_path}: {e}", exc_info=True)
+        status_counts, hr_applications_by_job_title = {}, {}
+    total_hr_applications = sum(status_counts.values())
+    # Ensure all statuses from STATUS_DISPLAY_NAMES_HR are present, even if count is 0
+    hr_applications_by_status = {status_key: status_counts.get(status_key, 0) for status_key in STATUS_DISPLAY_NAMES_HR}
+    for status_key, count in status_counts.items():
+        hr_applications_by_status.setdefault(status_key, count) # Statuses outside the known set still add up to the total
 
     return render_template('admin_dashboard.html',
                            title="Admin Dashboard",
@@ -977,29 +1306,36 @@ def admin_dashboard():
                            total_blog_posts=total_blog_posts,
                            total_hr_applications=total_hr_applications,
                            hr_applications_by_status=hr_applications_by_status,
+                           hr_applications_by_job_title=hr_applications_by_job_title,
                            status_display_names_hr=STATUS_DISPLAY_NAMES_HR) # Pass for display
 
+@app.route('/admin/jobs')
+@login_required
+def admin_jobs_status():
+    """Background job counts per type and status."""
+    return jsonify({'jobs': job_queue.counts(), 'worker_running': job_worker.is_running, 'workers': job_queue.workers()})
+
+@app.route('/admin/jobs/<int:job_id>')
+@login_required
+def admin_job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
 @app.route('/admin/blog/delete/<string:post_id>', methods=['GET']) # Using GET for simplicity, ideally POST with CSRF
 @login_required
 def admin_delete_blog_post(post_id):
-    posts = load_blog_posts()
-    post_to_delete = None
-    post_index = -1
-
-    for i, p in enumerate(posts):
-        if p.get('id') == post_id:
-            post_to_delete = p
-            post_index = i
-            break
+    post_to_delete = find_post(load_blog_posts(), post_id)
 
     if not post_to_delete:
         flash(f"Blog post with ID {post_id} not found for deletion.", 'error')
         return redirect(url_for('admin_blog_list'))
 
-    # Check for and delete associated static image
-    if post_to_delete.get('image_url_is_static') and post_to_delete.get('image_url'):
-        static_image_filename = post_to_delete.get('image_url').split('/')[-1]
-        static_image_path = os.path.join(app.static_folder, 'uploaded_images', static_image_filename)
+    # Check for and delete associated static image (blob store images are released when the post is saved,
+    # and only deleted once no other post references them)
+    static_image_path = legacy_static_image_path(post_to_delete.get('image_url')) if post_to_delete.get('image_url_is_static') else None
+    if static_image_path:
         if os.path.exists(static_image_path):
             try:
                 os.remove(static_image_path)
@@ -1009,10 +1345,11 @@ def admin_delete_blog_post(post_id):
                 flash(f"Error deleting associated image file. Post not deleted.", 'error') # Optional: stop deletion if image can't be removed
                 # return redirect(url_for('admin_blog_list')) # Or proceed with post deletion
 
-    # Remove post from list
-    del posts[post_index]
+    # Remove post from the current file contents
+    def remove_post(posts):
+        posts[:] = [p for p in posts if p.get('id') != post_id]
 
-    if save_blog_posts(posts):
+    if update_blog_posts(remove_post)[0]:
         flash(f"Blog post '{post_to_delete.get('title', 'Untitled')}' deleted successfully!", 'success')
     else:
         flash('Error saving changes after deleting blog post. Please check server logs.', 'error')
@@ -1041,6 +1378,9 @@ def format_datetime_admin_filter(value, format='%B %d, %Y %H:%M %Z'):
         return str(value) # Return original if parsing fails
 
 app.jinja_env.filters['format_datetime_admin'] = format_datetime_admin_filter
+app.jinja_env.globals['image_srcset'] = srcset # {{ image_srcset(post.image_variants, 'webp') }}
+app.jinja_env.globals['proxied_image_url'] = proxied_image_url # {{ proxied_image_url('https://images.unsplash.com/...', 1280) }}
+app.jinja_env.globals['image_proxy_enabled'] = IMAGE_PROXY_ENABLED
 
 # --- HR Panel Configuration & Helper Data ---
 STATUS_DISPLAY_NAMES_HR = {
@@ -1064,90 +1404,116 @@ VALID_STATUS_TRANSITIONS_HR = {
 }
 
 # --- HR Panel Routes ---
-def load_applications_hr():
-    if not os.path.exists(APPLICATION_LOG_FILE):
-        app.logger.info(f"HR Panel: {APPLICATION_LOG_FILE} not found. Returning empty list.")
-        return []
+def load_applications_hr(status: str | None = None, job_title_contains: str | None = None,
+                         key: tuple | None = None, direction: str = 'after', limit: int = 10) -> tuple[list, bool]:
+    # One page, newest first, straight from the timestamp/status indexes (keyset on (timestamp, id))
     try:
-        with open(APPLICATION_LOG_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-            if not content:
-                app.logger.info(f"HR Panel: {APPLICATION_LOG_FILE} is empty. Returning empty list.")
-                return []
-            applications_data = json.loads(content)
-            if not isinstance(applications_data, list):
-                app.logger.warning(f"HR Panel: Data in {APPLICATION_LOG_FILE} is not a list. Returning empty list.")
-                return []
-            # Sort by timestamp, newest first. Ensure timestamp exists and is valid.
-            # Add error handling for missing or malformed timestamps if necessary.
-            try:
-                applications_data.sort(key=lambda x: x.get('timestamp', ''), reverse=True)
-            except Exception as e:
-                app.logger.error(f"HR Panel: Error sorting applications by timestamp: {e}")
-            return applications_data
-    except json.JSONDecodeError:
-        app.logger.error(f"HR Panel: Error decoding JSON from {APPLICATION_LOG_FILE}. Returning empty list.", exc_info=True)
-        return []
-    except IOError as e:
-        app.logger.error(f"HR Panel: IOError reading {APPLICATION_LOG_FILE}: {e}. Returning empty list.", exc_info=True)
-        return []
+        return application_store.page_applications(status=status, job_title_contains=job_title_contains,
+                                                   key=key, direction=direction, limit=limit)
+    except Exception as e:
+        app.logger.error(f"HR Panel: Error loading applications from {application_store.db_path}: {e}", exc_info=True)
+        return [], False
 
 @app.route('/admin/hr/applications')
 @login_required
 def admin_hr_applications_list():
-    page = request.args.get('page', 1, type=int)
     APPS_PER_PAGE = 10 # Configuration for items per page
 
     filter_status = request.args.get('filter_status')
     filter_job_title = request.args.get('filter_job_title', '').strip().lower()
 
-    applications_data = load_applications_hr() # Already sorted by timestamp desc by default
-
-    filtered_applications = []
-    if not filter_status and not filter_job_title:
-        filtered_applications = applications_data
-    else:
-        for app_item in applications_data:
-            matches_status = True
-            if filter_status:
-                matches_status = app_item.get('status') == filter_status
-
-            matches_job_title = True
-            if filter_job_title:
-                matches_job_title = filter_job_title in app_item.get('job_title', '').lower()
-
-            if matches_status and matches_job_title:
-                filtered_applications.append(app_item)
+    # Pages are addressed by cursors (?after= / ?before=) holding the (timestamp, id) of the row next
+    # to them, so a deep page is one index seek and applications arriving meanwhile do not shift it.
+    # ?page= only numbers the page for display.
+    direction = 'before' if request.args.get('before') else 'after'
+    try:
+        key = decode_cursor(request.args.get(direction))
+    except ValueError:
+        app.logger.warning(f"HR Panel: ignoring invalid page cursor {request.args.get(direction)!r}")
+        key = None
+    rows, has_more = load_applications_hr(status=filter_status, job_title_contains=filter_job_title,
+                                          key=key, direction=direction, limit=APPS_PER_PAGE)
+    if key is not None and direction == 'before' and not has_more:
+        key = None # Back at the top: show a full first page, including anything that arrived since
+        rows, has_more = load_applications_hr(status=filter_status, job_title_contains=filter_job_title, limit=APPS_PER_PAGE)
+        direction = 'after'
+    has_previous = key is not None and (direction == 'after' or has_more)
+    has_next = has_more if direction == 'after' else True
 
-    total_applications = len(filtered_applications)
+    try:
+        total_applications = application_store.count(status=filter_status, job_title_contains=filter_job_title)
+    except Exception as e:
+        app.logger.error(f"HR Panel: Error counting applications in {application_store.db_path}: {e}", exc_info=True)
+        total_applications = 0
     total_pages = (total_applications + APPS_PER_PAGE - 1) // APPS_PER_PAGE
-    # Ensure page is within valid range after filtering
-    page = max(1, min(page, total_pages if total_pages > 0 else 1))
-
-
-    start_index = (page - 1) * APPS_PER_PAGE
-    end_index = start_index + APPS_PER_PAGE
-    applications_on_page = filtered_applications[start_index:end_index]
+    page = max(1, min(request.args.get('page', 1, type=int), total_pages)) if has_previous else 1
 
     return render_template('admin_hr_applications_list.html',
-                           applications=applications_on_page,
+                           applications=[application for _, application in rows],
                            title="HR - Submitted Applications",
                            current_page=page,
                            total_pages=total_pages,
+                           prev_cursor=encode_cursor(rows[0][0]) if rows and has_previous else None,
+                           next_cursor=encode_cursor(rows[-1][0]) if rows and has_next else None,
                            status_display_names=STATUS_DISPLAY_NAMES_HR, # For the filter dropdown
                            request_args=request.args, # To repopulate filter form
                            now=datetime.now(timezone.utc))
 
+@app.route('/admin/hr/applications/export-cvs')
+@login_required
+def admin_hr_export_cvs():
+    """ZIP of the CVs in the current HR list filter (same parameters as admin_hr_applications_list), streamed."""
+    filter_status = request.args.get('filter_status')
+    filter_job_title = request.args.get('filter_job_title', '').strip().lower()
+    name_parts = ['cvs'] + [secure_filename(part) for part in (filter_job_title, filter_status) if part]
+    response = app.response_class(stream_cv_zip(application_store, status=filter_status, job_title_contains=filter_job_title),
+                                  mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="{"-".join(name_parts)}-{datetime.now(timezone.utc):%Y%m%d}.zip"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no' # Let nginx pass the stream through instead of spooling it
+    return response
+
+@app.route('/admin/hr/applications/export')
+@login_required
+def admin_hr_export_applications():
+    """Applications in the current HR list filter as NDJSON (default) or CSV (?format=csv), streamed in batches."""
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in EXPORT_FORMATS:
+        abort(400)
+    filter_status = request.args.get('filter_status')
+    filter_job_title = request.args.get('filter_job_title', '').strip().lower()
+    response = app.response_class(stream_applications(application_store, fmt, status=filter_status, job_title_contains=filter_job_title),
+                                  mimetype='text/csv' if fmt == 'csv' else 'application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename="applications-{datetime.now(timezone.utc):%Y%m%d}.{fmt}"'
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/admin/hr/applications/import', methods=['POST'])
+@login_required
+def admin_hr_import_applications():
+    """Adds applications from an uploaded NDJSON or CSV file, in batches, skipping (email, job title) duplicates."""
+    request.max_content_length = APPLICATION_IMPORT_MAX_BYTES # Larger than MAX_CONTENT_LENGTH; spooled to a temp file, not memory
+    upload = request.files.get('import_file')
+    if upload is None or not upload.filename:
+        flash("Choose an NDJSON or CSV file to import.", 'error')
+        return redirect(url_for('admin_hr_applications_list'))
+    fmt = guess_format(upload.filename, default=request.form.get('format', 'ndjson'))
+    try:
+        stats = import_applications(application_store, io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''), fmt)
+    except (UnicodeDecodeError, csv.Error, sqlite3.Error) as e:
+        app.logger.error(f"HR Panel: import of {upload.filename} failed: {e}", exc_info=True)
+        flash(f"Import stopped: {e}. Batches before the error were saved; importing the file again skips them.", 'error')
+        return redirect(url_for('admin_hr_applications_list'))
+    flash(f"Imported {stats['imported']} applications from {upload.filename} "
+          f"({stats['duplicates']} duplicates and {stats['invalid']} invalid rows skipped).", 'success')
+    return redirect(url_for('admin_hr_applications_list'))
+
 @app.route('/admin/hr/application/<string:app_id>')
 @login_required
 def admin_hr_application_detail(app_id):
-    all_applications = load_applications_hr()
-    target_application = None
-    for app_item in all_applications:
-        # Assuming app_id is the timestamp prefix of cv_filename
-        if app_item.get('cv_filename', '').startswith(app_id + '-'):
-            target_application = app_item
-            break
+    # app_id is the timestamp prefix of cv_filename
+    target_application = application_store.get(app_id)
 
     if not target_application:
         flash(f"Application with ID {app_id} not found.", 'error')
@@ -1168,15 +1534,7 @@ def admin_hr_update_application_status(app_id):
         flash("No new status provided.", 'error')
         return redirect(url_for('admin_hr_application_detail', app_id=app_id))
 
-    all_applications = load_applications_hr()
-    target_application = None
-    target_app_index = -1
-
-    for i, app_item in enumerate(all_applications):
-        if app_item.get('cv_filename', '').startswith(app_id + '-'):
-            target_application = app_item
-            target_app_index = i
-            break
+    target_application = application_store.get(app_id)
 
     if not target_application:
         flash(f"Application with ID {app_id} not found.", 'error')
@@ -1189,33 +1547,21 @@ def admin_hr_update_application_status(app_id):
         flash(f"Invalid status transition from '{STATUS_DISPLAY_NAMES_HR.get(current_status, current_status)}' to '{STATUS_DISPLAY_NAMES_HR.get(new_status, new_status)}'.", 'error')
         return redirect(url_for('admin_hr_application_detail', app_id=app_id))
 
-    # Update application
-    all_applications[target_app_index]['status'] = new_status
-    all_applications[target_app_index]['reviewed_timestamp'] = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
-    all_applications[target_app_index]['reviewed_by'] = current_user.id
-    all_applications[target_app_index]['reviewed_by_name'] = current_user.username
+    # Update application (single-row update by app_id)
+    status_changes = {
+        'status': new_status,
+        'reviewed_timestamp': datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'),
+        'reviewed_by': current_user.id,
+        'reviewed_by_name': current_user.username
+    }
 
-    if save_applications_hr(all_applications):
+    if application_store.update(app_id, status_changes):
         flash(f"Application status updated to '{STATUS_DISPLAY_NAMES_HR.get(new_status, new_status)}'.", 'success')
     else:
         flash("Failed to save application status update. Please check server logs.", 'error')
 
     return redirect(url_for('admin_hr_application_detail', app_id=app_id))
 
-# Helper function to save applications - similar to save_blog_posts
-def save_applications_hr(applications_data: list) -> bool:
-    try:
-        with open(APPLICATION_LOG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(applications_data, f, indent=4, ensure_ascii=False)
-        app.logger.info(f"HR Panel: Successfully saved {len(applications_data)} applications to {APPLICATION_LOG_FILE}")
-        return True
-    except IOError as e:
-        app.logger.error(f"HR Panel: IOError writing applications to {APPLICATION_LOG_FILE}: {e}", exc_info=True)
-        return False
-    except Exception as e:
-        app.logger.error(f"HR Panel: Unexpected error saving applications to {APPLICATION_LOG_FILE}: {e}", exc_info=True)
-        return False
-
 @app.route('/admin/hr/download_cv/<path:filename>')
 @login_required
 def admin_hr_download_cv(filename):
@@ -1230,25 +1576,28 @@ def admin_hr_download_cv(filename):
 
     upload_dir = app.config.get('UPLOAD_FOLDER', 'uploads') # Get from app config
 
-    # Check if the file exists directly in the UPLOAD_FOLDER
-    file_path = os.path.join(upload_dir, filename)
-    if not os.path.isfile(file_path):
+    # The CV lives in the blob store; applications from before it have theirs directly in the UPLOAD_FOLDER
+    application = application_store.get(filename.split('-', 1)[0])
+    if application is not None and application.get('cv_filename') == filename:
+        file_path = application_cv_path(application)
+    else:
+        file_path = os.path.join(upload_dir, filename)
+    download_name = filename.split('-', 1)[1] if '-' in filename else filename
+    try:
+        # Stat is cached; in CV_SEND_MODE x-accel-redirect/x-sendfile the front proxy sends the bytes
+        response = send_cv(request, file_path, download_name) if file_path else None
+    except Exception as e:
+        app.logger.error(f"Error sending CV file {filename}: {e}", exc_info=True)
+        flash("An error occurred while trying to download the CV.", "error")
+        return redirect(url_for('admin_hr_applications_list'))
+    if response is None:
         app.logger.error(f"CV file not found for download: {file_path}")
         flash(f"CV file '{filename}' not found on server.", 'error')
         # Try to get app_id to redirect back to detail page if possible, otherwise list page
         # This is a bit tricky as we only have filename here.
         # For simplicity, redirect to the list. A more complex solution could store referer or pass app_id.
         return redirect(url_for('admin_hr_applications_list'))
-
-    try:
-        return send_from_directory(upload_dir, filename, as_attachment=True)
-    except FileNotFoundError:
-        app.logger.error(f"send_from_directory could not find CV file: {filename} in {upload_dir}")
-        abort(404) # Or flash message and redirect
-    except Exception as e:
-        app.logger.error(f"Error sending CV file {filename}: {e}", exc_info=True)
-        flash("An error occurred while trying to download the CV.", "error")
-        return redirect(url_for('admin_hr_applications_list'))
+    return response
 
 
 if __name__ == '__main__':
@@ -0,0 +1,234 @@
+import io
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import zipfile
+import argparse
+from datetime import datetime, timezone
+
+from werkzeug.utils import secure_filename
+
+from application_journal import application_id
+from application_index import normalize_application_key
+from blob_store import application_cv_path
+
+logger = logging.getLogger(__name__)
+
+EXPORT_CHUNK_BYTES = 64 * 1024 # Bytes handed to the WSGI server at a time
+ZIP_STORED_EXTENSIONS = {'pdf', 'docx'} # Already compressed (PDF streams, a ZIP container): deflating them only costs CPU
+MANIFEST_FIELDS = ['app_id', 'full_name', 'email', 'phone_number', 'job_title', 'status', 'timestamp', 'cv_file']
+# Columns of CSV exports (and the ones a CSV import understands; other columns are kept as extra fields)
+APPLICATION_CSV_FIELDS = ['timestamp', 'full_name', 'email', 'phone_number', 'job_title', 'status', 'cover_letter',
+                          'cv_filename', 'cv_blob', 'reviewed_by_name', 'reviewed_timestamp']
+EXPORT_FORMATS = ('ndjson', 'csv')
+IMPORT_BATCH_SIZE = 1000
+
+
+class _ZipOutput(io.RawIOBase):
+    """Unseekable sink for zipfile; the generator takes what has been written so far.
+
+    zipfile notices it cannot seek and writes each entry's sizes in a data descriptor after its
+    data, so nothing needs to be rewritten and no temp file is needed.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._size += len(data)
+        return len(data)
+
+    def take(self, min_bytes: int = 0) -> bytes:
+        if self._size < min_bytes or not self._chunks:
+            return b''
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self._size = 0
+        return data
+
+
+def cv_zip_name(application: dict) -> str:
+    cv_filename = application.get('cv_filename') or f"{application_id(application)}-cv"
+    return f"cvs/{secure_filename(cv_filename) or application_id(application)}"
+
+
+def stream_cv_zip(store, status: str | None = None, job_title_contains: str | None = None):
+    return (chunk for chunk in _cv_zip_chunks(store, status, job_title_contains) if chunk)
+
+
+def _cv_zip_chunks(store, status: str | None, job_title_contains: str | None):
+    """Yields a ZIP of the CVs of the matching applications plus manifest.csv, built while it is sent.
+
+    manifest.csv comes first (one row per application, with the CV's path in the archive), then the
+    CVs, read 64 KB at a time. Both passes read the same rows in batches (ids up to the current
+    last one), so memory stays flat apart from zipfile's central directory entries.
+    """
+    output = _ZipOutput()
+    max_id = store.last_id()
+    now = time.localtime()[:6]
+    with zipfile.ZipFile(output, 'w') as archive:
+        manifest_info = zipfile.ZipInfo('manifest.csv', date_time=now)
+        manifest_info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(manifest_info, 'w') as entry:
+            text = io.TextIOWrapper(entry, encoding='utf-8-sig', newline='') # BOM so Excel reads UTF-8
+            writer = csv.writer(text)
+            writer.writerow(MANIFEST_FIELDS)
+            for application in store.iter_applications(status=status, job_title_contains=job_title_contains, max_id=max_id):
+                path = application_cv_path(application)
+                cv_file = cv_zip_name(application) if path and os.path.isfile(path) else ''
+                writer.writerow([application_id(application)] + [application.get(field, '') for field in MANIFEST_FIELDS[1:-1]] + [cv_file])
+                text.flush()
+                yield output.take(EXPORT_CHUNK_BYTES)
+            text.flush()
+            text.detach()
+        yield output.take()
+
+        for application in store.iter_applications(status=status, job_title_contains=job_title_contains, max_id=max_id):
+            path = application_cv_path(application)
+            name = cv_zip_name(application)
+            if not path or name in archive.NameToInfo:
+                continue
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                continue # Listed without a file in the manifest
+            with f:
+                info = zipfile.ZipInfo(name, date_time=time.localtime(os.fstat(f.fileno()).st_mtime)[:6])
+                info.compress_type = zipfile.ZIP_STORED if name.rsplit('.', 1)[-1].lower() in ZIP_STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+                with archive.open(info, 'w') as entry:
+                    for chunk in iter(lambda: f.read(EXPORT_CHUNK_BYTES), b''):
+                        entry.write(chunk)
+                        yield output.take(EXPORT_CHUNK_BYTES)
+            yield output.take()
+    yield output.take() # Central directory
+    logger.info(f"Streamed CV export (status={status!r}, job title contains {job_title_contains!r})")
+
+
+# --- Application export / import (NDJSON or CSV) ---
+def stream_applications(store, fmt: str = 'ndjson', status: str | None = None, job_title_contains: str | None = None):
+    """Yields the matching applications as NDJSON or CSV text chunks (bytes), oldest first.
+
+    Rows are read in batches and encoded as they go, so neither side holds the full list.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=APPLICATION_CSV_FIELDS, extrasaction='ignore') if fmt == 'csv' else None
+    if writer is not None:
+        writer.writeheader()
+    for application in store.iter_applications(status=status, job_title_contains=job_title_contains, max_id=store.last_id()):
+        if writer is not None:
+            writer.writerow(application)
+        else:
+            buffer.write(json.dumps(application, ensure_ascii=False) + '\n')
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def guess_format(filename: str | None, default: str = 'ndjson') -> str:
+    extension = filename.rsplit('.', 1)[-1].lower() if filename and '.' in filename else ''
+    return 'csv' if extension == 'csv' else 'ndjson' if extension in ('ndjson', 'jsonl') else default
+
+
+def _read_records(text_stream, fmt: str):
+    """Yields (line number, dict or None) from an NDJSON or CSV text stream, one record at a time."""
+    if fmt == 'csv':
+        reader = csv.DictReader(text_stream)
+        for record in reader:
+            # Empty cells are absent fields, as in the form; extra columns without a header are dropped
+            yield reader.line_num, {key: value for key, value in record.items() if key and value not in (None, '')}
+        return
+    for line_number, line in enumerate(text_stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_number, record if isinstance(record, dict) else None
+
+
+def import_applications(store, text_stream, fmt: str = 'ndjson', batch_size: int = IMPORT_BATCH_SIZE) -> dict:
+    """Imports applications from an NDJSON or CSV text stream in batches of `batch_size`, one commit each.
+
+    Records need an email and a job title; a missing status becomes 'new' and a missing timestamp
+    the time of the import. Pairs already stored, or seen earlier in the same file, are skipped
+    as duplicates (same normalized (email, job_title) check as the application form). Only one
+    batch is in memory; an interrupted import keeps the batches committed so far, and running it
+    again skips them as duplicates.
+    """
+    stats = {'read': 0, 'imported': 0, 'duplicates': 0, 'invalid': 0}
+    batch, batch_keys = [], set()
+
+    def commit():
+        stats['imported'] += store.add_many(batch) # Registers the keys with the duplicate index
+        batch.clear()
+        batch_keys.clear()
+
+    for line_number, record in _read_records(text_stream, fmt):
+        stats['read'] += 1
+        if record is None or not record.get('email') or not record.get('job_title'):
+            stats['invalid'] += 1
+            if stats['invalid'] <= 10:
+                logger.warning(f"Import: skipping line {line_number}: not an application with an email and a job title")
+            continue
+        key = normalize_application_key(record['email'], record['job_title'])
+        if key in batch_keys or store.exists(record['email'], record['job_title']):
+            stats['duplicates'] += 1
+            continue
+        record.setdefault('status', 'new')
+        record.setdefault('timestamp', datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z'))
+        batch.append(record)
+        batch_keys.add(key)
+        if len(batch) >= batch_size:
+            commit()
+            logger.info(f"Import: {stats['imported']} applications imported so far")
+    if batch:
+        commit()
+    logger.info(f"Import finished: {stats}")
+    return stats
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO, stream=sys.stderr)
+    from application_store import ApplicationStore, APPLICATION_DB_FILE
+
+    parser = argparse.ArgumentParser(description="Stream job applications out of or into the application store.")
+    parser.add_argument('--db', default=APPLICATION_DB_FILE)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export', help="Write applications as NDJSON or CSV (stdout by default).")
+    export_parser.add_argument('--format', choices=EXPORT_FORMATS, default='ndjson')
+    export_parser.add_argument('--status')
+    export_parser.add_argument('--job-title', help="Only job titles containing this text.")
+    export_parser.add_argument('--output', default='-')
+    import_parser = subparsers.add_parser('import', help="Add applications from an NDJSON or CSV file ('-' for stdin), skipping duplicates.")
+    import_parser.add_argument('file')
+    import_parser.add_argument('--format', choices=EXPORT_FORMATS, help="Default: from the file extension, else ndjson.")
+    import_parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    application_store = ApplicationStore(args.db)
+    if args.command == 'export':
+        out = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+        with out:
+            for chunk in stream_applications(application_store, args.format, status=args.status, job_title_contains=args.job_title):
+                out.write(chunk)
+    elif args.command == 'import':
+        fmt = args.format or guess_format(args.file)
+        if args.file == '-':
+            stream = io.TextIOWrapper(sys.stdin.buffer, encoding='utf-8-sig', newline='')
+        else:
+            stream = open(args.file, encoding='utf-8-sig', newline='')
+        with stream:
+            print(json.dumps(import_applications(application_store, stream, fmt, batch_size=args.batch_size)))
@@ -0,0 +1,162 @@
+import math
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Trigger-maintained counter of deleted rows and rewritten (email, job_title) pairs, so a catch-up
+# can tell whether rows it already indexed changed without counting the table. Applied by ApplicationStore.
+CHANGE_COUNTER_SCHEMA = """
+CREATE TABLE IF NOT EXISTS application_index_changes (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    rewrites INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO application_index_changes (id, rewrites) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS applications_index_delete AFTER DELETE ON applications
+BEGIN
+    UPDATE application_index_changes SET rewrites = rewrites + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS applications_index_rewrite AFTER UPDATE OF email, job_title ON applications
+WHEN OLD.email IS NOT NEW.email OR OLD.job_title IS NOT NEW.job_title
+BEGIN
+    UPDATE application_index_changes SET rewrites = rewrites + 1 WHERE id = 1;
+END;
+"""
+
+
+def normalize_application_key(email: str | None, job_title: str | None) -> str:
+    """Normalized (email, job_title) key used for duplicate detection."""
+    return f"{(email or '').strip().lower()}\x1f{(job_title or '').strip().lower()}"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter (double hashing over one blake2b digest)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class DuplicateApplicationIndex:
+    """In-memory hash index of normalized (email, job_title) pairs, fronted by a Bloom filter.
+
+    Built from the application store at startup and kept current by reading only rows added since
+    the last check. `PRAGMA data_version` tells us when another connection (the store, the HR bot,
+    an import) has committed, so a check costs a pragma, a Bloom probe and at most one set lookup;
+    after a commit it adds a primary key range scan for new rows and a read of the change counter
+    (CHANGE_COUNTER_SCHEMA), and only deletes or rewrites of indexed rows trigger a rebuild.
+    """
+
+    MIN_CAPACITY = 1 << 16
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._keys = set()
+        self._bloom = BloomFilter(self.MIN_CAPACITY)
+        self._last_id = 0
+        self._indexed_rows = 0
+        self._rewrites = None
+        self._data_version = None
+        self._built = False
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Dedicated connection: data_version only changes for commits made by *other* connections.
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        return self._conn
+
+    def _add_key(self, key: str):
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        if self._bloom.count >= self._bloom.capacity:
+            # Keep the false positive rate bounded as the applicant pool grows.
+            self._bloom = BloomFilter(self._bloom.capacity * 2)
+            for existing_key in self._keys:
+                self._bloom.add(existing_key)
+        else:
+            self._bloom.add(key)
+
+    def _read_rows_after(self, last_id: int):
+        return self._connection().execute(
+            "SELECT id, email, job_title FROM applications WHERE id > ? ORDER BY id", (last_id,)
+        )
+
+    def _read_rewrites(self) -> int:
+        row = self._connection().execute("SELECT rewrites FROM application_index_changes WHERE id = 1").fetchone()
+        return row[0] if row else 0
+
+    def _rebuild_locked(self):
+        conn = self._connection()
+        self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        # Read before the rows: a delete racing with the rebuild then just causes another rebuild
+        self._rewrites = self._read_rewrites()
+        total = conn.execute("SELECT COUNT(*) FROM applications").fetchone()[0] # Sizes the Bloom filter
+        self._keys = set()
+        self._bloom = BloomFilter(max(self.MIN_CAPACITY, total * 2))
+        self._last_id = 0
+        self._indexed_rows = 0
+        for row_id, email, job_title in self._read_rows_after(0):
+            self._add_key(normalize_application_key(email, job_title))
+            self._last_id = row_id
+            self._indexed_rows += 1
+        self._built = True
+        logger.info(f"Duplicate index built with {len(self._keys)} keys from {self._indexed_rows} applications.")
+
+    def _catch_up_locked(self):
+        if not self._built:
+            self._rebuild_locked()
+            return
+        conn = self._connection()
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        # Rows removed or rewritten (replace_all, deletes, edited emails) cannot be applied incrementally.
+        if self._read_rewrites() != self._rewrites:
+            self._rebuild_locked()
+            return
+        for row_id, email, job_title in self._read_rows_after(self._last_id):
+            self._add_key(normalize_application_key(email, job_title))
+            self._last_id = row_id
+            self._indexed_rows += 1
+
+    def rebuild(self):
+        with self._lock:
+            self._rebuild_locked()
+
+    def contains(self, email: str, job_title: str) -> bool:
+        key = normalize_application_key(email, job_title)
+        with self._lock:
+            self._catch_up_locked()
+            if key not in self._bloom:
+                return False  # Definitely new; the hash set is never touched
+            return key in self._keys
+
+    def add(self, email: str, job_title: str):
+        """Registers a pair committed by this process so it is visible before the next catch-up."""
+        with self._lock:
+            self._add_key(normalize_application_key(email, job_title))
@@ -0,0 +1,248 @@
+import os
+import json
+import logging
+import threading
+
+from json_store import FileLock, atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Number of journal records after which the journal is folded into the snapshot.
+DEFAULT_COMPACT_EVERY = 500
+
+
+def application_id(application: dict) -> str:
+    """Returns the app_id (timestamp prefix of cv_filename) used to address an application."""
+    cv_filename = application.get('cv_filename') or ''
+    return cv_filename.split('-', 1)[0] if '-' in cv_filename else cv_filename
+
+
+class ApplicationJournal:
+    """Append-only NDJSON journal of job applications with periodic compacted snapshots.
+
+    The snapshot (submitted_applications.log.json) is {"journal_seq": N, "applications": [...]};
+    the historic plain JSON list is still read. Every change after that is a single line
+    appended to the journal file, numbered with an increasing `seq`. Loading replays the
+    snapshot plus the journal entries it does not cover yet (seq > N), so a crash between
+    writing a snapshot and truncating the journal cannot apply entries twice. Each process
+    only reads lines it has not seen yet.
+
+    Applications now live in SQLite (application_store.py); the journal is only read by
+    ApplicationStore.import_json_log to migrate old data.
+    """
+
+    def __init__(self, snapshot_path: str, journal_path: str | None = None, compact_every: int = DEFAULT_COMPACT_EVERY):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or os.path.splitext(snapshot_path)[0] + '.journal.ndjson'
+        self.compact_every = compact_every
+
+        self._mutex = threading.RLock()
+        self._records = []  # Insertion order, same as the old JSON list
+        self._by_app_id = {}
+        self._snapshot_signature = None
+        self._snapshot_seq = 0  # Last journal seq folded into the snapshot
+        self._last_seq = 0  # Highest seq seen in the snapshot or journal
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    # --- Locking ---
+    def _file_lock(self, exclusive: bool) -> FileLock:
+        """Cross-process lock so compaction never races an append from another worker or the HR bot."""
+        return FileLock(self.journal_path, exclusive=exclusive)
+
+    # --- Replay ---
+    def _current_snapshot_signature(self):
+        try:
+            st = os.stat(self.snapshot_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read_snapshot(self) -> tuple[list, int]:
+        """Returns (applications, journal seq covered by the snapshot)."""
+        if not os.path.exists(self.snapshot_path):
+            logger.info(f"{self.snapshot_path} not found. Starting with an empty snapshot.")
+            return [], 0
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            if not content:
+                return [], 0
+            snapshot_data = json.loads(content)
+            if isinstance(snapshot_data, list):
+                return snapshot_data, 0 # Historic format, written before journal entries were numbered
+            if not isinstance(snapshot_data, dict) or not isinstance(snapshot_data.get('applications'), list):
+                logger.warning(f"Data in {self.snapshot_path} is not a snapshot. Starting with an empty snapshot.")
+                return [], 0
+            return snapshot_data['applications'], int(snapshot_data.get('journal_seq') or 0)
+        except (json.JSONDecodeError, ValueError):
+            logger.error(f"Error decoding JSON from {self.snapshot_path}. Starting with an empty snapshot.", exc_info=True)
+            return [], 0
+        except IOError as e:
+            logger.error(f"IOError reading {self.snapshot_path}: {e}. Starting with an empty snapshot.", exc_info=True)
+            return [], 0
+
+    def _reset(self, snapshot: tuple[list, int]):
+        records, snapshot_seq = snapshot
+        self._records = []
+        self._by_app_id = {}
+        self._snapshot_seq = self._last_seq = snapshot_seq
+        for record in records:
+            self._apply_add(record)
+
+    def _apply_add(self, record: dict):
+        self._records.append(record)
+        app_id = application_id(record)
+        if app_id and app_id not in self._by_app_id:
+            self._by_app_id[app_id] = record
+
+    def _apply(self, entry: dict):
+        seq = entry.get('seq')
+        if seq is not None:
+            if seq <= self._snapshot_seq:
+                return # Already folded into the snapshot; the journal was not truncated after compaction
+            self._last_seq = max(self._last_seq, seq)
+        op = entry.get('op')
+        if op == 'add':
+            self._apply_add(entry.get('record') or {})
+        elif op == 'update':
+            record = self._by_app_id.get(entry.get('app_id'))
+            if record is None:
+                logger.warning(f"Journal update for unknown app_id '{entry.get('app_id')}' skipped.")
+                return
+            record.update(entry.get('set') or {})
+            for key in entry.get('unset') or []:
+                record.pop(key, None)
+        else:
+            logger.warning(f"Unknown journal op '{op}' skipped.")
+
+    def _catch_up(self):
+        """Brings the in-memory state up to date with the snapshot and any unseen journal lines.
+
+        Must be called with the file lock held (shared is enough).
+        """
+        signature = self._current_snapshot_signature()
+        if signature != self._snapshot_signature:
+            # New snapshot (first load or another process compacted): replay from scratch.
+            self._reset(self._read_snapshot())
+            self._snapshot_signature = signature
+            self._journal_offset = 0
+            self._journal_entries = 0
+
+        try:
+            with open(self.journal_path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() < self._journal_offset:
+                    # Journal shrank without a new snapshot; should not happen, rebuild defensively.
+                    logger.warning(f"{self.journal_path} was truncated unexpectedly. Replaying from snapshot.")
+                    self._reset(self._read_snapshot())
+                    self._journal_offset = 0
+                    self._journal_entries = 0
+                f.seek(self._journal_offset)
+                tail = f.read()
+        except FileNotFoundError:
+            return
+
+        consumed = tail.rfind(b'\n') + 1  # Ignore a trailing partial line still being written
+        for line in tail[:consumed].splitlines():
+            if not line.strip():
+                continue
+            try:
+                self._apply(json.loads(line))
+            except json.JSONDecodeError:
+                logger.error(f"Skipping corrupt line in {self.journal_path}: {line[:200]!r}")
+            self._journal_entries += 1
+        self._journal_offset += consumed
+
+    # --- Public API ---
+    def load(self) -> list:
+        """Returns a copy of all applications (snapshot plus journal tail), in insertion order."""
+        with self._mutex:
+            with self._file_lock(exclusive=False):
+                self._catch_up()
+            return [dict(record) for record in self._records]
+
+    def get(self, app_id: str) -> dict | None:
+        with self._mutex:
+            with self._file_lock(exclusive=False):
+                self._catch_up()
+            record = self._by_app_id.get(app_id)
+            return dict(record) if record is not None else None
+
+    def _append_entry(self, entry: dict):
+        with self._file_lock(exclusive=True):
+            self._catch_up()
+            entry['seq'] = self._last_seq + 1 # Numbered under the exclusive lock, so seqs never repeat
+            line = (json.dumps(entry, ensure_ascii=False) + '\n').encode('utf-8')
+            # One write() per record on an O_APPEND descriptor keeps lines whole.
+            fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._catch_up()
+            if self._journal_entries >= self.compact_every:
+                self._compact_locked()
+
+    def append(self, application: dict) -> bool:
+        """Appends a new application as a single journal record."""
+        try:
+            with self._mutex:
+                self._append_entry({'op': 'add', 'record': application})
+            return True
+        except (IOError, OSError) as e:
+            logger.error(f"IOError appending application to {self.journal_path}: {e}", exc_info=True)
+            return False
+
+    def update(self, app_id: str, changes: dict, remove_keys: list | tuple = ()) -> bool:
+        """Records a partial update (e.g. a status transition) for one application."""
+        try:
+            with self._mutex:
+                self._append_entry({'op': 'update', 'app_id': app_id, 'set': changes, 'unset': list(remove_keys)})
+            return True
+        except (IOError, OSError) as e:
+            logger.error(f"IOError appending update for {app_id} to {self.journal_path}: {e}", exc_info=True)
+            return False
+
+    def _write_snapshot(self, records: list):
+        # Covers every entry seen so far; if the truncation below never happens, replay skips them
+        snapshot_seq = self._last_seq
+        atomic_write_json(self.snapshot_path, {'journal_seq': snapshot_seq, 'applications': records})
+        # Journal contents are now part of the snapshot.
+        with open(self.journal_path, 'wb'):
+            pass
+        self._reset((records, snapshot_seq))
+        self._snapshot_signature = self._current_snapshot_signature()
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    def _compact_locked(self):
+        count = len(self._records)
+        self._write_snapshot(self._records)
+        logger.info(f"Compacted {self.journal_path} into {self.snapshot_path} ({count} applications).")
+
+    def compact(self) -> bool:
+        """Folds the journal into a fresh snapshot."""
+        try:
+            with self._mutex:
+                with self._file_lock(exclusive=True):
+                    self._catch_up()
+                    self._compact_locked()
+            return True
+        except (IOError, OSError) as e:
+            logger.error(f"Error compacting {self.journal_path}: {e}", exc_info=True)
+            return False
+
+    def replace_all(self, applications: list) -> bool:
+        """Replaces the whole data set with a new snapshot (bulk edits)."""
+        try:
+            with self._mutex:
+                with self._file_lock(exclusive=True):
+                    self._catch_up() # So the new snapshot's seq covers every journal entry it replaces
+                    self._write_snapshot([dict(record) for record in applications])
+            logger.info(f"Successfully saved {len(applications)} applications to {self.snapshot_path}")
+            return True
+        except (IOError, OSError) as e:
+            logger.error(f"IOError writing to {self.snapshot_path}: {e}", exc_info=True)
+            return False
@@ -0,0 +1,409 @@
+import os
+import json
+import time
+import logging
+import sqlite3
+import argparse
+import threading
+from datetime import datetime
+
+from application_journal import ApplicationJournal, application_id
+from application_index import DuplicateApplicationIndex, CHANGE_COUNTER_SCHEMA
+
+logger = logging.getLogger(__name__)
+
+APPLICATION_DB_FILE = os.getenv('APPLICATION_DB_FILE', 'applications.db')
+APPLICATION_LOG_FILE = 'submitted_applications.log.json'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS applications (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    app_id TEXT NOT NULL,
+    email TEXT,
+    job_title TEXT,
+    status TEXT NOT NULL DEFAULT 'new',
+    timestamp TEXT,
+    data TEXT NOT NULL,
+    job_title_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_applications_app_id ON applications (app_id);
+CREATE INDEX IF NOT EXISTS idx_applications_email_job_title ON applications (email, job_title);
+CREATE INDEX IF NOT EXISTS idx_applications_status ON applications (status, timestamp);
+CREATE INDEX IF NOT EXISTS idx_applications_timestamp ON applications (timestamp);
+"""
+
+# Filtering by job title: a normalized job_title_key column with (status, job, timestamp) indexes, so each
+# status and job title is a timestamp-ordered posting list in the B-tree, and a trigger-maintained count per
+# (status, job title) cell, so filter counts and breakdowns never read application rows. Statements run
+# one by one inside ApplicationStore._ensure_filter_indexes()'s transaction (after the column exists).
+FILTER_INDEX_SCHEMA = (
+    "CREATE INDEX IF NOT EXISTS idx_applications_job_title_key ON applications (job_title_key, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_applications_status_job_title_key ON applications (status, job_title_key, timestamp)",
+    """CREATE TABLE IF NOT EXISTS application_counts (
+        status TEXT NOT NULL,
+        job_title_key TEXT NOT NULL,
+        job_title TEXT,
+        n INTEGER NOT NULL,
+        PRIMARY KEY (status, job_title_key)
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS application_counts_insert AFTER INSERT ON applications
+    BEGIN
+        INSERT INTO application_counts (status, job_title_key, job_title, n) VALUES (NEW.status, COALESCE(NEW.job_title_key, ''), NEW.job_title, 1)
+        ON CONFLICT (status, job_title_key) DO UPDATE SET n = n + 1;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS application_counts_delete AFTER DELETE ON applications
+    BEGIN
+        UPDATE application_counts SET n = n - 1 WHERE status = OLD.status AND job_title_key = COALESCE(OLD.job_title_key, '');
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS application_counts_update AFTER UPDATE OF status, job_title_key ON applications
+    WHEN OLD.status IS NOT NEW.status OR OLD.job_title_key IS NOT NEW.job_title_key
+    BEGIN
+        UPDATE application_counts SET n = n - 1 WHERE status = OLD.status AND job_title_key = COALESCE(OLD.job_title_key, '');
+        INSERT INTO application_counts (status, job_title_key, job_title, n) VALUES (NEW.status, COALESCE(NEW.job_title_key, ''), NEW.job_title, 1)
+        ON CONFLICT (status, job_title_key) DO UPDATE SET n = n + 1;
+    END""",
+)
+
+
+def normalize_job_title(job_title: str | None) -> str:
+    """Key for job title filters; same normalization as the duplicate check."""
+    return (job_title or '').strip().lower()
+
+
+class ApplicationStore:
+    """SQLite (WAL mode) storage for job applications, shared by app.py and hr_bot.py.
+
+    Applications keep their historic dict shape; the full record lives in the `data` column
+    and the fields we look up or filter by are mirrored into indexed columns.
+    """
+
+    def __init__(self, db_path: str = APPLICATION_DB_FILE, legacy_log_file: str | None = None):
+        self.db_path = db_path
+        self._local = threading.local()
+        is_new_database = not os.path.exists(db_path)
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+            conn.executescript(CHANGE_COUNTER_SCHEMA) # Lets the duplicate index notice deletes without counting rows
+        self._ensure_filter_indexes()
+        # Built lazily on first use (or explicitly via duplicate_index.rebuild() at startup)
+        self.duplicate_index = DuplicateApplicationIndex(db_path)
+        if is_new_database and legacy_log_file:
+            # One-shot migration of the old JSON log the first time the database is created.
+            self.import_json_log(legacy_log_file)
+
+    # --- Connection handling ---
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread (Flask serves requests from several threads).
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            db_dir = os.path.dirname(os.path.abspath(self.db_path))
+            os.makedirs(db_dir, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    def _ensure_filter_indexes(self):
+        """Adds job_title_key, its indexes and the cell counts to a database created before them (once), and fills NULL timestamps."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE") # Another process may be migrating at the same moment
+            if not any(row['name'] == 'job_title_key' for row in conn.execute("PRAGMA table_info(applications)")):
+                conn.execute("ALTER TABLE applications ADD COLUMN job_title_key TEXT")
+                conn.create_function('normalize_job_title', 1, normalize_job_title, deterministic=True)
+                conn.execute("UPDATE applications SET job_title_key = normalize_job_title(job_title)")
+            # Rows stored before page cursors could have a NULL timestamp, which no row value compares with
+            conn.execute("UPDATE applications SET timestamp = '' WHERE timestamp IS NULL")
+            counts_missing = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'application_counts'").fetchone() is None
+            for statement in FILTER_INDEX_SCHEMA:
+                conn.execute(statement)
+            if counts_missing:
+                conn.execute(
+                    "INSERT INTO application_counts (status, job_title_key, job_title, n) "
+                    "SELECT status, COALESCE(job_title_key, ''), MIN(job_title), COUNT(*) FROM applications GROUP BY 1, 2"
+                )
+
+    @staticmethod
+    def _row_to_application(row) -> dict:
+        return json.loads(row['data'])
+
+    @staticmethod
+    def _column_values(application: dict) -> tuple:
+        return (
+            application_id(application),
+            application.get('email'),
+            application.get('job_title'),
+            application.get('status') or 'new',
+            application.get('timestamp') or '', # Never NULL: page keys compare (timestamp, id) row values
+            json.dumps(application, ensure_ascii=False),
+            normalize_job_title(application.get('job_title')),
+        )
+
+    def _insert(self, conn, application: dict):
+        conn.execute(
+            "INSERT INTO applications (app_id, email, job_title, status, timestamp, data, job_title_key) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self._column_values(application)
+        )
+
+    # --- Queries ---
+    def get(self, app_id: str) -> dict | None:
+        """Looks up one application by app_id (timestamp prefix of cv_filename)."""
+        row = self._connection().execute(
+            "SELECT data FROM applications WHERE app_id = ? ORDER BY id LIMIT 1", (app_id,)
+        ).fetchone()
+        return self._row_to_application(row) if row else None
+
+    def exists(self, email: str, job_title: str) -> bool:
+        """Duplicate check on normalized (lower-cased, trimmed) email and job title."""
+        return self.duplicate_index.contains(email, job_title)
+
+    def _job_title_keys(self, job_title_contains: str) -> list:
+        """Job titles containing the text, looked up in the per-cell counts (a handful of rows), not the applications."""
+        return [row[0] for row in self._connection().execute(
+            "SELECT DISTINCT job_title_key FROM application_counts WHERE n > 0 AND instr(job_title_key, ?) > 0",
+            (normalize_job_title(job_title_contains),)
+        )]
+
+    def _where(self, status: str | None, job_title_contains: str | None, job_title_equals: str | None) -> tuple[str, list]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if job_title_contains:
+            # Resolved to the matching job titles first, so the query walks their index ranges only
+            keys = self._job_title_keys(job_title_contains)
+            clauses.append(f"job_title_key IN ({', '.join('?' * len(keys))})" if keys else "0")
+            params.extend(keys)
+        if job_title_equals:
+            clauses.append("job_title_key = ?")
+            params.append(normalize_job_title(job_title_equals))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def list_applications(self, status: str | None = None, job_title_contains: str | None = None,
+                          job_title_equals: str | None = None) -> list:
+        """Returns all matching applications newest first (see page_applications() for one page)."""
+        where_sql, params = self._where(status, job_title_contains, job_title_equals)
+        sql = f"SELECT data FROM applications{where_sql} ORDER BY timestamp DESC, id DESC"
+        return [self._row_to_application(row) for row in self._connection().execute(sql, params)]
+
+    def page_applications(self, status: str | None = None, job_title_contains: str | None = None,
+                          job_title_equals: str | None = None, key: tuple | None = None,
+                          direction: str = 'after', limit: int = 10) -> tuple[list, bool]:
+        """One page of matching applications newest first, addressed by a (timestamp, id) sort key.
+
+        `key`/`direction` as in cursor_pagination (no key: the first page). The page is a seek into
+        the (status, job title, timestamp) index plus `limit` rows, whatever its depth, and rows
+        added later sort in front of the key, so they never shift it. Returns ([(key, application)],
+        whether there are more rows past the page in `direction`).
+        """
+        where_sql, params = self._where(status, job_title_contains, job_title_equals)
+        ascending = key is not None and direction == 'before'
+        if key is not None:
+            where_sql = f"{where_sql} AND" if where_sql else " WHERE"
+            where_sql += f" (timestamp, id) {'>' if ascending else '<=' if direction == 'from' else '<'} (?, ?)"
+            params += [str(key[0]), int(key[1])]
+        order = 'ASC' if ascending else 'DESC'
+        rows = self._connection().execute(
+            f"SELECT id, timestamp, data FROM applications{where_sql} ORDER BY timestamp {order}, id {order} LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if ascending:
+            rows.reverse()
+        return [((row['timestamp'], row['id']), self._row_to_application(row)) for row in rows], has_more
+
+    def iter_applications(self, status: str | None = None, job_title_contains: str | None = None,
+                          job_title_equals: str | None = None, max_id: int | None = None, batch_size: int = 500):
+        """Yields matching applications oldest first (by row id), loading `batch_size` rows per query.
+
+        Each batch is its own short read, so a long export neither holds the whole result in memory
+        nor keeps a read transaction open while the client downloads. `max_id` (see last_id())
+        pins the set of rows when the same selection is read more than once.
+        """
+        where_sql, params = self._where(status, job_title_contains, job_title_equals)
+        where_sql = f"{where_sql} AND" if where_sql else " WHERE"
+        last_id = 0
+        while True:
+            sql = f"SELECT id, data FROM applications{where_sql} id > ?"
+            batch_params = params + [last_id]
+            if max_id is not None:
+                sql += " AND id <= ?"
+                batch_params.append(max_id)
+            rows = self._connection().execute(f"{sql} ORDER BY id LIMIT ?", batch_params + [batch_size]).fetchall()
+            for row in rows:
+                yield self._row_to_application(row)
+            if len(rows) < batch_size:
+                return
+            last_id = rows[-1]['id']
+
+    def last_id(self) -> int:
+        return self._connection().execute("SELECT COALESCE(MAX(id), 0) FROM applications").fetchone()[0]
+
+    def count(self, status: str | None = None, job_title_contains: str | None = None, job_title_equals: str | None = None) -> int:
+        """Number of matching applications, summed from the (status, job title) cell counts."""
+        clauses, params = ["n > 0"], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if job_title_contains:
+            clauses.append("instr(job_title_key, ?) > 0")
+            params.append(normalize_job_title(job_title_contains))
+        if job_title_equals:
+            clauses.append("job_title_key = ?")
+            params.append(normalize_job_title(job_title_equals))
+        return self._connection().execute(
+            f"SELECT COALESCE(SUM(n), 0) FROM application_counts WHERE {' AND '.join(clauses)}", params
+        ).fetchone()[0]
+
+    def cell_counts(self) -> list:
+        """[(status, job title, count)] for every non-empty (status, job title) cell, without reading applications."""
+        return [(row['status'], row['job_title'] or row['job_title_key'], row['n']) for row in self._connection().execute(
+            "SELECT status, job_title_key, job_title, n FROM application_counts WHERE n > 0 ORDER BY status, job_title_key"
+        )]
+
+    def status_counts(self) -> dict:
+        """{status: count}, from the cell counts (kept current by triggers on every insert, update and delete)."""
+        return {row[0]: row[1] for row in self._connection().execute(
+            "SELECT status, SUM(n) FROM application_counts GROUP BY status HAVING SUM(n) > 0"
+        )}
+
+    def job_title_counts(self) -> dict:
+        """{job title: count} over all statuses, from the cell counts."""
+        return {row[0] or row[1]: row[2] for row in self._connection().execute(
+            "SELECT MIN(job_title), job_title_key, SUM(n) FROM application_counts GROUP BY job_title_key HAVING SUM(n) > 0 ORDER BY job_title_key"
+        )}
+
+    def reconcile_counts(self) -> list:
+        """Rebuilds job_title_key and the cell counts from the rows; returns the cells that were off.
+
+        The triggers keep them exact for writes through SQLite, so differences mean rows were changed
+        outside the store (e.g. job titles edited by hand) or a bug; the fix is applied either way.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.create_function('normalize_job_title', 1, normalize_job_title, deterministic=True)
+            conn.execute("UPDATE applications SET job_title_key = normalize_job_title(job_title) WHERE job_title_key IS NOT normalize_job_title(job_title)")
+            before = {(row[0], row[1]): row[2] for row in conn.execute("SELECT status, job_title_key, n FROM application_counts WHERE n != 0")}
+            conn.execute("DELETE FROM application_counts")
+            conn.execute(
+                "INSERT INTO application_counts (status, job_title_key, job_title, n) "
+                "SELECT status, COALESCE(job_title_key, ''), MIN(job_title), COUNT(*) FROM applications GROUP BY 1, 2"
+            )
+            after = {(row[0], row[1]): row[2] for row in conn.execute("SELECT status, job_title_key, n FROM application_counts")}
+        drift = [(status, job_title_key, before.get((status, job_title_key), 0), after.get((status, job_title_key), 0))
+                 for status, job_title_key in sorted(before.keys() | after.keys())
+                 if before.get((status, job_title_key), 0) != after.get((status, job_title_key), 0)]
+        logger.info(f"Reconciled application counts in {self.db_path}: {len(drift)} cells corrected")
+        return drift
+
+    # --- Writes ---
+    def add(self, application: dict) -> bool:
+        try:
+            with self._connection() as conn:
+                self._insert(conn, application)
+            self.duplicate_index.add(application.get('email'), application.get('job_title'))
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error adding application to {self.db_path}: {e}", exc_info=True)
+            return False
+
+    def add_many(self, applications: list) -> int:
+        """Inserts a batch of applications in one transaction (bulk imports); returns how many were stored.
+
+        Applications without a cv_filename (no CV, e.g. imported from a spreadsheet) get an app_id from
+        their timestamp in ms, moved on by 1 ms while it is taken, with cv_filename '<app_id>-no-cv'.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for application in applications:
+                if not application.get('cv_filename'):
+                    try:
+                        app_ms = int(datetime.fromisoformat(application['timestamp'].replace('Z', '+00:00')).timestamp() * 1000)
+                    except (KeyError, AttributeError, ValueError):
+                        app_ms = int(time.time() * 1000)
+                    while conn.execute("SELECT 1 FROM applications WHERE app_id = ? LIMIT 1", (str(app_ms),)).fetchone():
+                        app_ms += 1
+                    application['cv_filename'] = f"{app_ms}-no-cv"
+                self._insert(conn, application)
+        for application in applications:
+            self.duplicate_index.add(application.get('email'), application.get('job_title'))
+        return len(applications)
+
+    def update(self, app_id: str, changes: dict, remove_keys: list | tuple = ()) -> dict | None:
+        """Applies a partial update to one application and returns the updated record."""
+        conn = self._connection()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute("SELECT id, data FROM applications WHERE app_id = ? ORDER BY id LIMIT 1", (app_id,)).fetchone()
+                if row is None:
+                    return None
+                application = json.loads(row['data'])
+                application.update(changes)
+                for key in remove_keys:
+                    application.pop(key, None)
+                conn.execute(
+                    "UPDATE applications SET app_id = ?, email = ?, job_title = ?, status = ?, timestamp = ?, data = ?, job_title_key = ? WHERE id = ?",
+                    self._column_values(application) + (row['id'],)
+                )
+            return application
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error updating application {app_id} in {self.db_path}: {e}", exc_info=True)
+            return None
+
+    def replace_all(self, applications: list) -> bool:
+        """Replaces every stored application (bulk edits)."""
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM applications")
+                for application in applications:
+                    self._insert(conn, application)
+            logger.info(f"Successfully saved {len(applications)} applications to {self.db_path}")
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error replacing applications in {self.db_path}: {e}", exc_info=True)
+            return False
+
+    # --- Migration ---
+    def import_json_log(self, log_file: str = APPLICATION_LOG_FILE) -> int:
+        """Imports applications from the legacy JSON log (snapshot plus journal tail).
+
+        Applications whose app_id is already stored are skipped, so running it twice is harmless.
+        """
+        applications = ApplicationJournal(log_file).load()
+        imported = 0
+        with self._connection() as conn:
+            known_app_ids = {row[0] for row in conn.execute("SELECT app_id FROM applications")}
+            for application in applications:
+                app_id = application_id(application)
+                if app_id in known_app_ids:
+                    continue
+                self._insert(conn, application)
+                known_app_ids.add(app_id)
+                imported += 1
+        logger.info(f"Imported {imported} of {len(applications)} applications from {log_file} into {self.db_path}")
+        return imported
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Application store maintenance.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    import_parser = subparsers.add_parser('import-json', help="Import the legacy JSON application log into SQLite.")
+    import_parser.add_argument('--log', default=APPLICATION_LOG_FILE)
+    import_parser.add_argument('--db', default=APPLICATION_DB_FILE)
+    reconcile_parser = subparsers.add_parser('reconcile-counts', help="Rebuild the per status/job title counters from the applications.")
+    reconcile_parser.add_argument('--db', default=APPLICATION_DB_FILE)
+    args = parser.parse_args()
+
+    if args.command == 'import-json':
+        ApplicationStore(args.db).import_json_log(args.log)
+    elif args.command == 'reconcile-counts':
+        for status, job_title_key, counted, actual in ApplicationStore(args.db).reconcile_counts():
+            print(f"{status} / {job_title_key or '(no job title)'}: {counted} -> {actual}")
@@ -0,0 +1,521 @@
+import os
+import re
+import hashlib
+import logging
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Blog images (uploads, bot photos, images extracted from .docx) are public static files
+IMAGE_BLOB_ROOT = os.path.join(BASE_DIR, 'static', 'blobs') # Served by Flask's static route as IMAGE_BLOB_URL
+IMAGE_BLOB_URL = '/static/blobs'
+IMAGE_BLOB_REFS_DB = os.getenv('IMAGE_BLOB_REFS_DB', 'image_blobs.db') # Kept outside static/ so it is not served
+# CVs are only served through the login-protected download route
+CV_BLOB_ROOT = os.getenv('CV_BLOB_ROOT', os.path.join(BASE_DIR, 'uploads', 'blobs'))
+LEGACY_CV_FOLDER = 'uploads' # CVs stored before the blob store, as uploads/<ms>-<name>
+# Images stored before the blob store: admin uploads (/static/uploaded_images/<uuid>.<ext>) and blog bot photos (/uploaded_images/...)
+LEGACY_IMAGE_URL_RE = re.compile(r'/(static/)?uploaded_images/([\w-]+\.[A-Za-z0-9]{1,8})(?![\w.-])')
+# A blob released sooner than this after being stored may be about to get a new owner (the same image uploaded
+# again for a post that is still being saved), so it is left to collect_garbage() instead of deleted right away
+RELEASE_MIN_AGE_SECONDS = int(os.getenv('BLOB_RELEASE_MIN_AGE_SECONDS', '3600'))
+
+CHUNK_SIZE = 64 * 1024
+BLOB_NAME_RE = re.compile(r'^[0-9a-f]{64}(\.[a-z0-9]{1,8})?$')
+DERIVATIVE_NAME_RE = re.compile(r'^[0-9a-f]{64}-')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blob_refs (
+    blob TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    PRIMARY KEY (blob, owner)
+);
+CREATE INDEX IF NOT EXISTS idx_blob_refs_owner ON blob_refs (owner);
+"""
+
+
+def normalize_extension(extension: str | None) -> str:
+    extension = (extension or '').lower().lstrip('.')
+    return f".{extension}" if extension and extension.isalnum() and len(extension) <= 8 else ''
+
+
+class BlobStore:
+    """Content-addressed file store: each blob is named by the SHA-256 of its bytes.
+
+    Blobs live at <root>/<h[0:2]>/<h[2:4]>/<sha256><ext>, so identical uploads share one file
+    and no directory grows past a few thousand entries. References are tracked per owner
+    (e.g. 'post:<id>', 'application:<app_id>') in <root>/refs.db; a blob's reference count is
+    its number of owners, and a blob is deleted when its last owner lets go of it. Reference
+    changes and file creation/removal happen under the same SQLite write lock.
+    """
+
+    def __init__(self, root: str, url_prefix: str | None = None, refs_db: str | None = None):
+        self.root = root
+        self.url_prefix = url_prefix
+        self.refs_db = refs_db or os.path.join(root, 'refs.db')
+        self._local = threading.local()
+        # Derivatives (<sha256>-w640.jpg) are not blobs, hence the lookahead
+        self._url_re = re.compile(re.escape(url_prefix) + r'/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64}(?:\.[a-z0-9]{1,8})?)(?![\w.-])') if url_prefix else None
+
+    # --- Connection handling ---
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(self.root, exist_ok=True)
+            conn = sqlite3.connect(self.refs_db, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # --- Naming ---
+    def blob_path(self, blob_name: str) -> str:
+        if not BLOB_NAME_RE.match(blob_name or ''):
+            raise ValueError(f"Invalid blob name '{blob_name}'")
+        return os.path.join(self.root, blob_name[0:2], blob_name[2:4], blob_name)
+
+    def blob_url(self, blob_name: str) -> str:
+        return f"{self.url_prefix}/{blob_name[0:2]}/{blob_name[2:4]}/{blob_name}"
+
+    def exists(self, blob_name: str) -> bool:
+        return os.path.exists(self.blob_path(blob_name))
+
+    def blob_name_from_url(self, url: str | None) -> str | None:
+        """The blob a URL points at, if it is exactly a blob URL of this store."""
+        match = self._url_re.fullmatch(url) if url and self._url_re is not None else None
+        return match.group(1) if match else None
+
+    # --- Derivatives ---
+    # Files computed from a blob (resized images, ...) stored next to it as <sha256>-<variant>.
+    # They are deleted together with the blob and never referenced on their own.
+    def derivative_path(self, blob_name: str, variant: str) -> str:
+        return os.path.join(os.path.dirname(self.blob_path(blob_name)), f"{blob_name.split('.', 1)[0]}-{variant}")
+
+    def derivative_url(self, blob_name: str, variant: str) -> str:
+        return f"{self.url_prefix}/{blob_name[0:2]}/{blob_name[2:4]}/{blob_name.split('.', 1)[0]}-{variant}"
+
+    def put_derivative(self, blob_name: str, variant: str, data: bytes):
+        path = self.derivative_path(blob_name, variant)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path) # Regenerating a derivative produces the same file, so last writer wins
+
+    def _remove_derivatives(self, blob_name: str):
+        directory = os.path.dirname(self.blob_path(blob_name))
+        prefix = blob_name.split('.', 1)[0] + '-'
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.name.startswith(prefix):
+                        os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+    def names_in_text(self, text: str | None) -> set:
+        """Blob names referenced by URL in `text` (an image_url, post HTML, ...)."""
+        if not text or self._url_re is None:
+            return set()
+        return set(self._url_re.findall(text))
+
+    # --- Writes ---
+    def writer(self, max_bytes: int | None = None, sniff=None, sniff_bytes: int = 0) -> 'BlobWriter':
+        """File-like object that streams a new blob to disk; finish it with commit_writer()."""
+        return BlobWriter(self, max_bytes=max_bytes, sniff=sniff, sniff_bytes=sniff_bytes)
+
+    def commit_writer(self, writer: 'BlobWriter', extension: str | None = None, owner: str | None = None) -> str:
+        """Moves a finished BlobWriter's file into the store (no second copy); returns the blob name."""
+        writer.finish()
+        blob_name = writer.digest.hexdigest() + normalize_extension(extension)
+        try:
+            self._commit_blob(writer.temp_path, blob_name, owner)
+        finally:
+            writer.close() # Removes the temp file if it was a duplicate
+        return blob_name
+
+    def put_stream(self, stream, extension: str | None = None, owner: str | None = None, max_bytes: int | None = None) -> str:
+        """Copies `stream` into the store, hashing while writing (single pass); returns the blob name.
+
+        If `owner` is given, the reference is recorded atomically with the blob becoming visible.
+        Raises ValueError if the stream is larger than `max_bytes`.
+        """
+        writer = self.writer(max_bytes=max_bytes)
+        try:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                writer.write(chunk)
+            return self.commit_writer(writer, extension, owner)
+        finally:
+            writer.close() # Duplicate content, or the write failed
+
+    def commit_file(self, path: str, extension: str | None = None, owner: str | None = None) -> str:
+        """Hashes a finished file that already lives under <root>/tmp and moves it into the store."""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+        blob_name = digest.hexdigest() + normalize_extension(extension)
+        try:
+            self._commit_blob(path, blob_name, owner)
+        finally:
+            if os.path.exists(path):
+                os.remove(path) # Duplicate content
+        return blob_name
+
+    def put_bytes(self, data: bytes, extension: str | None = None, owner: str | None = None) -> str:
+        blob_name = hashlib.sha256(data).hexdigest() + normalize_extension(extension)
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=tmp_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            self._commit_blob(temp_path, blob_name, owner)
+            return blob_name
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _commit_blob(self, temp_path: str, blob_name: str, owner: str | None):
+        path = self.blob_path(blob_name)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE") # Serializes against release() deleting the same blob
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(temp_path, path)
+            else:
+                os.utime(path) # Freshly stored again: keep collect_garbage() away until its owner takes a reference
+            if owner:
+                conn.execute("INSERT OR IGNORE INTO blob_refs (blob, owner) VALUES (?, ?)", (blob_name, owner))
+
+    def touch(self, blob_name: str) -> bool:
+        """Marks an existing blob as freshly stored (see _commit_blob) so it outlives GC until it is referenced.
+
+        For callers that reuse a blob by name without writing it again; returns False if there is no such blob.
+        """
+        path = self.blob_path(blob_name)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE") # Same lock as collect_garbage(), so the blob cannot go in between
+            try:
+                os.utime(path)
+                return True
+            except FileNotFoundError:
+                return False
+
+    # --- References ---
+    def refcount(self, blob_name: str) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM blob_refs WHERE blob = ?", (blob_name,)).fetchone()[0]
+
+    def add_ref(self, blob_name: str, owner: str):
+        with self._connection() as conn:
+            conn.execute("INSERT OR IGNORE INTO blob_refs (blob, owner) VALUES (?, ?)", (blob_name, owner))
+
+    def set_refs(self, owner: str, blob_names) -> list:
+        """Makes `blob_names` the exact set of blobs referenced by `owner`; returns deleted blobs."""
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = {row[0] for row in conn.execute("SELECT blob FROM blob_refs WHERE owner = ?", (owner,))}
+            released = self._apply_refs(conn, owner, current, set(blob_names))
+            return self._delete_unreferenced(conn, released, RELEASE_MIN_AGE_SECONDS)
+
+    def sync_owners(self, owner_prefix: str, refs_by_owner: dict) -> list:
+        """set_refs() for a whole group of owners (e.g. every 'post:' owner) in one transaction.
+
+        Owners with the prefix that are missing from `refs_by_owner` lose all their references.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            current = {}
+            for blob_name, owner in conn.execute("SELECT blob, owner FROM blob_refs WHERE substr(owner, 1, ?) = ?", (len(owner_prefix), owner_prefix)):
+                current.setdefault(owner, set()).add(blob_name)
+            released = set()
+            for owner in set(current) | set(refs_by_owner):
+                released |= self._apply_refs(conn, owner, current.get(owner, set()), set(refs_by_owner.get(owner, ())))
+            return self._delete_unreferenced(conn, released, RELEASE_MIN_AGE_SECONDS)
+
+    def release(self, owner: str) -> list:
+        """Drops every reference held by `owner`; returns the blobs that were deleted (see RELEASE_MIN_AGE_SECONDS)."""
+        return self.set_refs(owner, ())
+
+    @staticmethod
+    def _apply_refs(conn, owner: str, current: set, wanted: set) -> set:
+        for blob_name in wanted - current:
+            conn.execute("INSERT OR IGNORE INTO blob_refs (blob, owner) VALUES (?, ?)", (blob_name, owner))
+        released = current - wanted
+        for blob_name in released:
+            conn.execute("DELETE FROM blob_refs WHERE blob = ? AND owner = ?", (blob_name, owner))
+        return released
+
+    def collect_garbage(self, min_age_seconds: int = 24 * 3600) -> list:
+        """Deletes blobs that nobody references and that were not stored in the last `min_age_seconds`.
+
+        Covers blobs stored for a post or application that was never saved (failed form, .docx
+        converted but not used). The age limit leaves time for an upload to be referenced.
+        """
+        cutoff = time.time() - min_age_seconds
+        candidates = []
+        for dirpath, _, filenames in os.walk(self.root):
+            digests = {filename.split('.', 1)[0] for filename in filenames if BLOB_NAME_RE.match(filename)}
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                except OSError:
+                    continue
+                if os.path.basename(dirpath) == 'tmp':
+                    os.remove(path) # Left behind by an interrupted put
+                elif BLOB_NAME_RE.match(filename):
+                    candidates.append(filename)
+                elif DERIVATIVE_NAME_RE.match(filename) and filename[:64] not in digests:
+                    os.remove(path) # Derivative finished after its blob was deleted
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            return self._delete_unreferenced(conn, candidates, min_age_seconds)
+
+    def _delete_unreferenced(self, conn, blob_names, min_age_seconds: float) -> list:
+        """Deletes the blobs among `blob_names` that have no reference and were not stored in the last `min_age_seconds`.
+
+        Runs inside the caller's BEGIN IMMEDIATE transaction, so the age is checked under the same lock
+        a put of the same content takes to refresh it.
+        """
+        cutoff = time.time() - min_age_seconds
+        deleted = []
+        for blob_name in blob_names:
+            if conn.execute("SELECT 1 FROM blob_refs WHERE blob = ? LIMIT 1", (blob_name,)).fetchone():
+                continue
+            path = self.blob_path(blob_name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue # Stored recently; collect_garbage() deletes it later if it stays unreferenced
+                os.remove(path)
+                deleted.append(blob_name)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Error deleting unreferenced blob {blob_name}: {e}")
+                continue
+            try:
+                self._remove_derivatives(blob_name)
+            except OSError as e:
+                logger.error(f"Error deleting derivatives of blob {blob_name}: {e}")
+        if deleted:
+            logger.info(f"Deleted {len(deleted)} unreferenced blob(s) from {self.root}")
+        return deleted
+
+
+class BlobWriter:
+    """Writable file that hashes a blob while it is written to a temp file in the store.
+
+    Memory use is constant whatever the size. Exceeding `max_bytes` raises ValueError. With
+    `sniff`, the first `sniff_bytes` bytes are passed to sniff(head) as soon as they have
+    arrived; it raises to reject the content. A writer that is closed without being committed
+    deletes its temp file. It also reads and seeks like a file (Werkzeug rewinds uploaded
+    files and wraps them in a FileStorage).
+    """
+
+    def __init__(self, store: BlobStore, max_bytes: int | None = None, sniff=None, sniff_bytes: int = 0):
+        tmp_dir = os.path.join(store.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        fd, self.temp_path = tempfile.mkstemp(dir=tmp_dir)
+        self._file = os.fdopen(fd, 'w+b')
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.max_bytes = max_bytes
+        self._sniff = sniff
+        self._sniff_bytes = sniff_bytes
+        self._head = b''
+
+    def write(self, data: bytes) -> int:
+        self.size += len(data)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            self.close() # Rejected: nothing more is written
+            raise ValueError(f"Blob exceeds the maximum size of {self.max_bytes} bytes")
+        if self._sniff is not None and len(self._head) < self._sniff_bytes:
+            self._head += data[:self._sniff_bytes - len(self._head)]
+            if len(self._head) >= self._sniff_bytes:
+                self._check_head()
+        self.digest.update(data)
+        return self._file.write(data)
+
+    def _check_head(self):
+        sniff, self._sniff = self._sniff, None
+        try:
+            sniff(self._head)
+        except Exception:
+            self.close()
+            raise
+
+    def finish(self):
+        """Flushes the file; content shorter than the sniffed prefix is checked now."""
+        if self._sniff is not None:
+            self._check_head()
+        self._file.flush()
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    @property
+    def closed(self) -> bool:
+        return self._file.closed
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path) # Not committed (rejected, duplicate, or the request failed)
+
+
+image_blobs = BlobStore(IMAGE_BLOB_ROOT, IMAGE_BLOB_URL, refs_db=IMAGE_BLOB_REFS_DB)
+cv_blobs = BlobStore(CV_BLOB_ROOT)
+
+
+def sync_post_image_refs(posts: list) -> list:
+    """Points each post's 'post:<id>' references at the image blobs its image_url and content use.
+
+    Called after every save of blog_posts.json (app.py and blog_bot.py), so edits and deletes
+    release the images a post no longer uses; blobs still used by another post are kept.
+    """
+    refs_by_owner = {}
+    for post in posts:
+        if post.get('id'):
+            names = image_blobs.names_in_text(post.get('image_url'))
+            if post.get('content_is_html'):
+                names |= image_blobs.names_in_text(post.get('content'))
+            refs_by_owner[f"post:{post['id']}"] = names
+    return image_blobs.sync_owners('post:', refs_by_owner)
+
+
+def application_cv_path(application: dict) -> str | None:
+    """Path of an application's CV: its blob if it has one, else the legacy uploads/<cv_filename>."""
+    if application.get('cv_blob'):
+        return cv_blobs.blob_path(application['cv_blob'])
+    cv_filename = application.get('cv_filename')
+    if not cv_filename or '/' in cv_filename or '\\' in cv_filename or '..' in cv_filename:
+        return None
+    return os.path.join(LEGACY_CV_FOLDER, cv_filename)
+
+
+def legacy_image_path(image_url: str) -> str | None:
+    """File behind a legacy image URL (see LEGACY_IMAGE_URL_RE), or None."""
+    match = LEGACY_IMAGE_URL_RE.fullmatch(image_url or '')
+    if match is None:
+        return None
+    folder = os.path.join(BASE_DIR, 'static', 'uploaded_images') if match.group(1) else os.path.join(BASE_DIR, 'uploaded_images')
+    return os.path.join(folder, match.group(2))
+
+
+def import_legacy_images(blog_posts_file: str, delete_legacy: bool = False) -> dict:
+    """Moves the images posts use from uploaded_images/ and static/uploaded_images/ into the image blob store.
+
+    Each referenced file is hashed into the store and every image_url (and HTML content) pointing at
+    it is rewritten to its blob URL under the blog_posts.json lock; the posts' references follow
+    from the save. Returns {legacy URL: blob URL} of the imported images.
+    """
+    from json_store import JsonFileWriter # Only needed by this one-shot command
+
+    def rewrite(posts):
+        imported = {}
+        def blob_url_for(match):
+            legacy_url = match.group(0)
+            if legacy_url not in imported:
+                path = legacy_image_path(legacy_url)
+                if not os.path.exists(path):
+                    logger.warning(f"Legacy image {legacy_url} not found at {path}; left as is.")
+                    imported[legacy_url] = legacy_url
+                else:
+                    with open(path, 'rb') as f:
+                        blob_name = image_blobs.put_stream(f, os.path.splitext(path)[1]) # Referenced by the save below
+                    imported[legacy_url] = image_blobs.blob_url(blob_name)
+            return imported[legacy_url]
+        for post in posts:
+            if post.get('image_url'):
+                post['image_url'] = LEGACY_IMAGE_URL_RE.sub(blob_url_for, post['image_url'])
+                if image_blobs.blob_name_from_url(post['image_url']):
+                    post['image_url_is_static'] = True
+            if post.get('content_is_html') and post.get('content'):
+                post['content'] = LEGACY_IMAGE_URL_RE.sub(blob_url_for, post['content'])
+        return {legacy_url: url for legacy_url, url in imported.items() if url != legacy_url}
+
+    imported = JsonFileWriter(blog_posts_file, on_commit=sync_post_image_refs).update(rewrite)
+    if delete_legacy:
+        for legacy_url in imported:
+            os.remove(legacy_image_path(legacy_url))
+    return imported
+
+
+def import_legacy_cvs(application_store, delete_legacy: bool = False) -> int:
+    """Moves CVs stored as uploads/<cv_filename> into the CV blob store; returns how many were imported.
+
+    Each application gets its cv_blob, and the blob its 'application:<app_id>' reference once the
+    application has been updated.
+    """
+    from application_journal import application_id # Only needed by this one-shot command
+    imported = 0
+    for application in application_store.list_applications():
+        if application.get('cv_blob'):
+            continue
+        path = application_cv_path(application)
+        app_id = application_id(application)
+        if not path or not app_id or not os.path.exists(path):
+            continue
+        with open(path, 'rb') as f:
+            blob_name = cv_blobs.put_stream(f, os.path.splitext(path)[1])
+        if application_store.update(app_id, {'cv_blob': blob_name}) is None:
+            logger.error(f"Could not record the CV blob of application {app_id}; its legacy file is kept.")
+            continue
+        cv_blobs.add_ref(blob_name, f"application:{app_id}")
+        if delete_legacy:
+            os.remove(path)
+        imported += 1
+    return imported
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Maintenance for the image and CV blob stores.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    gc_parser = subparsers.add_parser('gc', help="Delete unreferenced blobs older than --min-age-hours")
+    gc_parser.add_argument('--min-age-hours', type=float, default=24)
+    import_parser = subparsers.add_parser('import-legacy', help="Move images and CVs stored before the blob store into it (one-shot)")
+    import_parser.add_argument('--blog-posts', default='blog_posts.json')
+    import_parser.add_argument('--applications-db', default=os.getenv('APPLICATION_DB_FILE', 'applications.db'))
+    import_parser.add_argument('--delete-legacy', action='store_true', help="Remove the old files once they are imported")
+    args = parser.parse_args()
+
+    if args.command == 'gc':
+        for store in (image_blobs, cv_blobs):
+            deleted = store.collect_garbage(int(args.min_age_hours * 3600))
+            print(f"{store.root}: deleted {len(deleted)} unreferenced blob(s)")
+    elif args.command == 'import-legacy':
+        from application_store import ApplicationStore
+        from job_queue import JobQueue
+        from image_derivatives import needs_derivatives
+        imported_images = import_legacy_images(args.blog_posts, args.delete_legacy)
+        print(f"Imported {len(imported_images)} blog image(s) into {image_blobs.root}")
+        job_queue = JobQueue()
+        for blob_url in set(imported_images.values()):
+            blob_name = needs_derivatives(blob_url)
+            if blob_name:
+                job_queue.enqueue('image_derivatives', {'blob': blob_name}) # Resized copies, made by the app's job worker
+        imported_cvs = import_legacy_cvs(ApplicationStore(args.applications_db), args.delete_legacy)
+        print(f"Imported {imported_cvs} CV(s) into {cv_blobs.root}")
@@ -1,6 +1,7 @@
 import os
 import json
 import logging
+import sqlite3
 from datetime import datetime
 import uuid # For generating unique post IDs
 
@@ -19,7 +20,14 @@ from telegram.ext import (
     PicklePersistence
 )
 import asyncio # Ensure asyncio is imported
-import mammoth
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from docx_conversion import convert_docx_bytes, docx_cache # Runs in the conversion process pool, cached on disk
+from json_store import JsonFileWriter
+from blog_store import BlogPostCache, post_sort_key
+from blob_store import image_blobs, sync_post_image_refs # Content-addressed blog images shared with app.py
+from image_derivatives import needs_derivatives, attach_image_variants, strip_image_metadata, derivatives_available
+from job_queue import JobQueue, JOB_QUEUE_DB_FILE
 
 # Load environment variables from .env file
 load_dotenv()
@@ -35,6 +43,15 @@ logger = logging.getLogger(__name__)
 BLOG_BOT_TOKEN = os.getenv('BLOG_BOT_TOKEN')
 BLOG_ADMIN_CHAT_ID = os.getenv('BLOG_ADMIN_CHAT_ID')
 BLOG_POSTS_FILE = 'blog_posts.json'
+blog_posts_cache = BlogPostCache(BLOG_POSTS_FILE) # Re-parsed only when the file changes on disk
+
+def blog_posts_committed(posts: list):
+    """Runs under the blog_posts.json lock after each write from this process."""
+    blog_posts_cache.invalidate() # Drop the sorted index right away
+    sync_post_image_refs(posts) # Images no post uses any more are deleted
+
+blog_posts_writer = JsonFileWriter(BLOG_POSTS_FILE, on_commit=blog_posts_committed) # Shared lock file with app.py
+job_queue = JobQueue(JOB_QUEUE_DB_FILE) # Shared with app.py, whose workers run the jobs queued here
 
 # Conversation states for /newpost
 TITLE, CONTENT_CHOICE, RECEIVE_TYPED_CONTENT, RECEIVE_CONTENT_FILE, AUTHOR, IMAGE_URL, RECEIVE_DOCX_FILE = range(7)
@@ -45,6 +62,47 @@ SELECT_POST_TO_EDIT, SELECT_FIELD_TO_EDIT, GET_NEW_FIELD_VALUE = range(7, 10) #
 # --- Constants ---
 POSTS_PER_PAGE = 3
 
+# .docx conversion runs in worker processes so a large document never blocks the event loop
+DOCX_CONVERSION_WORKERS = int(os.getenv('DOCX_CONVERSION_WORKERS', '2'))
+DOCX_CONVERSION_TIMEOUT = float(os.getenv('DOCX_CONVERSION_TIMEOUT', '120')) # Seconds
+docx_executor = None # Created on first use
+docx_conversion_slots = asyncio.Semaphore(DOCX_CONVERSION_WORKERS) # Caps conversions in flight
+
+def get_docx_executor() -> ProcessPoolExecutor:
+    global docx_executor
+    if docx_executor is None:
+        docx_executor = ProcessPoolExecutor(max_workers=DOCX_CONVERSION_WORKERS)
+    return docx_executor
+
+def reset_docx_executor(stuck: ProcessPoolExecutor | None = None):
+    """Kills the pool's worker processes so a stuck conversion stops using CPU; the next conversion starts a new pool.
+
+    With `stuck`, only that pool is reset (another timed out conversion may already have replaced it).
+    """
+    global docx_executor
+    executor = docx_executor
+    if executor is None or (stuck is not None and executor is not stuck):
+        return
+    docx_executor = None
+    # ProcessPoolExecutor has no public way to kill a running task, so stop its processes directly
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+async def convert_docx_in_pool(docx_bytes: bytes) -> dict:
+    cached = docx_cache.lookup(docx_bytes) # Re-uploads of a known document skip the pool entirely
+    if cached is not None:
+        return cached
+    loop = asyncio.get_running_loop()
+    async with docx_conversion_slots:
+        executor = get_docx_executor()
+        future = loop.run_in_executor(executor, convert_docx_bytes, docx_bytes)
+        try:
+            return await asyncio.wait_for(future, timeout=DOCX_CONVERSION_TIMEOUT)
+        except (asyncio.TimeoutError, BrokenProcessPool):
+            reset_docx_executor(executor) # Also replaces a pool whose worker crashed
+            raise
+
 # --- Helper Functions ---
 def escape_markdown_v2(text: str) -> str:
     """Escapes characters for Telegram MarkdownV2."""
@@ -55,36 +113,26 @@ def escape_markdown_v2(text: str) -> str:
     return "".join(f'\\{char}' if char in escape_chars else char for char in text)
 
 def load_blog_posts() -> list:
-    if not os.path.exists(BLOG_POSTS_FILE):
-        logger.info(f"{BLOG_POSTS_FILE} not found. Returning empty list.")
-        return []
-    try:
-        with open(BLOG_POSTS_FILE, 'r', encoding='utf-8') as f:
-            file_content = f.read()
-            if not file_content:
-                logger.info(f"{BLOG_POSTS_FILE} is empty. Returning empty list.")
-                return []
-            posts_data = json.loads(file_content)
-            if not isinstance(posts_data, list):
-                logger.warning(f"Data in {BLOG_POSTS_FILE} is not a list. Returning empty list.")
-                return []
-            return posts_data
-    except json.JSONDecodeError:
-        logger.error(f"Error decoding JSON from {BLOG_POSTS_FILE}. Returning empty list.", exc_info=True)
-        return []
-    except IOError as e:
-        logger.error(f"IOError reading {BLOG_POSTS_FILE}: {e}. Returning empty list.", exc_info=True)
-        return []
-
-def save_blog_posts(posts_data: list) -> bool:
+    # Mutable copy of the cached posts; the file is only re-parsed when it changes on disk
+    return blog_posts_cache.load_posts()
+
+def update_blog_posts(mutator) -> tuple[bool, object]:
+    """Applies `mutator(posts)` to the current blog_posts.json under its file lock and saves it.
+
+    Same contract as update_blog_posts in app.py: changes made concurrently by the web app are
+    kept. Returns (True, mutator's return value), or (False, None) if the file could not be written.
+    """
+    def apply(posts):
+        result = mutator(posts)
+        attach_image_variants(posts) # Resized copies of each post's image, once generated
+        return result
     try:
-        with open(BLOG_POSTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(posts_data, f, indent=4, ensure_ascii=False)
-        logger.info(f"Successfully saved {len(posts_data)} posts to {BLOG_POSTS_FILE}")
-        return True
-    except IOError as e:
-        logger.error(f"IOError writing to {BLOG_POSTS_FILE}: {e}", exc_info=True)
-        return False
+        result = blog_posts_writer.update(apply) # Lock, re-read, temp file, fsync, atomic rename
+        logger.info(f"Successfully updated {BLOG_POSTS_FILE}")
+        return True, result
+    except (IOError, OSError, ValueError) as e:
+        logger.error(f"Error writing to {BLOG_POSTS_FILE}: {e}", exc_info=True)
+        return False, None
 
 async def is_admin(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
     if not BLOG_ADMIN_CHAT_ID:
@@ -216,38 +264,37 @@ async def process_docx_file(update: Update, context: ContextTypes.DEFAULT_TYPE)
         await update.message.reply_text(escaped_msg, parse_mode='MarkdownV2')
         return RECEIVE_DOCX_FILE
 
-    tg_file = await context.bot.get_file(doc.file_id)
-    temp_doc_path = f"temp_{uuid.uuid4().hex}.docx"
-
     try:
-        await tg_file.download_to_drive(custom_path=temp_doc_path)
+        tg_file = await context.bot.get_file(doc.file_id)
+        docx_bytes = bytes(await tg_file.download_as_bytearray()) # In memory, no temp file
     except Exception as e:
         logger.error(f"Error downloading .docx file: {e}", exc_info=True)
         raw_msg = "An error occurred while downloading your .docx file. Please try again or type /cancel."
         escaped_msg = escape_markdown_v2(raw_msg)
         await update.message.reply_text(escaped_msg, parse_mode='MarkdownV2')
-        if os.path.exists(temp_doc_path): # Attempt to clean up if file was partially created
-            os.remove(temp_doc_path)
         return RECEIVE_DOCX_FILE
 
+    if docx_conversion_slots.locked():
+        await update.message.reply_text(escape_markdown_v2("Other documents are being converted, yours is next..."), parse_mode='MarkdownV2')
+
     html_content = ""
     try:
-        with open(temp_doc_path, "rb") as docx_file:
-            result = mammoth.convert_to_html(docx_file)
-            html_content = result.value # This is the HTML string
-            if result.messages: # Log any messages (warnings/errors) from mammoth conversion
-                logger.warning(f"Mammoth conversion messages for {temp_doc_path}: {result.messages}")
+        result = await convert_docx_in_pool(docx_bytes)
+        html_content = result['html'] # This is the HTML string
+        if result['messages']: # Log any messages (warnings/errors) from mammoth conversion
+            logger.warning(f"Mammoth conversion messages for {doc.file_name}: {result['messages']}")
+    except asyncio.TimeoutError:
+        logger.error(f"Converting {doc.file_name} took longer than {DOCX_CONVERSION_TIMEOUT}s; giving up.")
+        raw_msg = "Your Word document took too long to process. Please try a smaller document, or type /cancel."
+        escaped_msg = escape_markdown_v2(raw_msg)
+        await update.message.reply_text(escaped_msg, parse_mode='MarkdownV2')
+        return RECEIVE_DOCX_FILE
     except Exception as e:
         logger.error(f"Error converting .docx to HTML with mammoth: {e}", exc_info=True)
         raw_msg = "An error occurred while processing your Word document. Please ensure it's a valid .docx file and try again, or type /cancel."
         escaped_msg = escape_markdown_v2(raw_msg)
         await update.message.reply_text(escaped_msg, parse_mode='MarkdownV2')
-        if os.path.exists(temp_doc_path): # Clean up
-            os.remove(temp_doc_path)
         return RECEIVE_DOCX_FILE
-    finally:
-        if os.path.exists(temp_doc_path): # Ensure cleanup in all cases
-            os.remove(temp_doc_path)
 
     context.user_data['new_post']['content'] = html_content
     context.user_data['new_post']['content_is_html'] = True # Flag that content is HTML
@@ -321,19 +368,26 @@ async def handle_uploaded_image(update: Update, context: ContextTypes.DEFAULT_TY
         await update.message.reply_text(escaped_error_message, parse_mode='MarkdownV2')
         return IMAGE_URL # Allow user to try again or skip
 
-    unique_filename = uuid.uuid4().hex + ".jpg" # Assume JPEG for simplicity
-    upload_dir = "uploaded_images"
-    save_path = os.path.join(upload_dir, unique_filename)
-
-    os.makedirs(upload_dir, exist_ok=True)
-
     try:
-        await tg_file.download_to_drive(custom_path=save_path)
-        logger.info(f"Image successfully downloaded to: {save_path}")
+        image_bytes = bytes(await tg_file.download_as_bytearray())
+        image_bytes = await asyncio.to_thread(strip_image_metadata, image_bytes) # No EXIF in published images
+        # Same store as images uploaded in the admin panel; the post takes a reference when it is saved
+        blob_name = await asyncio.to_thread(image_blobs.put_bytes, image_bytes, '.jpg') # Telegram photos are JPEG
+        logger.info(f"Image successfully stored as blob {blob_name}")
         # Store a relative web path
-        context.user_data['new_post']['image_url'] = f"/{upload_dir}/{unique_filename}"
-
-        raw_confirm_message = f"Image successfully uploaded and will be saved as {unique_filename}."
+        context.user_data['new_post']['image_url'] = image_blobs.blob_url(blob_name)
+        context.user_data['new_post']['image_url_is_static'] = True
+        if needs_derivatives(image_blobs.blob_url(blob_name)):
+            try:
+                # Resized by the web app's job worker (or `python job_queue.py worker`); never queued when none runs
+                if job_queue.has_worker('image_derivatives'):
+                    job_queue.enqueue('image_derivatives', {'blob': blob_name})
+                else:
+                    logger.warning(f"No job worker runs image_derivatives (Pillow missing or workers disabled); {blob_name} gets no resized copies.")
+            except sqlite3.Error as e:
+                logger.error(f"Could not queue image derivatives for {blob_name}: {e}")
+
+        raw_confirm_message = f"Image successfully uploaded and will be saved as {blob_name}."
         escaped_confirm_message = escape_markdown_v2(raw_confirm_message)
         await update.message.reply_text(escaped_confirm_message, parse_mode='MarkdownV2')
 
@@ -371,10 +425,7 @@ async def finalize_post_creation(update: Update, context: ContextTypes.DEFAULT_T
     post_data['id'] = str(uuid.uuid4())
     post_data['date_published'] = datetime.utcnow().isoformat() + 'Z'
 
-    posts = load_blog_posts()
-    posts.append(post_data)
-
-    if save_blog_posts(posts):
+    if update_blog_posts(lambda posts: posts.append(post_data))[0]:
         raw_success_msg = f"Blog post '{str(post_data['title'])}' successfully saved with ID: {str(post_data['id'])}!"
         escaped_success_msg = escape_markdown_v2(raw_success_msg)
         if update.callback_query and update.callback_query.message: # If triggered by photo upload (callback from previous message)
@@ -413,7 +464,7 @@ async def cancel_editing(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     context.user_data.pop('selected_post_uuid', None)
     context.user_data.pop('selected_post_full_data', None)
     # These might also be good to clear, similar to start_command
-    context.user_data.pop('paginated_posts_cache', None)
+    context.user_data.pop('post_page_keys', None)
     context.user_data.pop('current_page_num', None)
     context.user_data.pop('current_action_type', None)
 
@@ -457,7 +508,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     reply_markup = InlineKeyboardMarkup(keyboard)
 
     context.user_data.pop('current_action_type', None)
-    context.user_data.pop('paginated_posts_cache', None)
+    context.user_data.pop('post_page_keys', None)
     context.user_data.pop('current_page_num', None)
     context.user_data.pop('selected_post_uuid', None)
     context.user_data.pop('selected_post_full_data', None)
@@ -545,6 +596,34 @@ async def handle_menu_help_callback(update: Update, context: ContextTypes.DEFAUL
 
 
 # --- Post Selection and Paginated Display Functions ---
+def load_post_page(context: ContextTypes.DEFAULT_TYPE, page_num: int) -> tuple[list, int, int, bool]:
+    """Posts on page `page_num` of the admin post lists (every post, newest first).
+
+    Pages are found by binary search on (date_published, id) in the cached snapshot's sorted index:
+    each page shown remembers its first post's key and Next continues after the last post shown, so
+    no post list is copied into the session and posts created meanwhile do not shift the pages.
+    Page numbers the session has no key for (buttons on an old message) start over at page 0.
+    Returns (posts, page shown, total posts, whether there is a next page).
+    """
+    snapshot = blog_posts_cache.snapshot()
+    page_keys = context.user_data.get('post_page_keys', [])
+    if page_num < 0 or page_num > len(page_keys):
+        page_num = 0
+    if page_num < len(page_keys):
+        page_key, direction = page_keys[page_num], 'from' # Re-reading a page shown before
+    else:
+        page_key, direction = (context.user_data.get('post_next_key') if page_num else None), 'after'
+    start, end = snapshot.keyset_range(page_key, POSTS_PER_PAGE, direction, public=False)
+    if start >= end and page_num > 0: # Everything from here on was deleted
+        page_num = 0
+        start, end = snapshot.keyset_range(None, POSTS_PER_PAGE, public=False)
+    posts = snapshot.sorted_posts[start:end]
+    if posts:
+        context.user_data['post_page_keys'] = page_keys[:page_num] + [post_sort_key(posts[0])]
+        context.user_data['post_next_key'] = post_sort_key(posts[-1])
+    context.user_data['current_page_num'] = page_num
+    return list(posts), page_num, len(snapshot.sorted_posts), end < len(snapshot.sorted_posts)
+
 async def initiate_post_selection_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
     await query.answer()
@@ -573,7 +652,7 @@ async def initiate_post_selection_callback(update: Update, context: ContextTypes
         return
 
     context.user_data['current_action_type'] = 'manage' # Force to 'manage' for this flow
-    context.user_data.pop('paginated_posts_cache', None)
+    context.user_data.pop('post_page_keys', None)
     context.user_data['current_page_num'] = page_num
 
     await display_post_selection_page(update, context, page_num)
@@ -583,26 +662,8 @@ async def display_post_selection_page(update: Update, context: ContextTypes.DEFA
 
     action = context.user_data.get('current_action_type', 'manage') # Default to 'manage'
 
-    if 'paginated_posts_cache' not in context.user_data or page_num == 0: # Always refresh on page 0 for this flow
-        all_posts = load_blog_posts()
-        if not all_posts:
-            keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data='show_main_menu')]]
-            raw_message_text = f"There are no posts to {str(action)}. Would you like to create one?"
-            message_text_escaped = escape_markdown_v2(raw_message_text)
-            # logger.info(f"Attempting to edit message with MarkdownV2. Text: >>>{message_text_escaped}<<<")
-            await query.edit_message_text(
-                text=message_text_escaped,
-                reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='MarkdownV2'
-            )
-            return
-        context.user_data['paginated_posts_cache'] = sorted(
-            [{'id': p['id'], 'title': p.get('title', 'No Title'), 'date_published': p.get('date_published', '')} for p in all_posts],
-            key=lambda x: x.get('date_published', ''),
-            reverse=True
-        )
-
-    cached_posts = context.user_data.get('paginated_posts_cache', [])
-    if not cached_posts:
+    posts_on_page, page_num, total_posts, has_next = load_post_page(context, page_num)
+    if not posts_on_page:
         keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data='show_main_menu')]]
         raw_message_text = f"There are no posts to {str(action)}. Would you like to create one?"
         message_text_escaped = escape_markdown_v2(raw_message_text)
@@ -613,14 +674,7 @@ async def display_post_selection_page(update: Update, context: ContextTypes.DEFA
         )
         return
 
-    total_posts = len(cached_posts)
-    total_pages = (total_posts + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE
-    page_num = max(0, min(page_num, total_pages - 1))
-    context.user_data['current_page_num'] = page_num
-
-    start_index = page_num * POSTS_PER_PAGE
-    end_index = start_index + POSTS_PER_PAGE
-    posts_on_page = cached_posts[start_index:end_index]
+    total_pages = max((total_posts + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE, page_num + 1)
 
     # Updated prompt for "manage" action
     message_text = f"Select a post to manage \\(Page {page_num + 1}/{total_pages}\\):\n\n"
@@ -648,7 +702,7 @@ async def display_post_selection_page(update: Update, context: ContextTypes.DEFA
     # Pagination callbacks also use 'manage' as the action
     if page_num > 0:
         pagination_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"select_post_page:manage:{page_num - 1}"))
-    if page_num < total_pages - 1:
+    if has_next:
         pagination_row.append(InlineKeyboardButton("➡️ Next", callback_data=f"select_post_page:manage:{page_num + 1}"))
 
     if pagination_row:
@@ -698,16 +752,7 @@ async def handle_select_post_page_callback(update: Update, context: ContextTypes
     # This also makes sure the action type is consistent for display_post_selection_page
     context.user_data['current_action_type'] = action_from_callback
 
-    if 'paginated_posts_cache' not in context.user_data:
-        logger.info("paginated_posts_cache is missing in handle_select_post_page_callback. Re-initializing.")
-        # Re-trigger the selection process, which will use current_action_type
-        # Need to form the correct callback data for initiate_post_selection_callback
-        # This part is tricky, as initiate_post_selection_callback expects specific patterns.
-        # For simplicity, if cache is lost, we go to page 0 of the current action.
-        await display_post_selection_page(update, context, 0)
-        return
-
-    context.user_data['current_page_num'] = page_num
+    # Without page keys in the session (e.g. after a restart) load_post_page() starts over at page 0
     await display_post_selection_page(update, context, page_num)
 
 async def handle_post_selection_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -733,7 +778,7 @@ async def handle_post_selection_callback(update: Update, context: ContextTypes.D
     if not selected_post_obj:
         logger.error(f"Post with UUID {post_uuid} not found during selection.")
         await query.edit_message_text(text="Error: Selected post not found. It might have been deleted. Returning to post selection.")
-        context.user_data.pop('paginated_posts_cache', None)
+        context.user_data.pop('post_page_keys', None)
         # Fallback to the current action type if available, else 'manage'
         fallback_action = context.user_data.get('current_action_type', 'manage')
         context.user_data['current_action_type'] = fallback_action
@@ -809,7 +854,7 @@ async def handle_readonly_list_posts_callback(update: Update, context: ContextTy
         return
 
     if page_num == 0:
-        context.user_data.pop('paginated_posts_cache', None)
+        context.user_data.pop('post_page_keys', None)
 
     context.user_data['current_page_num'] = page_num
     context.user_data.pop('current_action_type', None)
@@ -819,58 +864,8 @@ async def handle_readonly_list_posts_callback(update: Update, context: ContextTy
 async def display_readonly_posts_page(update: Update, context: ContextTypes.DEFAULT_TYPE, page_num: int) -> None:
     query = update.callback_query
 
-    if 'paginated_posts_cache' not in context.user_data or page_num == 0: # Always refresh cache on page 0 for this view
-        all_posts = load_blog_posts()
-        if not all_posts:
-            keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data='show_main_menu')]]
-            raw_message_text = "There are no blog posts to display. Would you like to create one?"
-            message_text_escaped = escape_markdown_v2(raw_message_text)
-            # Assuming this message should also be MarkdownV2 if it's a common pattern,
-            # though the original didn't specify parse_mode. Adding for consistency.
-            # logger.info(f"Attempting to edit message with MarkdownV2. Text: >>>{message_text_escaped}<<<")
-            await query.edit_message_text(
-                text=message_text_escaped,
-                reply_markup=InlineKeyboardMarkup(keyboard),
-                parse_mode='MarkdownV2' # Added parse_mode for consistency
-            )
-            return
-
-        new_cached_posts = []
-        for p in all_posts:
-            title = p.get('title', 'No Title')
-            date_str = p.get('date_published', '')
-            content_str = p.get('content', '')
-            post_id = p['id']
-
-            escaped_title = escape_markdown_v2(str(title))
-
-            formatted_date = "Unknown Date"
-            if date_str:
-                try:
-                    date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
-                    formatted_date = date_obj.strftime("%Y-%m-%d")
-                except ValueError:
-                    pass
-            escaped_formatted_date = escape_markdown_v2(formatted_date)
-
-            snippet_text = content_str[:100] + ('...' if len(content_str) > 100 else '')
-            escaped_snippet = escape_markdown_v2(str(snippet_text))
-
-            new_cached_posts.append({
-                'id': post_id,
-                'escaped_title': escaped_title,
-                'escaped_formatted_date': escaped_formatted_date,
-                'escaped_snippet': escaped_snippet
-            })
-        context.user_data['paginated_posts_cache'] = sorted(
-            new_cached_posts,
-            key=lambda x: x.get('escaped_formatted_date', ''), # Sort by original date logic if needed, or escaped if consistent
-            reverse=True # Assuming reverse chronological
-        )
-
-
-    cached_posts = context.user_data.get('paginated_posts_cache', [])
-    if not cached_posts:
+    posts, page_num, total_posts, has_next = load_post_page(context, page_num)
+    if not posts:
         keyboard = [[InlineKeyboardButton("🏠 Main Menu", callback_data='show_main_menu')]]
         raw_message_text = "There are no blog posts to display. Would you like to create one?"
         message_text_escaped = escape_markdown_v2(raw_message_text)
@@ -883,14 +878,30 @@ async def display_readonly_posts_page(update: Update, context: ContextTypes.DEFA
         )
         return
 
-    total_posts = len(cached_posts)
-    total_pages = (total_posts + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE
-    page_num = max(0, min(page_num, total_pages - 1))
-    context.user_data['current_page_num'] = page_num
+    # Only the posts on this page are formatted
+    posts_on_page = []
+    for p in posts:
+        title = p.get('title', 'No Title')
+        date_str = p.get('date_published', '')
+        content_str = p.get('content', '')
+
+        formatted_date = "Unknown Date"
+        if date_str:
+            try:
+                date_obj = datetime.fromisoformat(date_str.replace('Z', '+00:00'))
+                formatted_date = date_obj.strftime("%Y-%m-%d")
+            except ValueError:
+                pass
 
-    start_index = page_num * POSTS_PER_PAGE
-    end_index = start_index + POSTS_PER_PAGE
-    posts_on_page = cached_posts[start_index:end_index]
+        snippet_text = content_str[:100] + ('...' if len(content_str) > 100 else '')
+        posts_on_page.append({
+            'id': p['id'],
+            'escaped_title': escape_markdown_v2(str(title)),
+            'escaped_formatted_date': escape_markdown_v2(formatted_date),
+            'escaped_snippet': escape_markdown_v2(str(snippet_text))
+        })
+
+    total_pages = max((total_posts + POSTS_PER_PAGE - 1) // POSTS_PER_PAGE, page_num + 1)
 
     message_text = f"📝 *Blog Posts* \\(Page {page_num + 1}/{total_pages}\\):\n\n"
     keyboard_buttons = []
@@ -906,7 +917,7 @@ async def display_readonly_posts_page(update: Update, context: ContextTypes.DEFA
     pagination_row = []
     if page_num > 0:
         pagination_row.append(InlineKeyboardButton("⬅️ Previous", callback_data=f"readonly_list_page:{page_num - 1}"))
-    if page_num < total_pages - 1:
+    if has_next:
         pagination_row.append(InlineKeyboardButton("➡️ Next", callback_data=f"readonly_list_page:{page_num + 1}"))
 
     if pagination_row:
@@ -950,13 +961,7 @@ async def handle_readonly_pagination_callback(update: Update, context: ContextTy
         await start_command(update, context)
         return
 
-    context.user_data['current_page_num'] = page_num
-    if 'paginated_posts_cache' not in context.user_data:
-        logger.info("paginated_posts_cache missing in handle_readonly_pagination_callback. Re-initializing readonly list from page 0.")
-        context.user_data.pop('paginated_posts_cache', None)
-        await display_readonly_posts_page(update, context, page_num=0)
-        return
-
+    # Without page keys in the session (e.g. after a restart) load_post_page() starts over at page 0
     await display_readonly_posts_page(update, context, page_num)
 
 # --- Edit and Delete Action Handlers (Post-Selection) ---
@@ -993,7 +998,7 @@ async def handle_do_edit_post_init_callback(update: Update, context: ContextType
 
     context.user_data.pop('selected_post_uuid', None)
     context.user_data.pop('selected_post_full_data', None)
-    context.user_data.pop('paginated_posts_cache', None)
+    context.user_data.pop('post_page_keys', None)
     context.user_data.pop('current_page_num', None)
     context.user_data.pop('current_action_type', None)
 
@@ -1120,11 +1125,22 @@ async def receive_new_field_value(update: Update, context: ContextTypes.DEFAULT_
         await start_command(update, context)
         return ConversationHandler.END
 
-    # Update the field
-    post_to_update[field_to_edit] = new_value
-    all_posts[post_index] = post_to_update
+    # Update the field on the current file contents, keeping changes made meanwhile by the web app
+    def apply_field(posts):
+        for post in posts:
+            if post.get('id') == post_id:
+                post[field_to_edit] = new_value
+                post_to_update.update(post)
+                return True
+        return False
 
-    if save_blog_posts(all_posts):
+    saved, found = update_blog_posts(apply_field)
+    if saved and not found:
+        logger.error(f"receive_new_field_value: Post with ID {post_id} was deleted before the update was saved.")
+        await update.message.reply_text(escape_markdown_v2("Error: The post you were editing has been deleted. Please start over."), parse_mode='MarkdownV2')
+        await start_command(update, context)
+        return ConversationHandler.END
+    if saved:
         user_friendly_field_name = field_to_edit.replace('_', ' ').capitalize()
         raw_success_message = f"Successfully updated the {user_friendly_field_name} of the post!"
         escaped_success_message = escape_markdown_v2(raw_success_message)
@@ -1224,8 +1240,9 @@ async def handle_do_delete_post_confirm_callback(update: Update, context: Contex
     escaped_post_uuid = escape_markdown_v2(str(post_uuid))
 
     if post_index_to_delete != -1:
-        del posts[post_index_to_delete]
-        if save_blog_posts(posts):
+        def remove_post(all_posts):
+            all_posts[:] = [p for p in all_posts if p.get('id') != post_uuid]
+        if update_blog_posts(remove_post)[0]:
             escaped_deleted_post_title = escape_markdown_v2(str(deleted_post_title_val))
             message_to_user = f"Post '*{escaped_deleted_post_title}*' \\(ID: `{escaped_post_uuid}`\\) has been deleted\\."
             logger.info(f"Post {post_uuid} deleted by {query.from_user.id}")
@@ -1239,7 +1256,7 @@ async def handle_do_delete_post_confirm_callback(update: Update, context: Contex
 
     context.user_data.pop('selected_post_uuid', None)
     context.user_data.pop('selected_post_full_data', None)
-    context.user_data.pop('paginated_posts_cache', None)
+    context.user_data.pop('post_page_keys', None)
     context.user_data.pop('current_page_num', None)
     context.user_data.pop('current_action_type', None)
 
@@ -1261,6 +1278,8 @@ async def main() -> None:
         return
     if not BLOG_ADMIN_CHAT_ID:
         logger.warning("WARNING: BLOG_ADMIN_CHAT_ID not found. Bot will be usable by anyone.")
+    if not derivatives_available():
+        logger.warning("WARNING: Pillow is not installed. Uploaded photos keep their EXIF data and get no resized copies.")
 
     application = (
         ApplicationBuilder()
@@ -1362,6 +1381,7 @@ async def main() -> None:
         else:
              logger.info("Application already stopped or stopping.")
 
+        reset_docx_executor()
         logger.info("Bot shutdown process complete.")
 
 if __name__ == '__main__':
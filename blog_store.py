@@ -0,0 +1,196 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timezone
+from types import MappingProxyType
+from collections import OrderedDict
+
+from cursor_pagination import keyset_range
+
+logger = logging.getLogger(__name__)
+
+NEGATIVE_CACHE_SIZE = 10000
+
+# Admin/job bookkeeping that is kept in blog_posts.json but never served publicly
+INTERNAL_POST_FIELDS = ('content_conversion_id', 'content_conversion_error', 'published')
+
+
+def is_published(post) -> bool:
+    """False for posts created from a .docx whose background conversion has not succeeded yet."""
+    return post.get('published', True) is not False
+
+
+def public_post(post) -> dict:
+    """Copy of a post for the API, the post page and the static export, without internal fields."""
+    return {key: value for key, value in post.items() if key not in INTERNAL_POST_FIELDS}
+
+
+def post_sort_key(post) -> tuple:
+    """(date_published, id): the order of post lists and the key their page cursors hold."""
+    return (str(post.get('date_published') or ''), str(post.get('id') or ''))
+
+
+class BlogSnapshot:
+    """Immutable view of blog_posts.json at one point in time.
+
+    Posts are read-only mappings; callers that want to modify a post must copy it (dict(post)).
+    Anything derived from the posts (sorted order, serialized API pages) is cached on the
+    snapshot, so it is rebuilt exactly once per data version. `sorted_posts` has every post
+    (admin views); `public_posts` only the published ones, and paging works on those.
+    Pages are addressed by post_sort_key() cursors (see keyset_range()).
+    """
+
+    __slots__ = ('version', 'signature', 'posts', 'by_id', 'sorted_posts', 'public_posts', '_payloads')
+
+    def __init__(self, version: str, signature, posts: list):
+        self.version = version  # Content hash of the file, changes whenever any post changes
+        self.signature = signature
+        self.posts = tuple(MappingProxyType(post) for post in posts if isinstance(post, dict))
+        self.by_id = MappingProxyType({post.get('id'): post for post in self.posts})
+        try:
+            # Newest first; date_published is an ISO string so it sorts lexicographically, the id breaks ties
+            self.sorted_posts = tuple(sorted(self.posts, key=post_sort_key, reverse=True))
+        except Exception as e:
+            logger.error(f"Error sorting blog posts: {e}")
+            self.sorted_posts = self.posts
+        self.public_posts = tuple(post for post in self.sorted_posts if is_published(post))
+        self._payloads = {}
+
+    def get(self, post_id: str):
+        return self.by_id.get(post_id)
+
+    def page(self, page: int, per_page: int) -> tuple:
+        start_index = (page - 1) * per_page
+        return self.public_posts[start_index:start_index + per_page]
+
+    def total_pages(self, per_page: int) -> int:
+        return (len(self.public_posts) + per_page - 1) // per_page
+
+    def keyset_range(self, key, per_page: int, direction: str = 'after', public: bool = True) -> tuple[int, int]:
+        """[start, end) in public_posts (or sorted_posts) of the page addressed by the sort key `key`."""
+        posts = self.public_posts if public else self.sorted_posts
+        # Sort keys oldest first, built once per snapshot and bisected per request
+        keys = self.cached_payload(('sort_keys', public), lambda: [post_sort_key(post) for post in reversed(posts)])
+        if key is not None:
+            key = tuple(str(part) for part in key)
+        return keyset_range(keys, key, per_page, direction)
+
+    @property
+    def last_modified(self) -> datetime | None:
+        """mtime of blog_posts.json for this snapshot (used for Last-Modified headers)."""
+        if self.signature is None:
+            return None
+        return datetime.fromtimestamp(self.signature[0] / 1e9, tz=timezone.utc).replace(microsecond=0)
+
+    def post_etag(self, post_id: str) -> str | None:
+        """Content hash of one post's public fields, so its ETag survives edits to other posts."""
+        post = self.by_id.get(post_id)
+        if post is None:
+            return None
+        return self.cached_payload(
+            ('post_etag', post_id),
+            lambda: hashlib.sha256(json.dumps(public_post(post), sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:32]
+        )
+
+    def cached_payload(self, key, build):
+        """Returns the value built by `build()` for `key`, computing it once per snapshot."""
+        payload = self._payloads.get(key)
+        if payload is None:
+            payload = self._payloads.setdefault(key, build())
+        return payload
+
+
+class BlogPostCache:
+    """Process-level cache of blog_posts.json, revalidated by (mtime, size, inode) on every access.
+
+    Only one thread re-parses the file when it changes; the others wait for and share its result.
+    Lookups of unknown post IDs are remembered per version so crawler traffic stays cheap.
+    """
+
+    def __init__(self, path: str, negative_cache_size: int = NEGATIVE_CACHE_SIZE):
+        self.path = path
+        self.negative_cache_size = negative_cache_size
+        self._snapshot = None
+        self._reload_lock = threading.Lock()
+        self._negative_lock = threading.Lock()
+        self._missing_ids = OrderedDict()
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _parse(self, signature) -> BlogSnapshot:
+        if signature is None:
+            logger.info(f"{self.path} not found. Returning empty list.")
+            return BlogSnapshot('empty', signature, [])
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except IOError as e:
+            logger.error(f"IOError reading {self.path}: {e}. Returning empty list.", exc_info=True)
+            return BlogSnapshot('empty', signature, [])
+        version = hashlib.sha256(raw).hexdigest()[:32]
+        if not raw.strip():
+            logger.info(f"{self.path} is empty. Returning empty list.")
+            return BlogSnapshot(version, signature, [])
+        try:
+            posts_data = json.loads(raw.decode('utf-8'))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            logger.error(f"Error decoding JSON from {self.path}. Returning empty list.", exc_info=True)
+            return BlogSnapshot(version, signature, [])
+        if not isinstance(posts_data, list):
+            logger.warning(f"Data in {self.path} is not a list. Returning empty list.")
+            return BlogSnapshot(version, signature, [])
+        return BlogSnapshot(version, signature, posts_data)
+
+    def snapshot(self) -> BlogSnapshot:
+        """Returns the current snapshot, re-parsing the file only if it changed on disk."""
+        signature = self._file_signature()
+        current = self._snapshot
+        if current is not None and current.signature == signature:
+            return current
+        with self._reload_lock:
+            # Another thread may have reloaded while we waited (single-flight).
+            current = self._snapshot
+            signature = self._file_signature()
+            if current is None or current.signature != signature:
+                current = self._parse(signature)
+                self._snapshot = current
+                with self._negative_lock:
+                    self._missing_ids.clear()
+            return current
+
+    def get_post(self, post_id: str, snapshot: BlogSnapshot | None = None):
+        """Returns the read-only published post with `post_id`, or None (public lookups).
+
+        Pass `snapshot` to look the post up in a snapshot the caller already holds.
+        """
+        snapshot = snapshot or self.snapshot()
+        with self._negative_lock:
+            if self._missing_ids.get(post_id) == snapshot.version:
+                return None
+        post = snapshot.get(post_id)
+        if post is not None and not is_published(post):
+            post = None
+        if post is None:
+            with self._negative_lock:
+                self._missing_ids[post_id] = snapshot.version
+                self._missing_ids.move_to_end(post_id)
+                while len(self._missing_ids) > self.negative_cache_size:
+                    self._missing_ids.popitem(last=False)
+        return post
+
+    def load_posts(self) -> list:
+        """Mutable copy of all posts for callers that edit and save the list."""
+        return [dict(post) for post in self.snapshot().posts]
+
+    def invalidate(self):
+        with self._reload_lock:
+            self._snapshot = None
+        with self._negative_lock:
+            self._missing_ids.clear()
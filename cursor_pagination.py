@@ -0,0 +1,49 @@
+import json
+import base64
+import binascii
+from bisect import bisect_left, bisect_right
+
+# Keyset ("cursor") pagination shared by the blog API, the HR admin list and both bots. Lists are
+# ordered newest first by a (timestamp, id) sort key; a page is addressed by the key of a row next to
+# it instead of by an offset, so any page is one index seek and pages do not shift when rows are
+# added in front of them.
+#   after  - rows strictly after the key (the page that follows a page ending at the key)
+#   from   - rows from the key on (re-reading a page that started at the key)
+#   before - rows strictly before the key, nearest first (the page that precedes a page starting at the key)
+CURSOR_DIRECTIONS = ('after', 'from', 'before')
+
+
+def encode_cursor(key) -> str:
+    """Opaque URL-safe token for a (timestamp, id) sort key."""
+    raw = json.dumps(list(key), separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str | None) -> tuple | None:
+    """Sort key of a token from encode_cursor(), None for no token. Raises ValueError for anything else."""
+    if not token:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, binascii.Error) as e:
+        raise ValueError(f"Invalid cursor: {e}") from None
+    if (not isinstance(key, list) or len(key) != 2 or not isinstance(key[0], str)
+            or not isinstance(key[1], (str, int)) or isinstance(key[1], bool)):
+        raise ValueError("Invalid cursor")
+    return tuple(key)
+
+
+def keyset_range(keys_ascending, key, limit: int, direction: str = 'after') -> tuple[int, int]:
+    """[start, end) of the page addressed by `key` in a newest-first list whose sort keys, oldest first, are `keys_ascending`.
+
+    Two binary searches instead of counting rows, so the last page costs the same as the first.
+    No key means the first page.
+    """
+    n = len(keys_ascending)
+    if key is None:
+        return 0, min(n, limit)
+    if direction == 'before':
+        end = n - bisect_right(keys_ascending, key)
+        return max(0, end - limit), end
+    start = n - (bisect_right(keys_ascending, key) if direction == 'from' else bisect_left(keys_ascending, key))
+    return start, min(n, start + limit)
@@ -0,0 +1,119 @@
+import os
+import time
+import logging
+import stat as stat_module
+import mimetypes
+import threading
+from urllib.parse import quote
+
+from flask import Response
+from werkzeug.http import http_date
+from werkzeug.wsgi import wrap_file
+
+from blob_store import BLOB_NAME_RE
+
+logger = logging.getLogger(__name__)
+
+# How CVs reach the browser once the admin is authorized:
+#   direct           - the app sends the file itself (wsgi.file_wrapper, i.e. sendfile() under Gunicorn/uWSGI)
+#   x-accel-redirect - nginx sends it from an `internal` location (CV_ACCEL_REDIRECT_PREFIX -> CV_ACCEL_REDIRECT_ROOT)
+#   x-sendfile       - Apache mod_xsendfile / lighttpd send the absolute path
+CV_SEND_MODE = os.getenv('CV_SEND_MODE', 'direct').lower()
+CV_ACCEL_REDIRECT_PREFIX = os.getenv('CV_ACCEL_REDIRECT_PREFIX', '/protected-cvs/')
+CV_ACCEL_REDIRECT_ROOT = os.path.abspath(os.getenv('CV_ACCEL_REDIRECT_ROOT', 'uploads')) # Holds uploads/blobs and legacy uploads/<ms>-<name>
+CV_STAT_CACHE_SECONDS = float(os.getenv('CV_STAT_CACHE_SECONDS', '60'))
+STAT_CACHE_MAX_ENTRIES = 4096
+
+if CV_SEND_MODE not in ('direct', 'x-accel-redirect', 'x-sendfile'):
+    logger.warning(f"Unknown CV_SEND_MODE '{CV_SEND_MODE}', sending CVs directly")
+    CV_SEND_MODE = 'direct'
+
+
+class StatCache:
+    """Short-lived cache of os.stat() results (None for missing files).
+
+    CV files never change once written (blobs are content-addressed, legacy uploads were
+    written once), so size and mtime can be reused across downloads. A file deleted within the
+    TTL fails when it is opened instead.
+    """
+
+    def __init__(self, ttl_seconds: float = CV_STAT_CACHE_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def stat(self, path: str) -> os.stat_result | None:
+        now = time.monotonic()
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        try:
+            result = os.stat(path)
+        except FileNotFoundError:
+            result = None
+        with self._lock:
+            if len(self._entries) >= STAT_CACHE_MAX_ENTRIES:
+                self._entries.clear()
+            self._entries[path] = (now + self.ttl_seconds, result)
+        return result
+
+    def forget(self, path: str):
+        with self._lock:
+            self._entries.pop(path, None)
+
+
+cv_stat_cache = StatCache()
+
+
+def file_etag(path: str, stat: os.stat_result) -> str:
+    """A blob's name is the SHA-256 of its content, a strong ETag; other files use mtime and size."""
+    name = os.path.basename(path)
+    if BLOB_NAME_RE.match(name):
+        return name.split('.', 1)[0]
+    return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+
+
+def _attachment(response: Response, path: str, download_name: str):
+    response.headers['Content-Type'] = mimetypes.guess_type(download_name)[0] or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    # RFC 6266: plain ASCII name plus the UTF-8 original for non-ASCII file names
+    ascii_name = download_name.encode('ascii', 'ignore').decode('ascii').replace('"', '') or 'cv'
+    response.headers['Content-Disposition'] = f"attachment; filename=\"{ascii_name}\"; filename*=UTF-8''{quote(download_name)}"
+    response.headers['Cache-Control'] = 'private, no-cache' # Behind the login: revalidate, never stored by shared caches
+
+
+def send_cv(request, path: str, download_name: str) -> Response | None:
+    """Response that downloads the CV at `path` (in CV_SEND_MODE), or None if the file does not exist.
+
+    Direct mode answers Range and If-None-Match/If-Modified-Since requests from the cached stat and
+    hands the open file to the server's wsgi.file_wrapper. The offload modes send only headers; the
+    front proxy does the transfer (and its own Range handling).
+    """
+    path = os.path.abspath(path)
+    stat = cv_stat_cache.stat(path)
+    if stat is None or not stat_module.S_ISREG(stat.st_mode):
+        return None
+
+    if CV_SEND_MODE == 'x-accel-redirect' and os.path.commonpath([path, CV_ACCEL_REDIRECT_ROOT]) == CV_ACCEL_REDIRECT_ROOT:
+        response = Response()
+        response.headers['X-Accel-Redirect'] = CV_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + quote(os.path.relpath(path, CV_ACCEL_REDIRECT_ROOT).replace(os.sep, '/'))
+        _attachment(response, path, download_name)
+        return response
+    if CV_SEND_MODE == 'x-sendfile':
+        response = Response()
+        response.headers['X-Sendfile'] = path
+        _attachment(response, path, download_name)
+        return response
+    if CV_SEND_MODE == 'x-accel-redirect':
+        logger.warning(f"CV {path} is outside CV_ACCEL_REDIRECT_ROOT, sending it directly")
+
+    try:
+        f = open(path, 'rb')
+    except FileNotFoundError:
+        cv_stat_cache.forget(path)
+        return None
+    response = Response(wrap_file(request.environ, f), direct_passthrough=True)
+    _attachment(response, path, download_name)
+    response.content_length = stat.st_size
+    response.headers['Last-Modified'] = http_date(stat.st_mtime)
+    response.set_etag(file_etag(path, stat))
+    return response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
@@ -0,0 +1,281 @@
+import os
+import re
+import time
+import logging
+import secrets
+import sqlite3
+import threading
+
+from flask import Request
+from werkzeug.exceptions import HTTPException
+
+from blob_store import cv_blobs
+
+logger = logging.getLogger(__name__)
+
+CV_MAX_BYTES = int(os.getenv('CV_MAX_BYTES', str(10 * 1024 * 1024)))
+# Resumable uploads (/api/cv-uploads): largest chunk per PUT, and how long an unfinished upload can be resumed
+CV_UPLOAD_CHUNK_BYTES = int(os.getenv('CV_UPLOAD_CHUNK_BYTES', str(1024 * 1024)))
+CV_UPLOAD_SESSION_TTL_SECONDS = int(os.getenv('CV_UPLOAD_SESSION_TTL_SECONDS', str(24 * 3600)))
+# Endpoints whose file fields are CVs, streamed straight into the CV blob store while the form is parsed
+CV_UPLOAD_ENDPOINTS = {'submit_application'}
+
+# Leading bytes of each allowed CV format; the extension must match what the file really is
+CV_MAGIC_NUMBERS = {
+    'pdf': (b'%PDF-',),
+    'doc': (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',),  # OLE compound document (Word 97-2003)
+    'docx': (b'PK\x03\x04',),  # ZIP container (Office Open XML)
+}
+SNIFF_BYTES = max(len(magic) for magics in CV_MAGIC_NUMBERS.values() for magic in magics)
+
+
+class CVUploadRejected(HTTPException):
+    """Raised while the request body is parsed, so a bad CV is refused before the rest is stored."""
+    code = 400
+
+
+def cv_extension(filename: str | None) -> str | None:
+    extension = filename.rsplit('.', 1)[1].lower() if filename and '.' in filename else None
+    return extension if extension in CV_MAGIC_NUMBERS else None
+
+
+def _sniffer(extension: str):
+    def sniff(head: bytes):
+        if not head.startswith(CV_MAGIC_NUMBERS[extension]):
+            raise CVUploadRejected(f"Validation Error: The CV is not a valid .{extension} file.")
+    return sniff
+
+
+class _CVWriter:
+    """Wraps a BlobWriter so size and type violations surface as CVUploadRejected."""
+
+    def __init__(self, writer, extension: str):
+        self.blob_writer = writer
+        self.extension = extension
+
+    def write(self, data: bytes) -> int:
+        try:
+            return self.blob_writer.write(data)
+        except ValueError:
+            raise CVUploadRejected(f"Validation Error: The CV is larger than {CV_MAX_BYTES / (1024 * 1024):g} MB.")
+
+    def __getattr__(self, name):
+        return getattr(self.blob_writer, name)
+
+
+class StreamingUploadRequest(Request):
+    """Request class that writes CV uploads directly into the CV blob store.
+
+    Werkzeug normally spools each uploaded file to memory or a temp file, and the view copies it
+    again. For CV_UPLOAD_ENDPOINTS every chunk goes straight to a temp file inside the blob store
+    while it is hashed and its magic bytes are checked. An oversized or mistyped file aborts the
+    parse right there, and memory per upload stays constant. The view finishes the upload with
+    cv_blobs.commit_writer(cv_file.stream.blob_writer, ...). Uncommitted files are removed when
+    the request closes.
+    """
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint not in CV_UPLOAD_ENDPOINTS or not filename:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        extension = cv_extension(filename)
+        if extension is None:
+            raise CVUploadRejected("Validation Error: Invalid CV file type. Allowed: pdf, doc, docx.")
+        writer = cv_blobs.writer(max_bytes=CV_MAX_BYTES, sniff=_sniffer(extension), sniff_bytes=SNIFF_BYTES)
+        return _CVWriter(writer, extension)
+
+
+def find_cv_blob(sha256: str | None, filename: str | None) -> str | None:
+    """Blob name of an already stored CV with this SHA-256 and the extension of `filename`, or None.
+
+    Lets a candidate who applies again with the same file skip the upload (career_form_handler.js
+    hashes it first). A found blob is touched, so GC leaves it alone until the application references it.
+    """
+    extension = cv_extension(filename)
+    sha256 = (sha256 or '').lower()
+    if extension is None or not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        return None
+    blob_name = f"{sha256}.{extension}"
+    return blob_name if cv_blobs.touch(blob_name) else None
+
+
+def store_uploaded_cv(file_storage) -> str:
+    """Commits an uploaded CV to the CV blob store and returns its blob name (not referenced yet)."""
+    stream = file_storage.stream
+    if isinstance(stream, _CVWriter):
+        return cv_blobs.commit_writer(stream.blob_writer, stream.extension) # Already on disk, hashed and sniffed
+    # Parsed by a plain Request (e.g. a test client bypassing StreamingUploadRequest): copy it with the same limits
+    extension = cv_extension(file_storage.filename)
+    writer = cv_blobs.writer(max_bytes=CV_MAX_BYTES, sniff=_sniffer(extension), sniff_bytes=SNIFF_BYTES)
+    return cv_blobs.commit_writer(_copy_into(stream, _CVWriter(writer, extension)), extension)
+
+
+def _copy_into(stream, cv_writer: _CVWriter):
+    try:
+        while True:
+            chunk = stream.read(64 * 1024)
+            if not chunk:
+                return cv_writer.blob_writer
+            cv_writer.write(chunk)
+    except Exception:
+        cv_writer.close()
+        raise
+
+
+UPLOAD_SESSION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cv_upload_sessions (
+    id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    received INTEGER NOT NULL DEFAULT 0,
+    blob TEXT,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class UploadSessionError(Exception):
+    """A resumable upload request that cannot be applied; `status` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400, offset: int | None = None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class CVUploadSessions:
+    """Resumable CV uploads: create a session, PUT chunks at increasing offsets, then submit the form with its id.
+
+    Each session's bytes go to <CV blob root>/tmp/<id>.part and its state (declared size, bytes received)
+    is a row in the CV store's refs.db, so any app process can take the next chunk and an upload can
+    continue after a dropped connection or a restart. A chunk is only appended at the offset the
+    server has; the client asks for it (status()) after a failure and carries on from there. The
+    first chunk is sniffed like a streamed upload; finalize() hashes the file and moves it into the
+    blob store. Unfinished sessions expire after CV_UPLOAD_SESSION_TTL_SECONDS; leftover parts are
+    removed by `python blob_store.py gc` like other temp files.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.tmp_dir = os.path.join(store.root, 'tmp')
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(self.store.root, exist_ok=True)
+            conn = sqlite3.connect(self.store.refs_db, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA busy_timeout=30000')
+            conn.executescript(UPLOAD_SESSION_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.tmp_dir, f"{upload_id}.part")
+
+    def _session(self, conn, upload_id: str) -> sqlite3.Row:
+        row = conn.execute("SELECT * FROM cv_upload_sessions WHERE id = ? AND expires_at > ?", (upload_id, time.time())).fetchone()
+        if row is None:
+            raise UploadSessionError("This upload has expired or does not exist. Please upload your CV again.", 404)
+        return row
+
+    def create(self, filename: str | None, size: int) -> dict:
+        extension = cv_extension(filename)
+        if extension is None:
+            raise UploadSessionError("Validation Error: Invalid CV file type. Allowed: pdf, doc, docx.")
+        if size <= 0:
+            raise UploadSessionError("Validation Error: The CV file is empty.")
+        if size > CV_MAX_BYTES:
+            raise UploadSessionError(f"Validation Error: The CV is larger than {CV_MAX_BYTES / (1024 * 1024):g} MB.", 413)
+        self.purge_expired()
+        upload_id = secrets.token_urlsafe(24) # Also the capability to write to and submit the upload
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        open(self._part_path(upload_id), 'xb').close()
+        conn = self._connection()
+        with conn:
+            conn.execute("INSERT INTO cv_upload_sessions (id, filename, extension, size, expires_at) VALUES (?, ?, ?, ?, ?)",
+                         (upload_id, filename, extension, size, time.time() + CV_UPLOAD_SESSION_TTL_SECONDS))
+        logger.info(f"Started resumable CV upload {upload_id[:8]} ({size} bytes)")
+        return {'upload_id': upload_id, 'offset': 0, 'size': size, 'chunk_size': CV_UPLOAD_CHUNK_BYTES}
+
+    def status(self, upload_id: str) -> dict:
+        row = self._session(self._connection(), upload_id)
+        return {'upload_id': upload_id, 'offset': row['received'], 'size': row['size'],
+                'chunk_size': CV_UPLOAD_CHUNK_BYTES, 'complete': row['received'] == row['size']}
+
+    def write_chunk(self, upload_id: str, offset: int, data: bytes) -> int:
+        """Appends `data` at `offset`, which must be the number of bytes received so far; returns the new offset.
+
+        The chunk is already in memory (at most CV_UPLOAD_CHUNK_BYTES), so the write lock is only held
+        for the disk write; two clients racing on the same offset cannot both append.
+        """
+        if len(data) > CV_UPLOAD_CHUNK_BYTES:
+            raise UploadSessionError(f"Chunks may be at most {CV_UPLOAD_CHUNK_BYTES} bytes.", 413)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = self._session(conn, upload_id)
+            if row['blob'] is not None or offset != row['received']:
+                raise UploadSessionError("Offset does not match the bytes received.", 409, offset=row['received'])
+            if offset + len(data) > row['size']:
+                raise UploadSessionError("The chunk goes past the declared file size.", 413, offset=row['received'])
+            if offset == 0 and len(data) >= min(SNIFF_BYTES, row['size']):
+                _sniffer(row['extension'])(data[:SNIFF_BYTES])
+            with open(self._part_path(upload_id), 'r+b') as f:
+                f.truncate(offset) # Drops the tail of a chunk whose write was interrupted
+                f.seek(offset)
+                f.write(data)
+            conn.execute("UPDATE cv_upload_sessions SET received = ?, expires_at = ? WHERE id = ?",
+                         (offset + len(data), time.time() + CV_UPLOAD_SESSION_TTL_SECONDS, upload_id))
+        return offset + len(data)
+
+    def finalize(self, upload_id: str) -> tuple:
+        """Moves a complete upload into the CV blob store; returns (blob name, original filename).
+
+        The blob is not referenced yet (see store_uploaded_cv()). The session keeps the blob name
+        until it expires, so submitting the form again after a lost response finds the same blob.
+        """
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = self._session(conn, upload_id)
+            if row['blob'] is not None:
+                return row['blob'], row['filename']
+            if row['received'] != row['size']:
+                raise UploadSessionError("The CV upload is not complete yet.", 409, offset=row['received'])
+            # Claimed under the lock; hashing and the blob store's own transaction happen outside it
+            path = f"{self._part_path(upload_id)}.{secrets.token_hex(4)}.finalizing"
+            try:
+                os.replace(self._part_path(upload_id), path)
+            except FileNotFoundError:
+                raise UploadSessionError("The CV upload is being finished by another request. Please try again.", 409)
+        try:
+            with open(path, 'rb') as f:
+                _sniffer(row['extension'])(f.read(SNIFF_BYTES)) # Files shorter than a magic number
+            blob_name = self.store.commit_file(path, row['extension'])
+        except Exception:
+            if os.path.exists(path):
+                os.remove(path)
+            with conn:
+                conn.execute("DELETE FROM cv_upload_sessions WHERE id = ?", (upload_id,)) # Its bytes are gone
+            raise
+        with conn:
+            conn.execute("UPDATE cv_upload_sessions SET blob = ? WHERE id = ?", (blob_name, upload_id))
+        logger.info(f"Finished resumable CV upload {upload_id[:8]} as blob {blob_name}")
+        return blob_name, row['filename']
+
+    def purge_expired(self) -> int:
+        conn = self._connection()
+        with conn:
+            expired = [row['id'] for row in conn.execute("SELECT id FROM cv_upload_sessions WHERE expires_at <= ?", (time.time(),))]
+            for upload_id in expired:
+                conn.execute("DELETE FROM cv_upload_sessions WHERE id = ?", (upload_id,))
+                try:
+                    os.remove(self._part_path(upload_id))
+                except FileNotFoundError:
+                    pass # Finalized, or already collected
+        return len(expired)
+
+
+cv_upload_sessions = CVUploadSessions(cv_blobs)
@@ -0,0 +1,149 @@
+import io
+import os
+import json
+import hashlib
+import logging
+import mimetypes
+from importlib import metadata
+
+import mammoth
+
+from json_store import FileLock, atomic_write_json
+from blob_store import image_blobs
+
+logger = logging.getLogger(__name__)
+
+DOCX_CACHE_DIR = os.getenv('DOCX_CACHE_DIR', 'docx_cache')
+DOCX_CACHE_MAX_BYTES = int(os.getenv('DOCX_CACHE_MAX_BYTES', str(256 * 1024 * 1024)))
+
+# Bump when the conversion options change, so older cached HTML is not reused
+CONVERSION_FORMAT = '3'  # 2: embedded images extracted to files instead of data: URIs; 3: images in the blob store
+try:
+    MAMMOTH_VERSION = metadata.version('mammoth')
+except metadata.PackageNotFoundError:
+    MAMMOTH_VERSION = 'unknown'
+
+
+class DocxConversionCache:
+    """Disk cache of converted .docx documents, shared by app.py, blog_bot.py and their workers.
+
+    Keyed by SHA-256 of the document bytes plus the mammoth version. Each entry is one JSON
+    file ({'html', 'messages', 'images'}); a hit refreshes its mtime, and once the directory grows past
+    `max_bytes` the least recently used entries are removed.
+    """
+
+    def __init__(self, cache_dir: str = DOCX_CACHE_DIR, max_bytes: int = DOCX_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def key(self, docx_bytes: bytes) -> str:
+        digest = hashlib.sha256(docx_bytes).hexdigest()
+        return hashlib.sha256(f"{digest}:{MAMMOTH_VERSION}:{CONVERSION_FORMAT}".encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> dict | None:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path) # Mark as recently used
+        except FileNotFoundError:
+            return None
+        except (IOError, OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable .docx cache entry {path}: {e}")
+            return None
+        if not isinstance(entry, dict) or 'html' not in entry:
+            return None
+        # The HTML points at extracted image files; if any were deleted, convert again
+        for blob_name in entry.get('images', []):
+            if not image_blobs.exists(blob_name):
+                return None
+        return entry
+
+    def lookup(self, docx_bytes: bytes) -> dict | None:
+        return self.get(self.key(docx_bytes))
+
+    def put(self, key: str, result: dict):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            entry = {'html': result['html'], 'messages': result['messages'], 'images': result.get('images', [])}
+            atomic_write_json(self._path(key), entry, fsync=False)
+            self._evict()
+        except (IOError, OSError) as e:
+            logger.error(f"Error writing .docx cache entry {key}: {e}", exc_info=True)
+
+    def _evict(self):
+        with FileLock(os.path.join(self.cache_dir, 'cache')):
+            entries, total = [], 0
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if entry.name.endswith('.json') and entry.is_file():
+                        st = entry.stat()
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+                        total += st.st_size
+            if total <= self.max_bytes:
+                return
+            # Evict down to 90% so the next writes do not evict again right away
+            entries.sort()
+            target = self.max_bytes * 0.9
+            removed = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+            logger.info(f"Evicted {removed} entries from the .docx cache ({total} bytes left).")
+
+
+docx_cache = DocxConversionCache()
+
+
+def _image_extractor(saved_images: list):
+    """mammoth image handler: writes embedded images to the image blob store and links them by URL.
+
+    The blobs are not referenced by anything yet; the post that ends up using the HTML takes
+    the references when it is saved (see sync_post_blob_refs in app.py).
+    """
+    def convert_image(image):
+        with image.open() as image_stream:
+            blob_name = image_blobs.put_stream(image_stream, mimetypes.guess_extension(image.content_type or '') or '.bin')
+        if blob_name not in saved_images:
+            saved_images.append(blob_name)
+        return {'src': image_blobs.blob_url(blob_name)}
+    return mammoth.images.img_element(convert_image)
+
+
+def convert_docx_bytes(docx_bytes: bytes) -> dict:
+    """Converts a .docx document held in memory to HTML with mammoth, through the disk cache.
+
+    Kept free of Flask/bot imports so it can run in a worker process.
+    Embedded images are written to the image blob store instead of being inlined as data: URIs.
+    Returns {'html': ..., 'messages': [...], 'images': [...]} with mammoth's warnings as
+    strings and the blob names the HTML refers to.
+    """
+    key = docx_cache.key(docx_bytes)
+    cached = docx_cache.get(key)
+    if cached is not None:
+        return cached
+    saved_images = []
+    result = mammoth.convert_to_html(io.BytesIO(docx_bytes), convert_image=_image_extractor(saved_images))
+    converted = {'html': result.value, 'messages': [str(message) for message in result.messages], 'images': saved_images}
+    docx_cache.put(key, converted)
+    return converted
+
+
+def convert_docx_file(docx_path: str) -> dict:
+    """Same as convert_docx_bytes() for a document on disk."""
+    with open(docx_path, 'rb') as docx_file:
+        return convert_docx_bytes(docx_file.read())
+
+
+def convert_docx_job(payload: dict) -> dict:
+    """Job queue entry point (process executor): converts payload['docx_path']."""
+    return convert_docx_file(payload['docx_path'])
@@ -0,0 +1,186 @@
+import os
+import json
+import hashlib
+import logging
+import argparse
+from datetime import datetime, timezone
+
+from flask import url_for
+
+# Rendering through the test client must not start the app's background job workers
+os.environ.setdefault('JOB_WORKERS_IN_APP', 'False')
+
+from app import app, blog_posts_cache
+from blog_store import post_sort_key
+from cursor_pagination import encode_cursor
+from json_store import atomic_write_json
+from page_cache import compress_variants
+
+logger = logging.getLogger(__name__)
+
+FREEZE_OUTPUT_DIR = os.getenv('FREEZE_OUTPUT_DIR', 'build')
+MANIFEST_FILE = 'manifest.json'
+API_POSTS_PER_PAGE = 3  # Must match POSTS_PER_PAGE in app.get_blog_posts
+
+# Request-independent public pages, exported as <path>/index.html
+PUBLIC_PAGE_ENDPOINTS = (
+    'index', 'about', 'careers',
+    'careers_business_analyst', 'careers_custom_projects_coordinator', 'careers_full_stack_developer',
+    'careers_ui_ux_designer', 'careers_virtual_assistant',
+    'contact', 'services', 'service_bpo', 'service_request', 'service_software_development',
+    'service_virtual_assistance', 'privacy_policy', 'terms_of_service',
+)
+
+COMPRESSED_SUFFIXES = {'gzip': '.gz', 'br': '.br'}
+
+
+def _template_mtime(template_name: str) -> int:
+    try:
+        return os.stat(os.path.join(app.root_path, app.template_folder, template_name)).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def _page_output_path(url_path: str) -> str:
+    url_path = url_path.strip('/')
+    return os.path.join(url_path, 'index.html') if url_path else 'index.html'
+
+
+def _write_bytes(path: str, data: bytes):
+    """Temp file + rename so nginx never serves a half-written file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+def _remove_output(output_dir: str, rel_path: str):
+    for suffix in ('',) + tuple(COMPRESSED_SUFFIXES.values()):
+        try:
+            os.remove(os.path.join(output_dir, rel_path + suffix))
+        except FileNotFoundError:
+            pass
+
+
+def load_manifest(output_dir: str) -> dict:
+    try:
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (IOError, json.JSONDecodeError):
+        return {}
+
+
+class Freezer:
+    """Renders the public site into `output_dir` through the Flask test client.
+
+    Each output file is recorded in manifest.json with a source key (post content hash plus
+    template mtime, or the blog data version). Outputs whose source key is unchanged since
+    the last run are not re-rendered; re-rendered outputs whose bytes did not change are not
+    rewritten, so file mtimes (and nginx/CDN caches) stay stable.
+    """
+
+    def __init__(self, output_dir: str = FREEZE_OUTPUT_DIR, force: bool = False):
+        self.output_dir = output_dir
+        self.force = force
+        self.previous = load_manifest(output_dir).get('files', {})
+        self.files = {}
+        self.stats = {'rendered': 0, 'written': 0, 'skipped': 0, 'removed': 0, 'failed': 0}
+        self.client = app.test_client()
+
+    def _is_current(self, rel_path: str, source: str | None) -> bool:
+        entry = self.previous.get(rel_path)
+        return (not self.force and source is not None and entry is not None and entry.get('source') == source
+                and os.path.exists(os.path.join(self.output_dir, rel_path)))
+
+    def export(self, url: str, rel_path: str, source: str | None):
+        if self._is_current(rel_path, source):
+            self.files[rel_path] = self.previous[rel_path]
+            self.stats['skipped'] += 1
+            return
+
+        response = self.client.get(url)
+        if response.status_code != 200:
+            logger.warning(f"Skipping {url}: HTTP {response.status_code}")
+            self.stats['failed'] += 1
+            return
+        body = response.get_data()
+        self.stats['rendered'] += 1
+        digest = hashlib.sha256(body).hexdigest()
+        variants = compress_variants(body)
+
+        entry = self.previous.get(rel_path)
+        if self.force or entry is None or entry.get('sha256') != digest or not os.path.exists(os.path.join(self.output_dir, rel_path)):
+            target = os.path.join(self.output_dir, rel_path)
+            _write_bytes(target, body)
+            for encoding, suffix in COMPRESSED_SUFFIXES.items():
+                if encoding in variants:
+                    _write_bytes(target + suffix, variants[encoding])
+            self.stats['written'] += 1
+
+        self.files[rel_path] = {
+            'url': url,
+            'source': source,
+            'sha256': digest,
+            'size': len(body),
+            'content_type': response.mimetype,
+            'encodings': sorted(variants),
+        }
+
+    def run(self) -> dict:
+        snapshot = blog_posts_cache.snapshot()
+
+        with app.test_request_context():
+            page_urls = [url_for(endpoint) for endpoint in PUBLIC_PAGE_ENDPOINTS]
+        for url in page_urls:
+            # Only a handful of pages: always re-rendered, but rewritten only if their bytes changed
+            self.export(url, _page_output_path(url), None)
+
+        post_template_mtime = _template_mtime('post.html')
+        for post in snapshot.public_posts:
+            post_id = post.get('id')
+            if not post_id:
+                continue
+            post_hash = snapshot.post_etag(post_id)
+            self.export(f"/post/{post_id}", os.path.join('post', post_id, 'index.html'), f"post:{post_hash}:{post_template_mtime}")
+            self.export(f"/api/blog-posts/{post_id}", os.path.join('api', 'blog-posts', f"{post_id}.json"), f"post:{post_hash}")
+
+        # Every listing page embeds totals, so all of them follow the blog data version
+        total_pages = max(snapshot.total_pages(API_POSTS_PER_PAGE), 1)
+        self.export("/api/blog-posts", os.path.join('api', 'blog-posts', 'index.json'), f"blog:{snapshot.version}")
+        for page in range(1, total_pages + 1):
+            self.export(f"/api/blog-posts?page={page}", os.path.join('api', 'blog-posts', 'page', f"{page}.json"), f"blog:{snapshot.version}")
+        # The cursors the listing hands out: ?cursor= (next page) and ?before= (previous page) at each page boundary
+        for boundary in range(API_POSTS_PER_PAGE, len(snapshot.public_posts), API_POSTS_PER_PAGE):
+            next_cursor = encode_cursor(post_sort_key(snapshot.public_posts[boundary - 1]))
+            prev_cursor = encode_cursor(post_sort_key(snapshot.public_posts[boundary]))
+            self.export(f"/api/blog-posts?cursor={next_cursor}", os.path.join('api', 'blog-posts', 'cursor', f"{next_cursor}.json"), f"blog:{snapshot.version}")
+            self.export(f"/api/blog-posts?before={prev_cursor}", os.path.join('api', 'blog-posts', 'before', f"{prev_cursor}.json"), f"blog:{snapshot.version}")
+
+        for rel_path in set(self.previous) - set(self.files):
+            _remove_output(self.output_dir, rel_path)
+            self.stats['removed'] += 1
+
+        manifest = {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'blog_data_version': snapshot.version,
+            'files': self.files,
+        }
+        os.makedirs(self.output_dir, exist_ok=True)
+        atomic_write_json(os.path.join(self.output_dir, MANIFEST_FILE), manifest, fsync=False)
+        logger.info(f"Froze site into {self.output_dir}: {self.stats}")
+        return manifest
+
+
+def freeze(output_dir: str = FREEZE_OUTPUT_DIR, force: bool = False) -> dict:
+    return Freezer(output_dir, force=force).run()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Pre-render the public site (pages, blog posts, blog API) to static files.")
+    parser.add_argument('--output', default=FREEZE_OUTPUT_DIR, help="Output directory (default: %(default)s)")
+    parser.add_argument('--force', action='store_true', help="Re-render and rewrite every file")
+    args = parser.parse_args()
+    freeze(args.output, force=args.force)
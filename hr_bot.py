@@ -11,6 +11,8 @@ if platform.system() == "Windows":
 
 from dotenv import load_dotenv
 import telegram
+from application_store import ApplicationStore, APPLICATION_DB_FILE
+from blob_store import application_cv_path # CVs are stored in the content-addressed blob store
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup, ReplyKeyboardRemove
 from telegram.ext import (
     Application,
@@ -28,7 +30,7 @@ HR_BOT_TOKEN = os.getenv('HR_BOT_TOKEN')
 HR_CHAT_ID = os.getenv('HR_CHAT_ID')
 
 APPLICATION_LOG_FILE = 'submitted_applications.log.json'
-UPLOAD_FOLDER = 'uploads/'
+application_store = ApplicationStore(APPLICATION_DB_FILE, legacy_log_file=APPLICATION_LOG_FILE) # Shared with app.py
 APPS_PER_PAGE = 3
 
 logging.basicConfig(
@@ -81,48 +83,19 @@ review_mode_keyboard = ReplyKeyboardMarkup(
 # --- End Keyboards ---
 
 # --- Helper Functions ---
-def load_applications() -> list:
-    if not os.path.exists(APPLICATION_LOG_FILE):
-        logger.info(f"{APPLICATION_LOG_FILE} not found. Returning empty list.")
-        return []
-    try:
-        with open(APPLICATION_LOG_FILE, 'r', encoding='utf-8') as f:
-            content = f.read()
-            if not content:
-                logger.info(f"{APPLICATION_LOG_FILE} is empty. Returning empty list.")
-                return []
-            applications_data = json.loads(content)
-            if not isinstance(applications_data, list):
-                logger.warning(f"Data in {APPLICATION_LOG_FILE} is not a list. Returning empty list.")
-                return []
-            return applications_data
-    except json.JSONDecodeError:
-        logger.error(f"Error decoding JSON from {APPLICATION_LOG_FILE}. Returning empty list.", exc_info=True)
-        return []
-    except IOError as e:
-        logger.error(f"IOError reading {APPLICATION_LOG_FILE}: {e}. Returning empty list.", exc_info=True)
-        return []
-
-def save_applications(applications_data: list) -> bool:
-    try:
-        with open(APPLICATION_LOG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(applications_data, f, indent=4, ensure_ascii=False)
-        logger.info(f"Successfully saved {len(applications_data)} applications to {APPLICATION_LOG_FILE}")
-        return True
-    except IOError as e:
-        logger.error(f"IOError writing to {APPLICATION_LOG_FILE}: {e}", exc_info=True)
-        return False
+def load_application_page(status: str | None, job_title: str | None, key: tuple | None = None, direction: str = 'after') -> tuple[list, bool]:
+    # One page, newest first, by keyset on (timestamp, id); status/job title filters are resolved by the store's indexes
+    return application_store.page_applications(status=status, job_title_equals=job_title, key=key, direction=direction, limit=APPS_PER_PAGE)
 
-def get_application_by_app_id(app_id: str, applications_data: list = None) -> tuple[dict | None, int]:
-    if applications_data is None:
-        applications_data = load_applications()
-    search_prefix_for_loop = app_id + '-'
-    for i, app in enumerate(applications_data):
-        stored_cv_filename = app.get('cv_filename', '')
-        if stored_cv_filename.startswith(search_prefix_for_loop):
-            return app, i
-    logger.warning(f"Application with app_id (timestamp prefix) '{app_id}' not found.")
-    return None, -1
+def clear_review_session(context: ContextTypes.DEFAULT_TYPE):
+    for session_key in ('review_filter', 'review_page_keys', 'review_next_key', 'review_has_next', 'review_page_num', 'current_view_status'):
+        context.user_data.pop(session_key, None)
+
+def get_application_by_app_id(app_id: str) -> dict | None:
+    application = application_store.get(app_id)
+    if application is None:
+        logger.warning(f"Application with app_id (timestamp prefix) '{app_id}' not found.")
+    return application
 
 def escape_markdown_v2(text: str) -> str:
     """Escapes special characters for Telegram MarkdownV2 parse mode."""
@@ -159,7 +132,6 @@ async def start_view_specific_status_session(update: Update, context: ContextTyp
     if not await restricted_access(update, context): return
     logger.info(f"Starting specific status view session for status '{target_status}', chat_id: {update.effective_chat.id}")
 
-    all_applications = load_applications()
     job_title_filter = None
 
     is_command_with_args = context.args and not is_review_session and update.message and not update.message.text.startswith("View")
@@ -169,11 +141,8 @@ async def start_view_specific_status_session(update: Update, context: ContextTyp
         if job_title_filter:
              logger.info(f"Filtering command-based status view for job title: '{escape_markdown_v2(job_title_filter)}'")
 
-    apps_with_target_status = [
-        app for app in all_applications
-        if app.get('status') == target_status and
-           (not job_title_filter or str(app.get('job_title', '')).lower() == job_title_filter)
-    ]
+    # Counted from the store's per-status counters; pages are loaded one at a time as they are shown
+    total_apps = application_store.count(status=target_status, job_title_equals=job_title_filter)
 
     reply_target = update.effective_message
     if not reply_target and update.callback_query:
@@ -184,25 +153,24 @@ async def start_view_specific_status_session(update: Update, context: ContextTyp
 
     status_display_name = STATUS_DISPLAY_NAMES.get(target_status, target_status.capitalize())
 
-    if not apps_with_target_status:
+    if not total_apps:
         message_text = f"No applications found with status: {status_display_name}."
         if job_title_filter:
             message_text = f"No applications found for job title '{escape_markdown_v2(job_title_filter)}' with status: {status_display_name}."
         await reply_target.reply_text(message_text, reply_markup=main_menu_keyboard)
-        context.user_data.pop('review_list', None)
-        context.user_data.pop('review_page_num', None)
-        context.user_data.pop('current_view_status', None)
+        clear_review_session(context)
         return
 
-    context.user_data['review_list'] = sorted(apps_with_target_status, key=lambda x: x.get('timestamp', ''), reverse=True)
+    clear_review_session(context)
+    context.user_data['review_filter'] = {'status': target_status, 'job_title': job_title_filter}
     context.user_data['review_page_num'] = 0
     context.user_data['current_view_status'] = target_status
 
-    logger.info(f"Found {len(apps_with_target_status)} applications with status '{target_status}'. Starting session for chat_id {update.effective_chat.id}.")
+    logger.info(f"Found {total_apps} applications with status '{target_status}'. Starting session for chat_id {update.effective_chat.id}.")
 
-    session_start_message = f"Viewing {len(apps_with_target_status)} application(s) with status: {status_display_name}. Use navigation buttons below."
+    session_start_message = f"Viewing {total_apps} application(s) with status: {status_display_name}. Use navigation buttons below."
     if is_review_session and target_status == 'new':
-        session_start_message = f"Starting review of {len(apps_with_target_status)} new application(s). Use navigation buttons below."
+        session_start_message = f"Starting review of {total_apps} new application(s). Use navigation buttons below."
 
     await reply_target.reply_text(session_start_message, reply_markup=review_mode_keyboard)
 
@@ -211,7 +179,7 @@ async def start_view_specific_status_session(update: Update, context: ContextTyp
 
 async def _display_application_page_common(update: Update, context: ContextTypes.DEFAULT_TYPE, page_type: str):
     logger.info(f"Attempting to display an application page for type: {page_type}")
-    review_list = context.user_data.get('review_list', [])
+    review_filter = context.user_data.get('review_filter')
     page_num = context.user_data.get('review_page_num', 0)
     current_view_status = context.user_data.get('current_view_status', 'N/A')
     chat_id = update.effective_chat.id
@@ -220,25 +188,39 @@ async def _display_application_page_common(update: Update, context: ContextTypes
     if not reply_target and update.callback_query:
         reply_target = update.callback_query.message
 
-    if not review_list:
-        logger.info(f"_display_application_page_common: no review_list for chat_id {chat_id}, type {page_type}.")
+    if not review_filter:
+        logger.info(f"_display_application_page_common: no review session for chat_id {chat_id}, type {page_type}.")
         msg_content = f"No applications to display in the current '{STATUS_DISPLAY_NAMES.get(current_view_status, current_view_status)}' view."
         await (reply_target.reply_text if reply_target else context.bot.send_message)(chat_id=chat_id, text=msg_content, reply_markup=main_menu_keyboard)
         return
 
-    start_index = page_num * APPS_PER_PAGE
-    end_index = start_index + APPS_PER_PAGE
-    apps_on_page = review_list[start_index:end_index]
+    # Each page shown remembers the (timestamp, id) of its first application, and Next continues after
+    # the last one shown: pages are index seeks, and new applications never push rows onto the next page.
+    page_keys = context.user_data.get('review_page_keys', [])
+    if page_num < len(page_keys):
+        page_key, direction = page_keys[page_num], 'from' # Re-reading a page shown before
+    else:
+        page_key, direction = (context.user_data.get('review_next_key') if page_num else None), 'after'
+    page_rows, has_next = load_application_page(review_filter['status'], review_filter['job_title'], page_key, direction)
+    apps_on_page = [application for _, application in page_rows]
 
     if not apps_on_page:
         logger.info(f"No applications found for page {page_num} in chat {chat_id} (type {page_type}).")
         no_apps_message = f"You've reached the end of the '{STATUS_DISPLAY_NAMES.get(current_view_status, current_view_status)}' application list." if page_num > 0 else f"No '{STATUS_DISPLAY_NAMES.get(current_view_status, current_view_status)}' applications to display."
+        context.user_data['review_page_num'] = max(0, page_num - 1) if page_num >= len(page_keys) else page_num
+        context.user_data['review_has_next'] = False
         await (reply_target.reply_text if reply_target else context.bot.send_message)(chat_id=chat_id, text=no_apps_message, reply_markup=review_mode_keyboard)
         return
 
-    total_apps = len(review_list)
+    context.user_data['review_page_keys'] = page_keys[:page_num] + [page_rows[0][0]]
+    context.user_data['review_next_key'] = page_rows[-1][0]
+    context.user_data['review_has_next'] = has_next
+
+    total_apps = max(application_store.count(status=review_filter['status'], job_title_equals=review_filter['job_title']), page_num * APPS_PER_PAGE + len(apps_on_page))
     total_pages = (total_apps + APPS_PER_PAGE - 1) // APPS_PER_PAGE
-    page_summary_content = f"Displaying page {page_num + 1} of {total_pages} for '{STATUS_DISPLAY_NAMES.get(current_view_status, current_view_status)}' applications. ({start_index + 1}-{min(end_index, total_apps)} of {total_apps} total)."
+    start_index = page_num * APPS_PER_PAGE
+    end_index = start_index + len(apps_on_page)
+    page_summary_content = f"Displaying page {page_num + 1} of {total_pages} for '{STATUS_DISPLAY_NAMES.get(current_view_status, current_view_status)}' applications. ({start_index + 1}-{end_index} of {total_apps} total)."
 
     try:
         await context.bot.send_message(chat_id=chat_id, text=escape_markdown_v2(page_summary_content), parse_mode='MarkdownV2')
@@ -350,8 +332,8 @@ async def _display_application_page_common(update: Update, context: ContextTypes
             await context.bot.send_message(chat_id=chat_id, text=message_text, reply_markup=reply_markup, parse_mode='MarkdownV2')
 
             # Proactively send CV after sending the application details
-            cv_path = os.path.join(UPLOAD_FOLDER, cv_filename_stored)
-            if os.path.exists(cv_path):
+            cv_path = application_cv_path(app_data)
+            if cv_path and os.path.exists(cv_path):
                 try:
                     with open(cv_path, 'rb') as cv_doc:
                         await context.bot.send_document(chat_id=chat_id, document=cv_doc, filename=original_cv_name_for_display)
@@ -383,17 +365,13 @@ async def review_applications_command(update: Update, context: ContextTypes.DEFA
 
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await restricted_access(update, context): return
-    context.user_data.pop('review_list', None)
-    context.user_data.pop('review_page_num', None)
-    context.user_data.pop('current_view_status', None)
+    clear_review_session(context)
     await update.message.reply_text("Welcome to the HR Bot! Please use the menu below or type commands.", reply_markup=main_menu_keyboard)
     logger.info(f"Sent /start menu to {update.effective_chat.id}")
 
 async def stop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await restricted_access(update, context): return
-    context.user_data.pop('review_list', None)
-    context.user_data.pop('review_page_num', None)
-    context.user_data.pop('current_view_status', None)
+    clear_review_session(context)
     await update.message.reply_text("Custom keyboard removed. Send /start to show it again.", reply_markup=ReplyKeyboardRemove())
     logger.info(f"Custom keyboard removed, review state cleared for chat_id: {update.effective_chat.id}")
 
@@ -476,8 +454,7 @@ async def button_callback_handler(update: Update, context: ContextTypes.DEFAULT_
 
     logger.info(f"Parsed Callback: action='{action_prefix}', app_id='{app_id_from_callback}', new_short_status_key='{new_short_status_key or 'N/A'}'")
 
-    all_applications = load_applications()
-    target_app_obj, target_app_index = get_application_by_app_id(app_id_from_callback, all_applications)
+    target_app_obj = get_application_by_app_id(app_id_from_callback)
 
     if not target_app_obj:
         logger.warning(f"Application NOT FOUND. App_id from callback: '{app_id_from_callback}'.")
@@ -503,22 +480,24 @@ async def button_callback_handler(update: Update, context: ContextTypes.DEFAULT_
             if query.message: await query.edit_message_text("Error: Invalid status value.", reply_markup=None)
             return
 
-        all_applications[target_app_index]['status'] = final_new_status
         status_display_name_for_confirmation = STATUS_DISPLAY_NAMES.get(final_new_status, final_new_status)
 
         if final_new_status == 'new':
-            all_applications[target_app_index].pop('reviewed_timestamp', None)
-            all_applications[target_app_index].pop('reviewed_by', None)
-            all_applications[target_app_index].pop('reviewed_by_name', None)
+            status_changes = {'status': final_new_status}
+            removed_keys = ['reviewed_timestamp', 'reviewed_by', 'reviewed_by_name']
         else:
-            all_applications[target_app_index]['reviewed_timestamp'] = datetime.utcnow().isoformat() + 'Z'
-            all_applications[target_app_index]['reviewed_by'] = str(query.from_user.id)
-            all_applications[target_app_index]['reviewed_by_name'] = query.from_user.first_name or query.from_user.username or 'N/A'
-
-        if save_applications(all_applications):
-            logger.info(f"Application {full_cv_filename} status updated to {final_new_status} by user {query.from_user.id} ({all_applications[target_app_index].get('reviewed_by_name', 'N/A')}).")
+            status_changes = {
+                'status': final_new_status,
+                'reviewed_timestamp': datetime.utcnow().isoformat() + 'Z',
+                'reviewed_by': str(query.from_user.id),
+                'reviewed_by_name': query.from_user.first_name or query.from_user.username or 'N/A'
+            }
+            removed_keys = []
+
+        updated_app_data = application_store.update(app_id_from_callback, status_changes, removed_keys)
+        if updated_app_data:
+            logger.info(f"Application {full_cv_filename} status updated to {final_new_status} by user {query.from_user.id} ({updated_app_data.get('reviewed_by_name', 'N/A')}).")
 
-            updated_app_data = all_applications[target_app_index]
             status_display_name_updated = STATUS_DISPLAY_NAMES.get(updated_app_data.get('status', 'N/A'), "N/A")
 
             message_text_updated = (
@@ -609,12 +588,8 @@ async def button_callback_handler(update: Update, context: ContextTypes.DEFAULT_
                  logger.error(f"Unexpected error editing message for {full_cv_filename} (set_status): {e}", exc_info=True)
                  await query.answer(text="Error updating display. Status was changed.", show_alert=True)
 
-            current_session_view_status = context.user_data.get('current_view_status')
-            if 'review_list' in context.user_data and current_session_view_status and current_session_view_status != final_new_status:
-                if not (current_session_view_status == 'new' and final_new_status == 'reviewed_accepted') and \
-                   not (current_session_view_status == 'new' and final_new_status == 'reviewed_declined'):
-                    context.user_data['review_list'] = [app for app in context.user_data['review_list'] if app.get('cv_filename') != full_cv_filename]
-                    logger.info(f"Removed {full_cv_filename} from current view list ({current_session_view_status}) as status changed to '{final_new_status}'.")
+            # No session list to prune: pages are re-read with the view's status filter, so an application
+            # that moved to another status drops out of them, and the page keys keep the other pages in place
         else:
             logger.error(f"Failed to save application status update for {full_cv_filename} (set_status).")
             if query.message: await query.edit_message_text("Error updating application status in log.", reply_markup=query.message.reply_markup if query.message else None)
@@ -628,10 +603,8 @@ async def handle_next_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await restricted_access(update, context): return
     logger.info(f"Next Page requested by {update.effective_chat.id}")
     page_num = context.user_data.get('review_page_num', 0)
-    review_list_size = len(context.user_data.get('review_list', []))
-    total_pages = (review_list_size + APPS_PER_PAGE - 1) // APPS_PER_PAGE
 
-    if page_num < total_pages - 1:
+    if context.user_data.get('review_has_next'):
         context.user_data['review_page_num'] = page_num + 1
         current_status_view = context.user_data.get('current_view_status', 'new')
         if current_status_view == 'new': await display_application_page_new(update, context)
@@ -654,9 +627,7 @@ async def handle_previous_page(update: Update, context: ContextTypes.DEFAULT_TYP
 async def go_to_main_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not await restricted_access(update, context): return
     logger.info(f"Back to Main Menu requested by {update.effective_chat.id}")
-    context.user_data.pop('review_list', None)
-    context.user_data.pop('review_page_num', None)
-    context.user_data.pop('current_view_status', None)
+    clear_review_session(context)
     await update.message.reply_text("Returning to the main menu.", reply_markup=main_menu_keyboard)
 
 # --- End Command Handlers ---
@@ -0,0 +1,155 @@
+import io
+import os
+import json
+import logging
+
+try:
+    from PIL import Image, ImageOps  # Optional: pip install Pillow to generate resized blog images
+except ImportError:
+    Image = None
+
+from blob_store import image_blobs
+
+logger = logging.getLogger(__name__)
+
+# Widths generated for each blog image; images narrower than a width get one at their own width instead
+DERIVATIVE_WIDTHS = tuple(sorted(int(w) for w in os.getenv('IMAGE_DERIVATIVE_WIDTHS', '320,640,960,1280').split(',') if w.strip()))
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+MAX_SOURCE_PIXELS = 50_000_000  # Refuse decompression bombs
+MANIFEST_VARIANT = 'derivatives.json'
+
+
+def derivatives_available() -> bool:
+    return Image is not None
+
+
+def load_variants(blob_name: str) -> dict | None:
+    """The derivative manifest of an image blob, or None if its derivatives were not generated (yet)."""
+    try:
+        with open(image_blobs.derivative_path(blob_name, MANIFEST_VARIANT), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (IOError, ValueError):
+        return None
+
+
+def needs_derivatives(image_url: str | None) -> str | None:
+    """Blob name of `image_url` if it is a blob store image whose derivatives still have to be generated."""
+    blob_name = image_blobs.blob_name_from_url(image_url)
+    if blob_name is None or not derivatives_available() or load_variants(blob_name) is not None:
+        return None
+    return blob_name
+
+
+def strip_image_metadata(image_bytes: bytes) -> bytes:
+    """Re-encodes an uploaded JPEG/PNG/WebP without its EXIF/XMP/text metadata (GPS, camera serials).
+
+    The EXIF orientation is applied to the pixels first, so the image still displays upright.
+    Anything Pillow cannot read, animated images and all images when Pillow is missing are
+    returned unchanged.
+    """
+    if Image is None:
+        return image_bytes
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as source:
+            if source.format not in ('JPEG', 'PNG', 'WEBP') or getattr(source, 'is_animated', False):
+                return image_bytes
+            if source.width * source.height > MAX_SOURCE_PIXELS:
+                raise ValueError(f"Image is too large ({source.width}x{source.height})")
+            image_format = source.format
+            icc_profile = source.info.get('icc_profile')
+            image = ImageOps.exif_transpose(source)
+            rotated = image is not source
+            image.load()
+            buffer = io.BytesIO()
+            options = {'icc_profile': icc_profile} if icc_profile else {}
+            if image_format == 'JPEG':
+                # 'keep' reuses the original quantization tables, so an unrotated JPEG barely changes
+                image.save(buffer, 'JPEG', quality=95 if rotated else 'keep', **options)
+            elif image_format == 'PNG':
+                image.save(buffer, 'PNG', **options) # No pnginfo: text and eXIf chunks are dropped
+            else:
+                image.save(buffer, 'WEBP', quality=90, **options)
+            return buffer.getvalue()
+    except (OSError, SyntaxError) as e: # Pillow raises these for unreadable/truncated images
+        logger.warning(f"Could not strip metadata from uploaded image, storing it as is: {e}")
+        return image_bytes
+
+
+def _encode(image, format: str) -> bytes:
+    buffer = io.BytesIO()
+    if format == 'jpeg':
+        # Saved without the source's EXIF (camera data, GPS); progressive so it paints early on slow links
+        if image.mode == 'RGBA':
+            background = Image.new('RGB', image.size, (255, 255, 255)) # JPEG has no alpha channel
+            background.paste(image, mask=image.getchannel('A'))
+            image = background
+        image.save(buffer, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+    return buffer.getvalue()
+
+
+def generate_derivatives(blob_name: str) -> dict:
+    """Writes EXIF-free progressive JPEG and WebP copies of an image blob at DERIVATIVE_WIDTHS.
+
+    The files are stored next to the blob (<sha256>-w640.jpg, <sha256>-w640.webp) and listed
+    in <sha256>-derivatives.json, which is written last and returned.
+    Kept free of Flask imports so it can run in a worker process.
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed")
+    with Image.open(image_blobs.blob_path(blob_name)) as source:
+        if source.width * source.height > MAX_SOURCE_PIXELS:
+            raise ValueError(f"Image {blob_name} is too large ({source.width}x{source.height})")
+        image = ImageOps.exif_transpose(source) # Apply the EXIF rotation before the EXIF is dropped
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    manifest = {'blob': blob_name, 'width': image.width, 'height': image.height, 'jpeg': [], 'webp': []}
+    for width in sorted({min(width, image.width) for width in DERIVATIVE_WIDTHS}):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+        for format, extension in (('jpeg', 'jpg'), ('webp', 'webp')):
+            variant = f"w{width}.{extension}"
+            image_blobs.put_derivative(blob_name, variant, _encode(resized, format))
+            manifest[format].append([width, image_blobs.derivative_url(blob_name, variant)])
+    image_blobs.put_derivative(blob_name, MANIFEST_VARIANT, json.dumps(manifest).encode('utf-8'))
+    logger.info(f"Generated {len(manifest['jpeg'])} widths of image {blob_name}")
+    return manifest
+
+
+def generate_derivatives_job(payload: dict) -> dict:
+    """Job queue entry point (process executor): payload['blob'] is an image blob name."""
+    manifest = generate_derivatives(payload['blob'])
+    return {'blob': manifest['blob'], 'widths': [width for width, _ in manifest['jpeg']]}
+
+
+def attach_image_variants(posts: list) -> bool:
+    """Sets post['image_variants'] to the derivative manifest of each post's image; returns True if any changed.
+
+    Called before blog_posts.json is saved and after derivatives are generated, so the
+    variants follow image changes and show up once the background job has finished.
+    """
+    changed = False
+    for post in posts:
+        current = post.get('image_variants')
+        blob_name = image_blobs.blob_name_from_url(post.get('image_url'))
+        if current and current.get('blob') == blob_name:
+            continue
+        variants = load_variants(blob_name) if blob_name else None
+        if variants:
+            post['image_variants'] = variants
+            changed = True
+        elif current:
+            post.pop('image_variants') # Image replaced; the new one has no derivatives yet
+            changed = True
+    return changed
+
+
+def srcset(variants: dict | None, format: str = 'jpeg') -> str:
+    """srcset attribute value ("<url> 320w, <url> 640w, ...") for a post's image_variants."""
+    if not variants:
+        return ''
+    return ', '.join(f"{url} {width}w" for width, url in variants.get(format, []))
@@ -0,0 +1,251 @@
+import os
+import time
+import socket
+import sqlite3
+import hashlib
+import logging
+import argparse
+import ipaddress
+import threading
+import urllib.error
+import urllib.request
+from urllib.parse import urlsplit
+
+from blob_store import image_blobs, IMAGE_BLOB_REFS_DB
+from image_derivatives import load_variants
+
+logger = logging.getLogger(__name__)
+
+# External images (posts with an image_url on another site, the Unsplash pictures in the templates)
+# are fetched once into the image blob store and served from there by the /image-proxy route.
+IMAGE_PROXY_ENABLED = os.getenv('IMAGE_PROXY_ENABLED', 'True').lower() == 'true'
+# Hosts the templates use; external image_urls of posts are allowed on top of these
+IMAGE_PROXY_ALLOWED_HOSTS = {host.strip().lower() for host in os.getenv('IMAGE_PROXY_ALLOWED_HOSTS', 'images.unsplash.com').split(',') if host.strip()}
+REMOTE_IMAGE_MAX_BYTES = int(os.getenv('REMOTE_IMAGE_MAX_BYTES', str(10 * 1024 * 1024)))
+REMOTE_IMAGE_REFRESH_SECONDS = int(os.getenv('REMOTE_IMAGE_REFRESH_SECONDS', str(7 * 24 * 3600)))  # Revalidated with the origin at most this often
+REMOTE_IMAGE_RETRY_SECONDS = int(os.getenv('REMOTE_IMAGE_RETRY_SECONDS', '3600'))  # After a failed fetch
+REMOTE_IMAGE_TIMEOUT = float(os.getenv('REMOTE_IMAGE_TIMEOUT', '10'))
+# Only for local development against a stand-in HTTP server; never enable in production (SSRF)
+IMAGE_PROXY_ALLOW_PRIVATE = os.getenv('IMAGE_PROXY_ALLOW_PRIVATE', 'False').lower() == 'true'
+FETCH_CLAIM_SECONDS = 300  # A queued fetch blocks new ones for this long, so a burst of misses queues one job
+USER_AGENT = 'BridgeeSolutions-ImageProxy/1.0'
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/webp': '.webp',
+    'image/gif': '.gif',
+    'image/avif': '.avif',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS remote_images (
+    url TEXT PRIMARY KEY,
+    blob TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL,
+    next_fetch_at REAL NOT NULL DEFAULT 0,
+    claimed_until REAL NOT NULL DEFAULT 0,
+    last_error TEXT
+);
+"""
+
+
+class RemoteImageError(Exception):
+    """The remote image cannot be cached (not allowed, too large, not an image, origin error)."""
+
+
+def _check_public_host(url: str):
+    """Refuses URLs that are not http(s) or whose host resolves to a private, loopback or link-local address."""
+    parts = urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        raise RemoteImageError(f"Not an http(s) URL: {url}")
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parts.hostname, parts.port or (443 if parts.scheme == 'https' else 80))}
+    except socket.gaierror as e:
+        raise RemoteImageError(f"Cannot resolve {parts.hostname}: {e}")
+    if IMAGE_PROXY_ALLOW_PRIVATE:
+        return
+    for address in addresses:
+        if not ipaddress.ip_address(address.split('%', 1)[0]).is_global:
+            raise RemoteImageError(f"{parts.hostname} resolves to a non-public address ({address})")
+
+
+class _CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        _check_public_host(newurl) # A public URL must not redirect the server into the internal network
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+class RemoteImageCache:
+    """Maps external image URLs to image blobs, with bounded revalidation.
+
+    Each URL owns a 'remote:<sha256 of url>' reference to its current blob, so the blob store
+    releases an image when the origin changes it. Fetches run as background jobs: a lookup never
+    waits for the origin, and each URL has at most one fetch queued at a time.
+    """
+
+    def __init__(self, db_path: str = IMAGE_BLOB_REFS_DB):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._opener = urllib.request.build_opener(_CheckedRedirectHandler)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def owner(url: str) -> str:
+        return f"remote:{hashlib.sha256(url.encode('utf-8')).hexdigest()}"
+
+    def get(self, url: str) -> dict | None:
+        row = self._connection().execute("SELECT * FROM remote_images WHERE url = ?", (url,)).fetchone()
+        return dict(row) if row else None
+
+    def claim_fetch(self, url: str) -> bool:
+        """True if the caller should queue a fetch of `url`: it is missing or due for revalidation,
+        and no other fetch was queued for it in the last FETCH_CLAIM_SECONDS."""
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute("INSERT OR IGNORE INTO remote_images (url) VALUES (?)", (url,))
+            cursor = conn.execute(
+                "UPDATE remote_images SET claimed_until = ? WHERE url = ? AND next_fetch_at <= ? AND claimed_until <= ?",
+                (now + FETCH_CLAIM_SECONDS, url, now, now)
+            )
+        return cursor.rowcount == 1
+
+    def cached_file(self, entry: dict | None, width: int | None = None, webp: bool = False) -> tuple[str, str] | None:
+        """(path, mimetype) of the stored copy to serve: the smallest derivative at least `width` wide
+        if derivatives exist, else the original. None if nothing is stored yet."""
+        if not entry or not entry.get('blob') or not image_blobs.exists(entry['blob']):
+            return None
+        variants = load_variants(entry['blob'])
+        if variants:
+            format = 'webp' if webp else 'jpeg'
+            candidates = variants.get(format) or []
+            chosen = next((url for w, url in candidates if width and w >= width), candidates[-1][1] if candidates else None)
+            if chosen:
+                variant = chosen.rsplit('-', 1)[1]
+                return image_blobs.derivative_path(entry['blob'], variant), f"image/{format}"
+        extension = os.path.splitext(entry['blob'])[1]
+        mimetype = next((content_type for content_type, ext in CONTENT_TYPE_EXTENSIONS.items() if ext == extension), 'application/octet-stream')
+        return image_blobs.blob_path(entry['blob']), mimetype
+
+    def fetch(self, url: str) -> dict:
+        """Downloads (or revalidates) `url` into the image store. Runs in the job worker.
+
+        Returns {'url', 'blob', 'changed'}; on failure the previous copy keeps being served and the
+        next attempt waits REMOTE_IMAGE_RETRY_SECONDS.
+        """
+        entry = self.get(url) or {}
+        try:
+            _check_public_host(url)
+            request = urllib.request.Request(url, headers={'User-Agent': USER_AGENT, 'Accept': 'image/*'})
+            if entry.get('blob') and image_blobs.exists(entry['blob']):
+                if entry.get('etag'):
+                    request.add_header('If-None-Match', entry['etag'])
+                if entry.get('last_modified'):
+                    request.add_header('If-Modified-Since', entry['last_modified'])
+            try:
+                response = self._opener.open(request, timeout=REMOTE_IMAGE_TIMEOUT)
+            except urllib.error.HTTPError as e:
+                if e.code == 304:
+                    self._record(url, entry.get('blob'), entry.get('etag'), entry.get('last_modified'))
+                    return {'url': url, 'blob': entry.get('blob'), 'changed': False}
+                raise RemoteImageError(f"Origin answered HTTP {e.code}")
+            with response:
+                content_type = (response.headers.get_content_type() or '').lower()
+                extension = CONTENT_TYPE_EXTENSIONS.get(content_type)
+                if extension is None:
+                    raise RemoteImageError(f"Not a supported image type: {content_type}")
+                length = response.headers.get('Content-Length')
+                if length and length.isdigit() and int(length) > REMOTE_IMAGE_MAX_BYTES:
+                    raise RemoteImageError(f"Image is larger than {REMOTE_IMAGE_MAX_BYTES} bytes ({length})")
+                try:
+                    blob_name = image_blobs.put_stream(response, extension, max_bytes=REMOTE_IMAGE_MAX_BYTES)
+                except ValueError as e:
+                    raise RemoteImageError(str(e))
+                etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+        except (RemoteImageError, OSError) as e: # URLError and socket timeouts are OSErrors
+            self._record_failure(url, f"{type(e).__name__}: {e}")
+            raise
+        image_blobs.set_refs(self.owner(url), {blob_name}) # Also releases the previous version
+        self._record(url, blob_name, etag, last_modified)
+        logger.info(f"Cached remote image {url} as blob {blob_name}")
+        return {'url': url, 'blob': blob_name, 'changed': blob_name != entry.get('blob')}
+
+    def _record(self, url: str, blob_name: str | None, etag: str | None, last_modified: str | None):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute(
+                """INSERT INTO remote_images (url, blob, etag, last_modified, fetched_at, next_fetch_at, claimed_until, last_error)
+                   VALUES (?, ?, ?, ?, ?, ?, 0, NULL)
+                   ON CONFLICT(url) DO UPDATE SET blob = excluded.blob, etag = excluded.etag, last_modified = excluded.last_modified,
+                       fetched_at = excluded.fetched_at, next_fetch_at = excluded.next_fetch_at, claimed_until = 0, last_error = NULL""",
+                (url, blob_name, etag, last_modified, now, now + REMOTE_IMAGE_REFRESH_SECONDS)
+            )
+
+    def _record_failure(self, url: str, error: str):
+        now = time.time()
+        with self._connection() as conn:
+            conn.execute("INSERT OR IGNORE INTO remote_images (url) VALUES (?)", (url,))
+            conn.execute(
+                "UPDATE remote_images SET next_fetch_at = ?, claimed_until = 0, last_error = ? WHERE url = ?",
+                (now + REMOTE_IMAGE_RETRY_SECONDS, error, url)
+            )
+        logger.warning(f"Could not cache remote image {url}: {error}")
+
+    def forget(self, url: str) -> list:
+        """Drops a URL from the cache; returns the blobs that were deleted."""
+        with self._connection() as conn:
+            conn.execute("DELETE FROM remote_images WHERE url = ?", (url,))
+        return image_blobs.release(self.owner(url))
+
+    def entries(self) -> list:
+        return [dict(row) for row in self._connection().execute("SELECT * FROM remote_images ORDER BY url")]
+
+
+remote_images = RemoteImageCache()
+
+
+def host_allowed(url: str | None) -> bool:
+    """True for http(s) URLs on one of IMAGE_PROXY_ALLOWED_HOSTS."""
+    parts = urlsplit(url or '')
+    return parts.scheme in ('http', 'https') and (parts.hostname or '').lower() in IMAGE_PROXY_ALLOWED_HOSTS
+
+
+def fetch_remote_image_job(payload: dict) -> dict:
+    """Job queue entry point (thread executor): payload['url'] is the remote image URL."""
+    try:
+        return remote_images.fetch(payload['url'])
+    except RemoteImageError as e:
+        # Permanent for this URL until REMOTE_IMAGE_RETRY_SECONDS; the proxy keeps redirecting to the origin
+        return {'url': payload['url'], 'blob': None, 'error': str(e)}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Cache of external blog images.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help="Show cached remote images.")
+    fetch_parser = subparsers.add_parser('fetch', help="Fetch (or revalidate) one remote image now.")
+    fetch_parser.add_argument('url')
+    forget_parser = subparsers.add_parser('forget', help="Remove one remote image from the cache.")
+    forget_parser.add_argument('url')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for entry in remote_images.entries():
+            print(f"{entry['url']} -> {entry['blob'] or '-'} (fetched {entry['fetched_at'] or 'never'}, error: {entry['last_error'] or 'none'})")
+    elif args.command == 'fetch':
+        print(remote_images.fetch(args.url))
+    elif args.command == 'forget':
+        print(f"Deleted blobs: {remote_images.forget(args.url)}")
@@ -0,0 +1,446 @@
+import os
+import json
+import time
+import uuid
+import random
+import logging
+import sqlite3
+import signal
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_DB_FILE = os.getenv('JOB_QUEUE_DB_FILE', 'jobs.db')
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+EXECUTOR_THREAD = 'thread'    # I/O bound work (SMTP, HTTP, file moves)
+EXECUTOR_PROCESS = 'process'  # CPU bound work (document conversion, image processing)
+
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_MAX_SECONDS = 300.0
+POLL_INTERVAL_SECONDS = 1.0
+FINISHED_JOB_RETENTION_SECONDS = 7 * 24 * 3600
+HEARTBEAT_INTERVAL_SECONDS = 30.0
+WORKER_STALE_SECONDS = 120.0  # A worker that has not checked in for this long is considered gone
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after REAL NOT NULL,
+    locked_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_error TEXT,
+    result TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_claim ON jobs (status, job_type, run_after);
+CREATE TABLE IF NOT EXISTS workers (
+    worker_id TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    job_types TEXT NOT NULL,
+    last_seen REAL NOT NULL
+);
+"""
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with jitter: ~2s, 4s, 8s, ... capped at BACKOFF_MAX_SECONDS."""
+    delay = min(BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0)), BACKOFF_MAX_SECONDS)
+    return delay * random.uniform(0.5, 1.0)
+
+
+class JobQueue:
+    """Durable job queue in SQLite (WAL), shared by every process that enqueues or works jobs.
+
+    Jobs are claimed with a lease (`locked_until`); a job whose worker died is picked up
+    again once its lease expires, so each job runs at least once. complete() and fail() only
+    apply while the caller still holds the lease it claimed, so a worker that overran its lease
+    cannot overwrite the outcome of the run that took the job over.
+    """
+
+    def __init__(self, db_path: str = JOB_QUEUE_DB_FILE):
+        self.db_path = db_path
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row_to_job(row) -> dict:
+        job = dict(row)
+        job['payload'] = json.loads(job['payload'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def enqueue(self, job_type: str, payload: dict, max_attempts: int = DEFAULT_MAX_ATTEMPTS, delay: float = 0) -> int:
+        """Stores a job and returns its id. Raises sqlite3.Error if it could not be stored."""
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (job_type, payload, max_attempts, run_after, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_type, json.dumps(payload, ensure_ascii=False), max_attempts, now + delay, now, now)
+            )
+        return cursor.lastrowid
+
+    def get(self, job_id: int) -> dict | None:
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim(self, leases: dict) -> dict | None:
+        """Claims the oldest runnable job whose type is in `leases` ({job_type: lease_seconds})."""
+        if not leases:
+            return None
+        now = time.time()
+        placeholders = ', '.join('?' for _ in leases)
+        conn = self._connection()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                f"""SELECT * FROM jobs
+                    WHERE job_type IN ({placeholders})
+                      AND ((status = ? AND run_after <= ?) OR (status = ? AND locked_until < ?))
+                    ORDER BY run_after, id LIMIT 1""",
+                (*leases, STATUS_QUEUED, now, STATUS_RUNNING, now)
+            ).fetchone()
+            if row is None:
+                return None
+            if row['status'] == STATUS_RUNNING:
+                logger.warning(f"Job {row['id']} ({row['job_type']}) lease expired; running it again.")
+            locked_until = now + leases[row['job_type']]
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, locked_until = ?, updated_at = ? WHERE id = ?",
+                (STATUS_RUNNING, locked_until, now, row['id'])
+            )
+        job = self._row_to_job(row)
+        job['attempts'] += 1
+        job['status'] = STATUS_RUNNING
+        job['locked_until'] = locked_until # Identifies this claim in complete()/fail()
+        return job
+
+    def complete(self, job: dict, result=None) -> bool:
+        """Marks a claimed job done. Returns False if its lease had expired and another run took it over."""
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, locked_until = NULL, updated_at = ?, last_error = NULL, result = ? WHERE id = ? AND locked_until = ?",
+                (STATUS_DONE, now, json.dumps(result, ensure_ascii=False) if result is not None else None, job['id'], job['locked_until'])
+            )
+        return cursor.rowcount == 1
+
+    def fail(self, job: dict, error: str) -> bool:
+        """Records a failed attempt. Returns True if the job will run again, False if it gave up.
+
+        If the lease had already expired nothing is recorded: the run that took the job over
+        owns it now, so this also returns True.
+        """
+        now = time.time()
+        retry = job['attempts'] < job['max_attempts']
+        with self._connection() as conn:
+            if retry:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = ?, run_after = ?, locked_until = NULL, updated_at = ?, last_error = ? WHERE id = ? AND locked_until = ?",
+                    (STATUS_QUEUED, now + backoff_delay(job['attempts']), now, error, job['id'], job['locked_until'])
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE jobs SET status = ?, locked_until = NULL, updated_at = ?, last_error = ? WHERE id = ? AND locked_until = ?",
+                    (STATUS_FAILED, now, error, job['id'], job['locked_until'])
+                )
+        if cursor.rowcount == 0:
+            logger.warning(f"Job {job['id']} ({job['job_type']}) lease expired before its failure was recorded; leaving it to the current run.")
+            return True
+        return retry
+
+    def heartbeat(self, worker_id: str, job_types):
+        """Records that a worker running `job_types` is alive (see has_worker())."""
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO workers (worker_id, pid, job_types, last_seen) VALUES (?, ?, ?, ?)",
+                (worker_id, os.getpid(), json.dumps(sorted(job_types)), time.time())
+            )
+
+    def remove_worker(self, worker_id: str):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def workers(self, max_age_seconds: float = WORKER_STALE_SECONDS) -> list:
+        """Workers (in any process) that checked in during the last `max_age_seconds`."""
+        rows = self._connection().execute("SELECT * FROM workers WHERE last_seen >= ?", (time.time() - max_age_seconds,))
+        return [dict(row, job_types=json.loads(row['job_types'])) for row in rows]
+
+    def has_worker(self, job_type: str) -> bool:
+        """True if some live worker runs `job_type`, i.e. a job queued now will be picked up."""
+        return any(job_type in worker['job_types'] for worker in self.workers())
+
+    def counts(self) -> dict:
+        """{job_type: {status: count}} for the status endpoint."""
+        counts = {}
+        for row in self._connection().execute("SELECT job_type, status, COUNT(*) AS n FROM jobs GROUP BY job_type, status"):
+            counts.setdefault(row['job_type'], {})[row['status']] = row['n']
+        return counts
+
+    def purge_finished(self, older_than_seconds: float = FINISHED_JOB_RETENTION_SECONDS) -> int:
+        with self._connection() as conn:
+            conn.execute("DELETE FROM workers WHERE last_seen < ?", (time.time() - WORKER_STALE_SECONDS,)) # Workers that died without stop()
+            cursor = conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?",
+                (STATUS_DONE, STATUS_FAILED, time.time() - older_than_seconds)
+            )
+        return cursor.rowcount
+
+
+class JobHandler:
+    """How to run one job type.
+
+    `func(payload)` does the work; with executor='process' it runs in the process pool, so it
+    must be a picklable module-level function. `on_success(payload, result)` and
+    `on_failure(payload, error)` (after the last attempt) always run in the worker thread.
+    The value returned by on_success (or func) is stored as the job result. `timeout` bounds
+    how long a process job may run (its worker process is killed after that) and sizes the
+    lease; thread jobs must bound their own I/O.
+    """
+
+    def __init__(self, func, concurrency: int = 1, executor: str = EXECUTOR_THREAD, timeout: float = 300,
+                 on_success=None, on_failure=None):
+        if executor not in (EXECUTOR_THREAD, EXECUTOR_PROCESS):
+            raise ValueError(f"Unknown executor '{executor}'")
+        self.func = func
+        self.concurrency = max(1, concurrency)
+        self.executor = executor
+        self.timeout = timeout
+        self.on_success = on_success
+        self.on_failure = on_failure
+
+
+class JobWorker:
+    """Claims jobs from a JobQueue and runs them on thread/process pools.
+
+    Concurrency limits are per job type and per worker process.
+    """
+
+    def __init__(self, queue: JobQueue, poll_interval: float = POLL_INTERVAL_SECONDS, max_processes: int | None = None):
+        self.queue = queue
+        self.poll_interval = poll_interval
+        self.max_processes = max_processes
+        self.handlers = {}
+        self._running = {}
+        self._slots_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._threads = None
+        self._processes = None
+        self._dispatcher = None
+        self.worker_id = uuid.uuid4().hex
+        self._last_heartbeat = 0.0
+
+    @property
+    def is_running(self) -> bool:
+        return self._started and not self._stop.is_set()
+
+    def register(self, job_type: str, handler: JobHandler):
+        self.handlers[job_type] = handler
+        self._running.setdefault(job_type, 0)
+
+    def notify(self):
+        """Wakes the dispatcher right away (e.g. after enqueueing from this process)."""
+        self._wakeup.set()
+
+    def start(self):
+        if self._started:
+            return
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        self._threads = ThreadPoolExecutor(
+            max_workers=sum(handler.concurrency for handler in self.handlers.values()) or 1,
+            thread_name_prefix='job-worker'
+        )
+        if any(handler.executor == EXECUTOR_PROCESS for handler in self.handlers.values()):
+            self._processes = ProcessPoolExecutor(max_workers=self.max_processes)
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, name='job-dispatcher', daemon=True)
+        self._dispatcher.start()
+        try:
+            purged = self.queue.purge_finished()
+            if purged:
+                logger.info(f"Purged {purged} finished jobs from {self.queue.db_path}")
+        except sqlite3.Error as e:
+            logger.error(f"Error purging finished jobs: {e}")
+        logger.info(f"Job worker started for job types: {', '.join(self.handlers)}")
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        self._wakeup.set()
+        if self._dispatcher:
+            self._dispatcher.join()
+            try:
+                self.queue.remove_worker(self.worker_id)
+            except sqlite3.Error as e:
+                logger.error(f"Error unregistering job worker {self.worker_id}: {e}")
+        if self._threads:
+            self._threads.shutdown(wait=wait)
+        with self._slots_lock:
+            processes = self._processes
+        if processes:
+            processes.shutdown(wait=wait)
+
+    def _available_leases(self) -> dict:
+        with self._slots_lock:
+            return {
+                job_type: handler.timeout + 60  # Lease outlives the handler timeout
+                for job_type, handler in self.handlers.items()
+                if self._running[job_type] < handler.concurrency
+            }
+
+    def _heartbeat(self):
+        now = time.time()
+        if now - self._last_heartbeat < HEARTBEAT_INTERVAL_SECONDS:
+            return
+        try:
+            self.queue.heartbeat(self.worker_id, self.handlers)
+            self._last_heartbeat = now
+        except sqlite3.Error as e:
+            logger.error(f"Error recording job worker heartbeat in {self.queue.db_path}: {e}")
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            self._heartbeat() # Lets other processes (blog_bot.py) see which job types have a worker
+            job = None
+            try:
+                job = self.queue.claim(self._available_leases())
+            except sqlite3.Error as e:
+                logger.error(f"Error claiming job from {self.queue.db_path}: {e}")
+            if job is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+            with self._slots_lock:
+                self._running[job['job_type']] += 1
+            self._threads.submit(self._run, job)
+
+    def _run(self, job: dict):
+        handler = self.handlers[job['job_type']]
+        payload = job['payload']
+        try:
+            if handler.executor == EXECUTOR_PROCESS:
+                result = self._run_in_process(handler, payload)
+            else:
+                result = handler.func(payload)
+            if handler.on_success:
+                result = handler.on_success(payload, result)
+            if self.queue.complete(job, result):
+                logger.info(f"Job {job['id']} ({job['job_type']}) done after {job['attempts']} attempt(s).")
+            else:
+                logger.warning(f"Job {job['id']} ({job['job_type']}) finished after its lease expired; another run owns it now.")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            will_retry = False
+            try:
+                will_retry = self.queue.fail(job, error)
+            except sqlite3.Error as db_error:
+                logger.error(f"Error recording failure of job {job['id']}: {db_error}")
+            if will_retry:
+                logger.warning(f"Job {job['id']} ({job['job_type']}) attempt {job['attempts']} failed, will retry: {error}")
+            else:
+                logger.error(f"Job {job['id']} ({job['job_type']}) failed permanently: {error}", exc_info=True)
+                if handler.on_failure:
+                    try:
+                        handler.on_failure(payload, error)
+                    except Exception as hook_error:
+                        logger.error(f"on_failure hook for job {job['id']} raised: {hook_error}", exc_info=True)
+        finally:
+            with self._slots_lock:
+                self._running[job['job_type']] -= 1
+            self._wakeup.set()  # A slot freed up
+
+    def _run_in_process(self, handler: JobHandler, payload: dict):
+        with self._slots_lock:
+            pool = self._processes
+        try:
+            return pool.submit(handler.func, payload).result(timeout=handler.timeout)
+        except TimeoutError:
+            self._replace_process_pool(pool)
+            raise TimeoutError(f"No result within {handler.timeout}s; the worker process was terminated") from None
+        except BrokenProcessPool:
+            self._replace_process_pool(pool)
+            raise
+
+    def _replace_process_pool(self, broken: ProcessPoolExecutor):
+        """Kills the workers of a pool that has a stuck (timed out) or crashed job and starts a fresh pool.
+
+        Other jobs still running in the old pool fail with BrokenProcessPool and are retried.
+        """
+        with self._slots_lock:
+            if self._processes is not broken or self._stop.is_set():
+                return # Already replaced by another job of the same pool, or shutting down
+            self._processes = ProcessPoolExecutor(max_workers=self.max_processes)
+        # ProcessPoolExecutor has no public way to kill a running task, so stop its processes directly
+        for process in list((broken._processes or {}).values()):
+            process.terminate()
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("Terminated the job worker process pool after a timed out or crashed job; started a new one.")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Background job queue maintenance.")
+    parser.add_argument('--db', default=JOB_QUEUE_DB_FILE)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('status', help="Show job counts per type and status.")
+    show_parser = subparsers.add_parser('show', help="Show one job.")
+    show_parser.add_argument('job_id', type=int)
+    purge_parser = subparsers.add_parser('purge', help="Delete finished jobs older than N days.")
+    purge_parser.add_argument('--days', type=float, default=FINISHED_JOB_RETENTION_SECONDS / 86400)
+    subparsers.add_parser('worker', help="Run the website's job handlers until stopped (for JOB_WORKERS_IN_APP=False).")
+    args = parser.parse_args()
+
+    if args.command == 'worker':
+        # The handlers (and their callbacks) are registered by app.py, so run exactly those
+        os.environ['JOB_QUEUE_DB_FILE'] = args.db
+        os.environ['JOB_WORKERS_IN_APP'] = 'False'
+        from app import job_worker
+        stopping = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stopping.set())
+        job_worker.start()
+        try:
+            while not stopping.wait(1):
+                pass
+        except KeyboardInterrupt:
+            pass
+        logger.info("Stopping job worker, waiting for running jobs to finish...")
+        job_worker.stop(wait=True)
+        raise SystemExit(0)
+
+    job_queue = JobQueue(args.db)
+    if args.command == 'status':
+        print(json.dumps({'jobs': job_queue.counts(), 'workers': job_queue.workers()}, indent=4))
+    elif args.command == 'show':
+        print(json.dumps(job_queue.get(args.job_id), indent=4, ensure_ascii=False))
+    elif args.command == 'purge':
+        print(f"Purged {job_queue.purge_finished(args.days * 86400)} jobs.")
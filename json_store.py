@@ -0,0 +1,196 @@
+import os
+import copy
+import json
+import time
+import logging
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_FSYNC = 'fsync'      # Commit as soon as possible; every commit is fsynced
+DURABILITY_BATCHED = 'batched'  # Wait a short window to coalesce more writers into one fsynced commit
+
+JSON_STORE_DURABILITY = os.getenv('JSON_STORE_DURABILITY', DURABILITY_FSYNC)
+JSON_STORE_COMMIT_WINDOW_MS = float(os.getenv('JSON_STORE_COMMIT_WINDOW_MS', '5'))
+
+
+class FileLock:
+    """Advisory OS file lock (flock on POSIX, msvcrt on Windows) held on `<path>.lock`.
+
+    Shared locks fall back to exclusive on Windows.
+    """
+
+    def __init__(self, path: str, exclusive: bool = True):
+        self.lock_path = path + '.lock'
+        self.exclusive = exclusive
+        self._file = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.lock_path)), exist_ok=True)
+        self._file = open(self.lock_path, 'a+b')
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+def _fsync_directory(path: str):
+    if os.name != 'posix':
+        return
+    dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(dir_fd)
+    finally:
+        os.close(dir_fd)
+
+
+def atomic_write_json(path: str, data, fsync: bool = True):
+    """Writes JSON to a temp file in the same directory, fsyncs it and renames it over `path`.
+
+    Readers see either the old or the new file, never a truncated one. The caller holds the lock.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(temp_path, path)
+        if fsync:
+            _fsync_directory(path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class JsonFileWriter:
+    """Serialized, crash-safe read-modify-write of a whole-document JSON file with group commit.
+
+    Callers hand over a mutator, not a finished document: update() takes the file lock,
+    re-reads the file, applies every pending mutator in arrival order and commits them with one
+    atomic write. Updates that arrive while a commit is in flight (or, in batched mode, within
+    the commit window) join the next commit. Other processes are serialized by the file lock,
+    and since every commit starts from the file's current contents, no writer's change is lost.
+    """
+
+    def __init__(self, path: str, durability: str = JSON_STORE_DURABILITY, commit_window_ms: float = JSON_STORE_COMMIT_WINDOW_MS,
+                 default=list, on_commit=None):
+        if durability not in (DURABILITY_FSYNC, DURABILITY_BATCHED):
+            raise ValueError(f"Unknown durability mode '{durability}'")
+        self.path = path
+        self.durability = durability
+        self.commit_window = commit_window_ms / 1000.0
+        self.default = default      # Document used when the file does not exist yet
+        self.on_commit = on_commit  # Called with the committed document, still under the file lock
+        self._cond = threading.Condition()
+        self._pending = []  # (seq, mutator) waiting for the next commit
+        self._pending_seq = 0
+        self._committed_seq = 0
+        self._committing = False
+        self._outcomes = {}  # seq -> (result, error)
+
+    def update(self, mutator):
+        """Applies `mutator(document)` to the current file contents and durably commits the result.
+
+        The mutator changes the document in place; its return value is returned here. If it
+        raises, its changes are discarded, the other updates of the batch still commit, and the
+        exception is re-raised to this caller. Commit errors (e.g. IOError) are raised to every
+        caller of the batch.
+        """
+        with self._cond:
+            self._pending_seq += 1
+            my_seq = self._pending_seq
+            self._pending.append((my_seq, mutator))
+            # If a leader is writing, it will pick up our mutator in its next round.
+            while self._committing and self._committed_seq < my_seq:
+                self._cond.wait()
+            if self._committed_seq >= my_seq:
+                return self._outcome(my_seq)
+            self._committing = True
+
+        # This thread leads until no more updates are pending.
+        leading = True
+        try:
+            if self.durability == DURABILITY_BATCHED and self.commit_window > 0:
+                time.sleep(self.commit_window)
+            while True:
+                with self._cond:
+                    if not self._pending:
+                        self._committing = False
+                        leading = False
+                        self._cond.notify_all()
+                        break
+                    batch, self._pending = self._pending, []
+                outcomes = self._commit(batch)
+                with self._cond:
+                    self._outcomes.update(outcomes)
+                    self._committed_seq = batch[-1][0]
+                    self._cond.notify_all()
+        finally:
+            if leading:
+                with self._cond:
+                    self._committing = False
+                    self._cond.notify_all()
+
+        with self._cond:
+            return self._outcome(my_seq)
+
+    def _outcome(self, seq: int):
+        result, error = self._outcomes.pop(seq)
+        if error:
+            raise error
+        return result
+
+    def _read(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return self.default()
+
+    def _commit(self, batch: list) -> dict:
+        outcomes = {}
+        try:
+            with FileLock(self.path):
+                document = self._read() # An unreadable file fails the batch instead of being overwritten
+                for seq, mutator in batch:
+                    # A lone mutator needs no copy: if it fails, nothing is written
+                    working = copy.deepcopy(document) if len(batch) > 1 else document
+                    try:
+                        outcomes[seq] = (mutator(working), None)
+                        document = working
+                    except Exception as e:
+                        outcomes[seq] = (None, e)
+                if any(error is None for _, error in outcomes.values()):
+                    atomic_write_json(self.path, document)
+                    if self.on_commit:
+                        try:
+                            self.on_commit(document)
+                        except Exception as e:
+                            logger.error(f"Error in commit hook for {self.path}: {e}", exc_info=True)
+        except Exception as e:
+            return {seq: (None, e) for seq, _ in batch}
+        return outcomes
@@ -0,0 +1,85 @@
+import os
+import gzip
+import hashlib
+import logging
+import threading
+
+try:
+    import brotli  # Optional: pip install Brotli to also serve br variants
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+GZIP_LEVEL = 9       # Pages are compressed once per template version, so use the best ratio
+BROTLI_QUALITY = 11
+
+# Preference order when the client accepts several encodings equally
+ENCODING_PREFERENCE = ('br', 'gzip', 'identity')
+
+
+def compress_variants(raw: bytes) -> dict:
+    """Returns {'identity': raw, 'gzip': ..., 'br': ...} (br only if the brotli package is installed)."""
+    variants = {'identity': raw, 'gzip': gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(raw, quality=BROTLI_QUALITY)
+    return variants
+
+
+def choose_encoding(variants: dict, accept_encodings) -> str:
+    """Picks the best stored variant for a werkzeug Accept-Encoding header object."""
+    best, best_quality = 'identity', 0
+    for encoding in ENCODING_PREFERENCE:
+        if encoding not in variants:
+            continue
+        quality = accept_encodings[encoding] if encoding != 'identity' else 1
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CachedPage:
+    __slots__ = ('template_name', 'mtime_ns', 'variants', 'etag')
+
+    def __init__(self, template_name: str, mtime_ns: int, raw: bytes):
+        self.template_name = template_name
+        self.mtime_ns = mtime_ns
+        self.variants = compress_variants(raw)
+        self.etag = hashlib.sha256(raw).hexdigest()[:32]
+
+
+class RenderedPageCache:
+    """Full-response cache for templates whose output does not depend on the request.
+
+    Entries are keyed by template name and revalidated against the template file's mtime,
+    so a hit costs one stat() and never touches Jinja. Only use it for self-contained
+    templates (no extends/include), since only the named file's mtime is checked.
+    """
+
+    def __init__(self, template_folder: str, enabled: bool = True):
+        self.template_folder = template_folder
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._pages = {}
+
+    def _template_mtime(self, template_name: str) -> int | None:
+        try:
+            return os.stat(os.path.join(self.template_folder, template_name)).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, template_name: str, render) -> CachedPage:
+        """Returns the cached page for `template_name`, calling `render()` (-> str) on a miss."""
+        mtime_ns = self._template_mtime(template_name)
+        page = self._pages.get(template_name)
+        if page is not None and mtime_ns is not None and page.mtime_ns == mtime_ns:
+            return page
+        page = CachedPage(template_name, mtime_ns, render().encode('utf-8'))
+        with self._lock:
+            self._pages[template_name] = page
+        logger.info(f"Cached rendered page {template_name} ({', '.join(f'{k}={len(v)}' for k, v in page.variants.items())} bytes)")
+        return page
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
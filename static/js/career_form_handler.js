@@ -1,4 +1,159 @@
 // static/js/career_form_handler.js
+// CVs larger than this are sent in chunks through /api/cv-uploads, so a dropped connection only costs the current chunk
+const RESUMABLE_UPLOAD_THRESHOLD = 2 * 1024 * 1024;
+const UPLOAD_RETRY_DELAYS_MS = [1000, 2000, 5000, 10000, 20000, 30000]; // Then the upload fails; submitting again resumes it
+
+function readJsonResponse(response) {
+    if (!response.ok) {
+        // Try to parse error response, but fallback if it's not JSON
+        return response.json().catch(() => {
+            throw new Error(`HTTP error ${response.status}`);
+        }).then(errData => {
+            throw { apiError: true, data: errData, status: response.status };
+        });
+    }
+    return response.json();
+}
+
+function uploadSessionKey(file) {
+    // Same file picked again (after a reload or a failed submit) resumes the same upload
+    return `cvUpload:${file.name}:${file.size}:${file.lastModified}`;
+}
+
+function rememberUpload(key, uploadId) {
+    try {
+        if (uploadId) {
+            localStorage.setItem(key, uploadId);
+        } else {
+            localStorage.removeItem(key);
+        }
+    } catch (e) {
+        // Private mode or storage disabled: uploads still resume within this page
+    }
+}
+
+function savedUpload(key) {
+    try {
+        return localStorage.getItem(key);
+    } catch (e) {
+        return null;
+    }
+}
+
+async function startOrResumeUpload(file) {
+    const key = uploadSessionKey(file);
+    const savedId = savedUpload(key);
+    if (savedId) {
+        try {
+            const status = await fetch(`/api/cv-uploads/${encodeURIComponent(savedId)}`).then(readJsonResponse);
+            return { upload_id: savedId, offset: status.offset, chunk_size: status.chunk_size };
+        } catch (e) {
+            rememberUpload(key, null); // Expired or unknown: start over
+        }
+    }
+    const session = await fetch('/api/cv-uploads', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ filename: file.name, size: file.size })
+    }).then(readJsonResponse);
+    rememberUpload(key, session.upload_id);
+    return session;
+}
+
+async function uploadCvInChunks(file, onProgress) {
+    const session = await startOrResumeUpload(file);
+    const uploadUrl = `/api/cv-uploads/${encodeURIComponent(session.upload_id)}`;
+    const chunkSize = session.chunk_size || 1024 * 1024;
+    let offset = session.offset;
+    let attempt = 0;
+    onProgress(offset / file.size);
+    while (offset < file.size) {
+        try {
+            const response = await fetch(uploadUrl, {
+                method: 'PUT',
+                headers: { 'Upload-Offset': String(offset), 'Content-Type': 'application/octet-stream' },
+                body: file.slice(offset, offset + chunkSize)
+            });
+            if (response.status === 409) { // The server has a different offset (e.g. a chunk whose response was lost)
+                offset = (await response.json()).offset;
+                continue;
+            }
+            offset = (await readJsonResponse(response)).offset;
+            attempt = 0;
+            onProgress(offset / file.size);
+        } catch (error) {
+            if (error.apiError) {
+                if (error.status === 404 || error.status === 400) {
+                    rememberUpload(uploadSessionKey(file), null); // Expired or rejected: the next submit starts over
+                }
+                throw error;
+            }
+            if (attempt >= UPLOAD_RETRY_DELAYS_MS.length) {
+                throw error;
+            }
+            await new Promise(resolve => setTimeout(resolve, UPLOAD_RETRY_DELAYS_MS[attempt++]));
+            try { // Resume from what the server actually received
+                offset = (await fetch(uploadUrl).then(readJsonResponse)).offset;
+            } catch (e) {
+                // Still offline; the next PUT fails and waits again
+            }
+        }
+    }
+    return session.upload_id;
+}
+
+async function findStoredCv(file) {
+    // A CV sent with an earlier application is already on the server: only its SHA-256 needs to be sent
+    if (!(window.crypto && window.crypto.subtle)) {
+        return null; // Web Crypto is only available on HTTPS pages
+    }
+    try {
+        const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+        const sha256 = Array.from(new Uint8Array(digest), b => b.toString(16).padStart(2, '0')).join('');
+        const response = await fetch(`/api/cv-blobs/${sha256}?filename=${encodeURIComponent(file.name)}`);
+        return response.ok ? sha256 : null;
+    } catch (e) {
+        return null; // Upload the file as usual
+    }
+}
+
+function submitApplication(formData, cvFile, submitButton, skipLookup) {
+    const hasCv = cvFile instanceof File && cvFile.size > 0;
+    const lookup = hasCv && !skipLookup ? findStoredCv(cvFile) : Promise.resolve(null);
+    return lookup.then(sha256 => {
+        if (sha256) {
+            formData.delete('cv_upload');
+            formData.set('cv_sha256', sha256);
+            formData.set('cv_filename', cvFile.name);
+        } else if (hasCv && cvFile.size > RESUMABLE_UPLOAD_THRESHOLD) {
+            // Large CVs are uploaded first, in resumable chunks; the form then refers to the finished upload
+            return uploadCvInChunks(cvFile, fraction => {
+                submitButton.innerHTML = `<i class="fas fa-spinner fa-spin mr-2"></i>Uploading CV... ${Math.floor(fraction * 100)}%`;
+            }).then(uploadId => {
+                formData.delete('cv_upload');
+                formData.set('cv_upload_id', uploadId);
+                submitButton.innerHTML = '<i class="fas fa-spinner fa-spin mr-2"></i>Submitting...';
+            });
+        }
+    })
+    // Use a relative URL for the fetch request
+    .then(() => fetch('/api/submit-application', {
+        method: 'POST',
+        body: formData
+    }))
+    .then(readJsonResponse)
+    .catch(error => {
+        if (error.apiError && error.data && error.data.cv_missing && !skipLookup) {
+            // The stored copy went away after the lookup: send the file after all
+            formData.delete('cv_sha256');
+            formData.delete('cv_filename');
+            formData.set('cv_upload', cvFile);
+            return submitApplication(formData, cvFile, submitButton, true);
+        }
+        throw error;
+    });
+}
+
 function handleCareerFormSubmit(formId, successContainerId, feedbackDivId) {
     const form = document.getElementById(formId);
     const successMessageContainer = document.getElementById(successContainerId);
@@ -35,25 +190,14 @@ function handleCareerFormSubmit(formId, successContainerId, feedbackDivId) {
         successMessageContainer.classList.add('hidden'); // Ensure success message is hidden at start of new submission
 
         const formData = new FormData(form);
+        const cvFile = formData.get('cv_upload');
 
-        // Use a relative URL for the fetch request
-        fetch('/api/submit-application', {
-            method: 'POST',
-            body: formData
-        })
-        .then(response => {
-            if (!response.ok) {
-                // Try to parse error response, but fallback if it's not JSON
-                return response.json().catch(() => {
-                    throw new Error(`HTTP error ${response.status}`);
-                }).then(errData => {
-                    throw { apiError: true, data: errData, status: response.status };
-                });
-            }
-            return response.json();
-        })
+        submitApplication(formData, cvFile, submitButton, false)
         .then(data => {
             if (data.success) {
+                if (formData.has('cv_upload_id')) {
+                    rememberUpload(uploadSessionKey(cvFile), null);
+                }
                 form.classList.add('opacity-0', 'transition-opacity', 'duration-500', 'ease-out');
                 setTimeout(() => {
                     form.classList.add('hidden');
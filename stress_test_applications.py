@@ -14,13 +14,14 @@ TOTAL_REQUESTS = 100         # Total number of applications to attempt to submit
 REQUEST_DELAY_SECONDS = 1 # Optional delay between starting each batch of concurrent requests
 
 DUMMY_CV_FILENAME = "dummy_cv.pdf" # CORRECTED
-DUMMY_CV_CONTENT = "This is a dummy CV file for stress testing purposes. It's named .pdf to pass validation." # CORRECTED
+# Minimal PDF: uploads are checked for the real file type, not just the extension
+DUMMY_CV_CONTENT = b"%PDF-1.4\n% Dummy CV file for stress testing purposes.\n%%EOF\n"
 
 # --- Helper Functions ---
 def create_dummy_cv():
     """Creates a dummy CV file if it doesn't exist."""
     if not os.path.exists(DUMMY_CV_FILENAME):
-        with open(DUMMY_CV_FILENAME, "w") as f:
+        with open(DUMMY_CV_FILENAME, "wb") as f:
             f.write(DUMMY_CV_CONTENT)
         print(f"Created dummy CV file: {DUMMY_CV_FILENAME}")
 